@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the agentspec CLI internals.
+
+Each subcommand builds a synthetic catalog in a temporary directory and
+times the relevant code paths against each other:
+
+    PYTHONPATH=src python3 scripts/bench.py scan --configs 2000 --latency-ms 2
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from agentspec_cli import catalog  # noqa: E402
+
+AGENT_YAML = """\
+name: {name}
+description: Synthetic benchmark agent number {i}
+version: 1.0.{i}
+author: bench
+model_preferences:
+  - gpt-4
+  - claude-sonnet
+tags:
+  - bench
+  - tag-{tag}
+system_prompt: |
+{prompt}
+inputs:
+  - name: user_input
+    description: Primary input from the user
+    required: true
+outputs:
+  - name: result
+    description: Generated output
+    format: markdown
+"""
+
+
+def make_catalog(root: Path, count: int, prompt_lines: int = 20) -> Path:
+    prompt = "\n".join(f"  Line {n} of a long system prompt for the benchmark agent." for n in range(prompt_lines))
+    for i in range(count):
+        name = f"agent-{i:06d}"
+        d = root / "agents" / name
+        d.mkdir(parents=True)
+        (d / "agent.yaml").write_text(AGENT_YAML.format(name=name, i=i, tag=i % 50, prompt=prompt))
+    (root / "skills").mkdir(exist_ok=True)
+    return root
+
+
+def timed(label: str, fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<32} {best * 1000:10.1f} ms")
+    return best
+
+
+def bench_scan(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_catalog(Path(tmp), args.configs)
+        items = [("agents", d) for d in catalog.iter_config_dirs(root, "agents")]
+        original = catalog._read_item
+
+        def slow_read(item):
+            time.sleep(args.latency_ms / 1000)
+            return original(item)
+
+        print(f"scan: {args.configs} configs, {args.latency_ms} ms simulated read latency")
+        with patch.object(catalog, "_read_item", slow_read):
+            serial = timed("serial", lambda: list(catalog.read_configs(items, "serial")))
+            concurrent = timed(
+                f"async (concurrency={args.concurrency})",
+                lambda: list(catalog.read_configs(items, "async", args.concurrency)),
+            )
+        print(f"  speedup                          {serial / concurrent:10.1f}x")
+
+
+def bench_header(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_catalog(Path(tmp), args.configs, prompt_lines=args.prompt_lines)
+        texts = [(d / "agent.yaml").read_text() for d in catalog.iter_config_dirs(root, "agents")]
+
+        print(f"header: {args.configs} configs, {args.prompt_lines}-line system prompts")
+        full = timed("full parse (yaml.safe_load)", lambda: [catalog.parse_config(t, "agents") for t in texts])
+        header = timed("header-only (event stream)", lambda: [catalog.parse_header(t, "agents") for t in texts])
+        print(f"  speedup                          {full / header:10.1f}x")
+
+
+def bench_render(args) -> None:
+    import io
+
+    from rich.console import Console
+
+    from agentspec_cli.commands import _print_summary
+    from agentspec_cli.output import Output
+
+    entries = [
+        {"dir": f"agent-{i:06d}", "status": "ok", "name": f"agent-{i:06d}", "version": "1.0.0",
+         "description": f"Synthetic benchmark agent number {i}"}
+        for i in range(args.entries)
+    ]
+
+    def per_line_markup(force_terminal):
+        console = Console(file=io.StringIO(), force_terminal=force_terminal, width=120)
+        for e in entries:
+            console.print(f"  [green]●[/green] {e['name']} [dim](v{e['version']})[/dim] - {e['description']}")
+
+    def output_layer(force_terminal):
+        console = Console(file=io.StringIO(), force_terminal=force_terminal, width=120)
+        with Output(console) as out:
+            for e in entries:
+                _print_summary(out, e, "agent.yaml")
+
+    print(f"render: {args.entries} list entries")
+    timed("per-line console.print (tty)", lambda: per_line_markup(True), repeat=1)
+    timed("Output, batched Rich (tty)", lambda: output_layer(True), repeat=1)
+    timed("per-line console.print (pipe)", lambda: per_line_markup(False), repeat=1)
+    timed("Output, plain writer (pipe)", lambda: output_layer(False), repeat=1)
+
+
+def bench_verify(args) -> None:
+    from agentspec_cli import lock
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_catalog(Path(tmp), args.configs)
+        data = lock.build_lock(root)
+        print(f"verify: {args.configs} locked files")
+        timed("verify (1 thread)", lambda: lock.verify(root, data, workers=1))
+        timed(f"verify ({lock.default_workers()} threads)", lambda: lock.verify(root, data))
+
+
+def bench_prompts(args) -> None:
+    import json
+    import os
+
+    from agentspec_cli.render import Renderer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_catalog(Path(tmp), 1)
+        renderer = Renderer.from_config(root, "agent-000000")
+        lines = [json.dumps({"user_input": f"request number {i}"}) for i in range(args.records)]
+        jobs = os.cpu_count() or 1
+        print(f"prompts: {args.records} input records")
+        serial = timed("serial", lambda: sum(1 for _ in renderer.render_lines(lines)), repeat=1)
+        pooled = timed(f"process pool ({jobs} workers)", lambda: sum(1 for _ in renderer.render_lines(lines, jobs)), repeat=1)
+        print(f"  records/s (best)                 {args.records / min(serial, pooled):10.0f}")
+
+
+def bench_fmt(args) -> None:
+    from agentspec_cli import fmt
+
+    def check(cache):
+        results = list(fmt.run(root, cache))
+        if cache:
+            for rel, status, _, digest, _ in results:
+                if digest is not None:
+                    cache.remember(rel, str(root / rel), digest, status)
+            cache.save()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_catalog(Path(tmp), args.configs)
+        print(f"fmt --check: {args.configs} configs")
+        timed("no cache (parse every file)", lambda: check(None), repeat=1)
+        check(fmt.FormatCache(root))
+        timed("warm cache (stat only)", lambda: check(fmt.FormatCache(root)))
+
+
+def bench_stats(args) -> None:
+    from agentspec_cli import stats
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_catalog(Path(tmp), args.configs)
+        print(f"stats: {args.configs} configs")
+        timed("cold (parse every config)", lambda: stats.load_features(root), repeat=1)
+        features, _ = stats.load_features(root)
+        timed("warm cache (stat only)", lambda: stats.load_features(root))
+        timed("aggregate (vectorized)", lambda: stats.summarize(features))
+
+
+def bench_routes(args) -> None:
+    import random
+
+    from agentspec_cli import routes
+
+    models = [f"model-{m}" for m in range(40)]
+    rng = random.Random(0)
+    table = {f"agent-{i:06d}": rng.sample(models, 3) for i in range(args.agents)}
+    names = list(table)
+    probes = [rng.choice(names) for _ in range(args.lookups)]
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_catalog(Path(tmp), 1)
+        json_path, bin_path = Path(tmp) / "routes.json", Path(tmp) / "routes.bin"
+        print(f"routes: {args.agents} agents, {args.lookups} lookups")
+        timed("write JSON table", lambda: routes.write(json_path, table))
+        timed("write binary table", lambda: routes.write(bin_path, table))
+        print(f"  {'JSON / binary size':<32} {json_path.stat().st_size // 1024:7d} KB / {bin_path.stat().st_size // 1024} KB")
+        timed("load JSON table", lambda: routes.RouteTable.open(json_path))
+        timed("open binary table (mmap)", lambda: routes.RouteTable.open(bin_path))
+        for label, path in (("JSON", json_path), ("binary", bin_path)):
+            reader = routes.RouteTable.open(path)
+            best = timed(f"{label} lookups", lambda: [reader.get(name) for name in probes])
+            print(f"  {label + ' per lookup':<32} {best / len(probes) * 1e9:10.0f} ns")
+        agent_dir = root / "agents" / "agent-000000"
+        best = timed("YAML re-read (status quo)", lambda: [catalog.load_config(agent_dir, "agents") for _ in range(1000)])
+        print(f"  {'YAML re-read per lookup':<32} {best / 1000 * 1e9:10.0f} ns")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    scan = sub.add_parser("scan", help="serial vs async config reads")
+    scan.add_argument("--configs", type=int, default=1000)
+    scan.add_argument("--latency-ms", type=float, default=1.0)
+    scan.add_argument("--concurrency", type=int, default=catalog.DEFAULT_CONCURRENCY)
+    scan.set_defaults(func=bench_scan)
+
+    header = sub.add_parser("header", help="full YAML parse vs header-only metadata extraction")
+    header.add_argument("--configs", type=int, default=500)
+    header.add_argument("--prompt-lines", type=int, default=200)
+    header.set_defaults(func=bench_header)
+
+    render = sub.add_parser("render", help="list output: per-line Rich markup vs the Output layer")
+    render.add_argument("--entries", type=int, default=10_000)
+    render.set_defaults(func=bench_render)
+
+    prompts = sub.add_parser("prompts", help="agentspec render: serial vs process pool")
+    prompts.add_argument("--records", type=int, default=200_000)
+    prompts.set_defaults(func=bench_prompts)
+
+    verify = sub.add_parser("verify", help="lockfile verification, single-threaded vs parallel")
+    verify.add_argument("--configs", type=int, default=50_000)
+    verify.set_defaults(func=bench_verify)
+
+    fmt = sub.add_parser("fmt", help="agentspec fmt --check: full parse vs the content-hash cache")
+    fmt.add_argument("--configs", type=int, default=5_000)
+    fmt.set_defaults(func=bench_fmt)
+
+    stats = sub.add_parser("stats", help="agentspec stats: cold parse vs cached features, and aggregation")
+    stats.add_argument("--configs", type=int, default=50_000)
+    stats.set_defaults(func=bench_stats)
+
+    routes = sub.add_parser("routes", help="routing table load time and lookup latency: JSON vs binary vs YAML")
+    routes.add_argument("--agents", type=int, default=50_000)
+    routes.add_argument("--lookups", type=int, default=100_000)
+    routes.set_defaults(func=bench_routes)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
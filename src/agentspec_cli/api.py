@@ -0,0 +1,106 @@
+import copy
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Union
+
+from agentspec_cli.catalog import KINDS, Catalog, Resolver, config_name, validation_error
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+_catalogs: Dict[Path, Catalog] = {}
+_default: Optional[Path] = None
+_lock = threading.Lock()
+
+
+def load_catalog(path: Optional[PathLike] = None) -> Catalog:
+    """The process-wide catalog for `path` (default: the current directory).
+
+    The first call for a directory parses every config once; later calls
+    return the same object, whose entries are re-read only when a file's
+    mtime or size changes. Functions below that are called without `path`
+    use the most recently loaded catalog.
+    """
+    global _default
+    project = Path(path if path is not None else os.getcwd()).resolve()
+    with _lock:
+        catalog = _catalogs.get(project)
+        if catalog is None:
+            catalog = Catalog(project)
+            resolver = Resolver(project, catalog.load)
+            for kind in KINDS:
+                for _ in catalog.configs(kind, resolver):
+                    pass
+            _catalogs[project] = catalog
+        _default = project
+    return catalog
+
+
+def clear_cache() -> None:
+    """Forget every loaded catalog."""
+    global _default
+    with _lock:
+        _catalogs.clear()
+        _default = None
+
+
+def _catalog(path: Optional[PathLike]) -> Catalog:
+    default = _default
+    if path is None and default is not None:
+        return _catalogs.get(default) or load_catalog(default)
+    return load_catalog(path)
+
+
+def _get(kind: str, name: str, path: Optional[PathLike]) -> Dict[str, Any]:
+    catalog = _catalog(path)
+    if not (catalog.project / kind / name).is_dir():
+        raise KeyError(f"{kind}/{name} not found in {catalog.project}")
+    data, error = Resolver(catalog.project, catalog.load).resolve(kind, name)
+    error = validation_error(data, error)
+    if error:
+        raise ValueError(f"{kind}/{name}: {error}")
+    # Copies, so callers cannot change what later lookups return.
+    return copy.deepcopy(data)
+
+
+def get_agent(name: str, path: Optional[PathLike] = None) -> Dict[str, Any]:
+    """The agent's config with `extends:` resolved.
+
+    Raises KeyError if there is no such agent and ValueError if it is invalid.
+    """
+    return _get("agents", name, path)
+
+
+def get_skill(name: str, path: Optional[PathLike] = None) -> Dict[str, Any]:
+    """The skill's config with `extends:` resolved; raises like `get_agent`."""
+    return _get("skills", name, path)
+
+
+def _iter(kind: str, path: Optional[PathLike]) -> Iterator[Dict[str, Any]]:
+    catalog = _catalog(path)
+    for _, data, error in catalog.configs(kind, Resolver(catalog.project, catalog.load)):
+        if validation_error(data, error) is None:
+            yield copy.deepcopy(data)
+
+
+def iter_agents(path: Optional[PathLike] = None) -> Iterator[Dict[str, Any]]:
+    """Every valid agent, resolved, in directory order; use `validate` to find the invalid ones."""
+    return _iter("agents", path)
+
+
+def iter_skills(path: Optional[PathLike] = None) -> Iterator[Dict[str, Any]]:
+    """Every valid skill, resolved, in directory order; use `validate` to find the invalid ones."""
+    return _iter("skills", path)
+
+
+def validate(path: Optional[PathLike] = None) -> Dict[str, str]:
+    """Map "kind/name" to the error of every invalid config, including dirs missing their YAML; empty when valid."""
+    catalog = _catalog(path)
+    resolver = Resolver(catalog.project, catalog.load)
+    errors = {}
+    for kind in KINDS:
+        for config_dir, data, error in catalog.configs(kind, resolver):
+            error = validation_error(data, error)
+            if error:
+                errors[f"{kind}/{config_name(catalog.project, kind, config_dir)}"] = error
+    return errors
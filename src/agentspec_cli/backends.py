@@ -0,0 +1,132 @@
+import abc
+import asyncio
+import hashlib
+import json
+import os
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+Message = Dict[str, str]
+
+DEFAULT_CONCURRENCY = 8
+STUB_MODEL = "agentspec-stub"
+
+
+def stub_reply(messages: List[Message], model: str = STUB_MODEL) -> str:
+    """Deterministic stand-in for a model: echoes the last user message with a digest of the whole conversation."""
+    user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+    digest = hashlib.sha256(json.dumps(messages, sort_keys=True).encode()).hexdigest()[:12]
+    return f"[{model} {digest}] {user}"
+
+
+class Backend(abc.ABC):
+    """A model endpoint. `concurrency` caps how many requests are in flight at once."""
+
+    name = "backend"
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY):
+        self.concurrency = concurrency
+
+    @property
+    def cache_key(self) -> str:
+        return self.name
+
+    @abc.abstractmethod
+    async def complete(self, messages: List[Message]) -> str:
+        """The model's reply to `messages`."""
+
+
+class StubBackend(Backend):
+    """In-process stub; `latency` (seconds) simulates a slow model."""
+
+    name = "stub"
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, latency: float = 0.0):
+        super().__init__(concurrency)
+        self.latency = latency
+
+    async def complete(self, messages: List[Message]) -> str:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return stub_reply(messages)
+
+
+class HTTPBackend(Backend):
+    """OpenAI-compatible chat completions endpoint, such as `agentspec stub-server`."""
+
+    def __init__(self, url: str, model: str = STUB_MODEL, concurrency: int = DEFAULT_CONCURRENCY, timeout: float = 60.0):
+        super().__init__(concurrency)
+        self.url = url.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self.name = f"{self.url}#{model}"
+
+    def _post(self, messages: List[Message]) -> str:
+        headers = {"Content-Type": "application/json"}
+        api_key = os.environ.get("AGENTSPEC_API_KEY")
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        request = urllib.request.Request(
+            f"{self.url}/v1/chat/completions",
+            data=json.dumps({"model": self.model, "messages": messages}).encode(),
+            headers=headers,
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            body = json.loads(response.read())
+        return body["choices"][0]["message"]["content"]
+
+    async def complete(self, messages: List[Message]) -> str:
+        return await asyncio.get_running_loop().run_in_executor(None, self._post, messages)
+
+
+def get_backend(
+    spec: str, concurrency: int = DEFAULT_CONCURRENCY, model: Optional[str] = None, latency: float = 0.0
+) -> Backend:
+    if spec == "stub":
+        return StubBackend(concurrency, latency)
+    if spec.startswith(("http://", "https://")):
+        return HTTPBackend(spec, model or STUB_MODEL, concurrency)
+    raise ValueError(f"unknown backend '{spec}' (expected 'stub' or an http(s):// URL)")
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self.send_error(404)
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            messages = body["messages"]
+            model = body.get("model") or STUB_MODEL
+        except (ValueError, KeyError, TypeError):
+            self.send_error(400)
+            return
+        reply = {
+            "object": "chat.completion",
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": stub_reply(messages, model)}}],
+        }
+        data = json.dumps(reply).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """Local OpenAI-compatible server that answers with `stub_reply`, for offline evals."""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _StubHandler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from rich.align import Align
 from rich.console import Console
 from rich.text import Text
@@ -16,7 +18,8 @@ TAGLINE = "AgentSpec - AI Agent Configuration Toolkit"
 console = Console()
 
 
-def show_banner() -> None:
+@lru_cache(maxsize=None)
+def _styled_banner() -> Text:
     banner_lines = BANNER.strip().split("\n")
     colors = ["bright_blue", "blue", "cyan", "bright_cyan", "white", "bright_white"]
 
@@ -24,7 +27,14 @@ def show_banner() -> None:
     for i, line in enumerate(banner_lines):
         color = colors[i % len(colors)]
         styled.append(line + "\n", style=color)
+    return styled
+
+
+def show_banner() -> None:
+    if not console.is_terminal:
+        console.file.write(f"{BANNER}{TAGLINE}\n\n")
+        return
 
-    console.print(Align.center(styled))
+    console.print(Align.center(_styled_banner()))
     console.print(Align.center(Text(TAGLINE, style="italic bright_yellow")))
     console.print()
@@ -0,0 +1,653 @@
+import asyncio
+import heapq
+import json
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import yaml
+
+from agentspec_cli.ignore import load_ignore
+
+KINDS = {
+    "agents": "agent.yaml",
+    "skills": "skill.yaml",
+}
+
+REQUIRED_FIELDS = ["name", "description", "version"]
+HEADER_FIELDS = ("name", "description", "version")
+
+IO_BACKENDS = ["serial", "async"]
+DEFAULT_CONCURRENCY = 32
+DEFAULT_RUN_SIZE = 10_000
+# Resolved `extends:` chains kept while streaming; shared bases stay hot, the rest are re-merged on demand.
+STREAM_RESOLVER_MEMO = 1_024
+
+
+def scan_config_names(project: Path, kind: str) -> Iterator[str]:
+    """Names of the config dirs under `kind/`, in no particular order.
+
+    A directory holding the kind's YAML file is a config and is not descended
+    into. One without it is a namespace when it has subdirectories, and its
+    configs are named by their path below `kind/` ("payments/refund-bot");
+    otherwise it is a config that is missing its YAML. Directories matched by
+    .agentspecignore are pruned without being opened.
+    """
+    ignore = load_ignore(project)
+    yaml_name = KINDS[kind]
+    pending = [("", os.path.join(project, kind))]
+    while pending:
+        name, path = pending.pop()
+        prefix = f"{name}/" if name else ""
+        found_subdir = False
+        try:
+            # Entries are consumed as they are read, so only namespace dirs waiting
+            # to be opened are held, not a whole (possibly flat, huge) listing.
+            with os.scandir(path) as it:
+                for entry in it:
+                    if not entry.is_dir():
+                        continue
+                    found_subdir = True
+                    sub_name = prefix + entry.name
+                    if ignore is not None and ignore.match(f"{kind}/{sub_name}"):
+                        continue
+                    # Symlinked namespaces are not followed, so a link cycle cannot recurse forever.
+                    if entry.is_symlink() or os.path.isfile(os.path.join(entry.path, yaml_name)):
+                        yield sub_name
+                    else:
+                        pending.append((sub_name, entry.path))
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        if name and not found_subdir:
+            yield name
+
+
+def iter_configs(project: Path, kind: str) -> Iterator[Tuple[str, Path]]:
+    """(name, config dir) of every config of a kind, sorted by name."""
+    kind_dir = Path(project) / kind
+    for name in sorted(scan_config_names(project, kind)):
+        yield name, kind_dir / name
+
+
+def iter_config_dirs(project: Path, kind: str) -> Iterator[Path]:
+    for _, config_dir in iter_configs(project, kind):
+        yield config_dir
+
+
+def config_name(project: Path, kind: str, config_dir) -> str:
+    """A config dir's name: its path below `kind/`, with forward slashes."""
+    kind_dir = os.path.join(project, kind)
+    path = os.fspath(config_dir)
+    if not path.startswith(kind_dir + os.sep):
+        path = os.path.join(kind_dir, os.path.relpath(path, kind_dir))
+    return path[len(kind_dir) + 1:].replace(os.sep, "/")
+
+
+MERGE_FAN_IN = 16
+
+
+def _spill(names: Iterable[str], tmp_dir: str) -> str:
+    fd, path = tempfile.mkstemp(dir=tmp_dir, suffix=".run")
+    with open(fd, "w", encoding="utf-8") as f:
+        for name in names:
+            f.write(json.dumps(name) + "\n")
+    return path
+
+
+def _read_run(path: str) -> Iterator[str]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def _merge(runs: list) -> Iterator[str]:
+    return heapq.merge(*(_read_run(path) for path in runs))
+
+
+def external_sort(names: Iterable[str], run_size: int = DEFAULT_RUN_SIZE) -> Iterator[str]:
+    # At most `run_size` names are held in memory: full runs are sorted and spilled
+    # to temporary files, then merged at most MERGE_FAN_IN files at a time so the
+    # number of open run buffers stays bounded however large the catalog grows.
+    run = []
+    names = iter(names)
+    for name in names:
+        run.append(name)
+        if len(run) >= run_size:
+            break
+    else:
+        yield from sorted(run)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="agentspec-sort-") as tmp_dir:
+        runs = [_spill(sorted(run), tmp_dir)]
+        run = []
+        for name in names:
+            run.append(name)
+            if len(run) >= run_size:
+                runs.append(_spill(sorted(run), tmp_dir))
+                run = []
+        if run:
+            runs.append(_spill(sorted(run), tmp_dir))
+            run = []
+        while len(runs) > MERGE_FAN_IN:
+            group, runs = runs[:MERGE_FAN_IN], runs[MERGE_FAN_IN:]
+            runs.append(_spill(_merge(group), tmp_dir))
+            for path in group:
+                os.unlink(path)
+        yield from _merge(runs)
+
+
+def _read_text(path) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+# libyaml's parser, when PyYAML was built with it, for bulk passes over the whole catalog.
+FAST_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def parse_config(text: Optional[str], kind: str, loader=yaml.SafeLoader) -> Tuple[Optional[Any], Optional[str]]:
+    if text is None:
+        return None, f"missing {KINDS[kind]}"
+    try:
+        return yaml.load(text, Loader=loader), None
+    except Exception as e:
+        return None, f"YAML parse error: {e}"
+
+
+class ConfigDumper(yaml.SafeDumper):
+    """Writes YAML in the layout of generated configs: list items indented under their key, `|` for multi-line text."""
+
+    def increase_indent(self, flow=False, indentless=False):
+        return super().increase_indent(flow, False)
+
+
+def _represent_str(dumper: yaml.SafeDumper, value: str) -> yaml.ScalarNode:
+    return dumper.represent_scalar("tag:yaml.org,2002:str", value, style="|" if "\n" in value else None)
+
+
+ConfigDumper.add_representer(str, _represent_str)
+
+
+def dump_yaml(data: Any) -> str:
+    # Never fold long lines: a reflowed description is a noisy diff.
+    return yaml.dump(data, Dumper=ConfigDumper, sort_keys=False, allow_unicode=True, width=float("inf"))
+
+
+_resolver = yaml.resolver.Resolver()
+_constructor = yaml.constructor.SafeConstructor()
+
+
+def _scalar(event: yaml.ScalarEvent) -> Any:
+    tag = event.tag
+    if tag is None or tag == "!":
+        tag = _resolver.resolve(yaml.ScalarNode, event.value, event.implicit)
+    node = yaml.ScalarNode(tag, event.value, style=event.style)
+    return _constructor.construct_document(node)
+
+
+def _header_fields(text: str, fields: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+    # Walk the event stream of the top-level mapping, keeping only scalar values of
+    # `fields`, and stop as soon as all of them have been seen. Nested collections are
+    # skipped without being composed. Returns None when the fast path does not apply.
+    if EXTENDS_KEY in text:
+        # The header alone cannot be merged with a base; resolving needs the whole document.
+        return None
+    wanted = set(fields)
+    found = {}
+    events = yaml.parse(text, Loader=yaml.SafeLoader)
+    try:
+        for event in events:
+            if isinstance(event, (yaml.StreamStartEvent, yaml.DocumentStartEvent)):
+                continue
+            if not isinstance(event, yaml.MappingStartEvent) or event.anchor:
+                return None
+            break
+        else:
+            return None
+        key = None
+        depth = 0
+        for event in events:
+            if depth:
+                if isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+                    depth += 1
+                elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+                    depth -= 1
+                continue
+            if isinstance(event, yaml.MappingEndEvent):
+                return None
+            if isinstance(event, yaml.AliasEvent) or getattr(event, "anchor", None):
+                return None
+            if key is None:
+                if not isinstance(event, yaml.ScalarEvent):
+                    return None
+                key = _scalar(event)
+                continue
+            if isinstance(event, yaml.ScalarEvent):
+                if key in wanted:
+                    found[key] = _scalar(event)
+                    if len(found) == len(wanted):
+                        return found
+            elif key in wanted:
+                return None
+            else:
+                depth = 1
+            key = None
+    finally:
+        events.close()
+    return None
+
+
+def parse_header(text: Optional[str], kind: str, fields: Tuple[str, ...] = HEADER_FIELDS) -> Tuple[Optional[Any], Optional[str]]:
+    if text is None:
+        return None, f"missing {KINDS[kind]}"
+    try:
+        header = _header_fields(text, fields)
+    except Exception:
+        header = None
+    if header is None:
+        return parse_config(text, kind)
+    return header, None
+
+
+def load_config(config_dir: Path, kind: str, loader=yaml.SafeLoader) -> Tuple[Optional[Any], Optional[str]]:
+    try:
+        text = _read_text(config_dir / KINDS[kind])
+    except Exception as e:
+        return None, f"YAML parse error: {e}"
+    return parse_config(text, kind, loader)
+
+
+def step_dependencies(steps: Any) -> Tuple[Dict[str, list], Optional[str]]:
+    """Map each step name to the steps it depends on, in declaration order.
+
+    A step without `depends_on` depends on the step before it, so plain
+    ordered lists keep running sequentially.
+    """
+    if not isinstance(steps, list):
+        return {}, "steps: expected a list"
+    deps: Dict[str, list] = {}
+    previous = None
+    for i, step in enumerate(steps):
+        if not isinstance(step, dict) or not step.get("name"):
+            return {}, f"steps[{i}]: missing name"
+        name = str(step["name"])
+        if name in deps:
+            return {}, f"steps: duplicate step '{name}'"
+        after = step.get("depends_on", [previous] if previous else [])
+        if isinstance(after, str):
+            after = [after]
+        if not isinstance(after, list):
+            return {}, f"steps: '{name}' depends_on must be a list of step names"
+        deps[name] = [str(d) for d in after]
+        previous = name
+    for name, after in deps.items():
+        for d in after:
+            if d not in deps:
+                return {}, f"steps: '{name}' depends on unknown step '{d}'"
+
+    # Kahn's algorithm: whatever is never freed is on (or behind) a cycle.
+    waiting = {name: len(after) for name, after in deps.items()}
+    dependents: Dict[str, list] = {name: [] for name in deps}
+    for name, after in deps.items():
+        for d in after:
+            dependents[d].append(name)
+    ready = [name for name, n in waiting.items() if n == 0]
+    while ready:
+        for child in dependents[ready.pop()]:
+            waiting[child] -= 1
+            if waiting[child] == 0:
+                ready.append(child)
+    stuck = [name for name, n in waiting.items() if n > 0]
+    if stuck:
+        return {}, f"steps: dependency cycle involving {', '.join(stuck)}"
+    return deps, None
+
+
+def validation_error(data: Optional[Any], error: Optional[str]) -> Optional[str]:
+    if error:
+        return error
+    if not isinstance(data, dict):
+        return "YAML parse error: expected a mapping at the top level"
+    missing = [f for f in REQUIRED_FIELDS if f not in data]
+    if missing:
+        return f"missing fields: {', '.join(missing)}"
+    if data.get("steps") is not None:
+        return step_dependencies(data["steps"])[1]
+    return None
+
+
+def check_config(config_dir: Path, kind: str) -> Optional[str]:
+    return validation_error(*load_config(config_dir, kind))
+
+
+def io_backend(name: Optional[str] = None) -> str:
+    backend = name or os.environ.get("AGENTSPEC_IO") or "serial"
+    if backend not in IO_BACKENDS:
+        raise ValueError(f"unknown I/O backend '{backend}' (expected one of: {', '.join(IO_BACKENDS)})")
+    return backend
+
+
+def _read_item(item: Tuple[str, Path]) -> Optional[str]:
+    kind, config_dir = item
+    return _read_text(os.path.join(config_dir, KINDS[kind]))
+
+
+def _read_serial(items: Iterable[Tuple[str, Path]]) -> Iterator[Tuple[Tuple[str, Path], Optional[str], Optional[Exception]]]:
+    for item in items:
+        try:
+            yield item, _read_item(item), None
+        except Exception as e:
+            yield item, None, e
+
+
+def _read_async(
+    items: Iterable[Tuple[str, Path]], concurrency: int
+) -> Iterator[Tuple[Tuple[str, Path], Optional[str], Optional[Exception]]]:
+    # Reads run on a thread pool, at most `concurrency` ahead of the consumer, so
+    # parsing in the caller overlaps with the next reads. Results come back in input
+    # order, and closing the generator early cancels whatever is still in flight.
+    loop = asyncio.new_event_loop()
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="agentspec-io")
+    pending = deque()
+    items = iter(items)
+
+    def submit() -> bool:
+        item = next(items, None)
+        if item is None:
+            return False
+        pending.append((item, loop.run_in_executor(executor, _read_item, item)))
+        return True
+
+    try:
+        while len(pending) < concurrency and submit():
+            pass
+        while pending:
+            item, future = pending.popleft()
+            submit()
+            try:
+                yield item, loop.run_until_complete(future), None
+            except Exception as e:
+                yield item, None, e
+    finally:
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True, cancel_futures=True)
+        loop.close()
+
+
+def read_configs(
+    items: Iterable[Tuple[str, Path]],
+    backend: str = "serial",
+    concurrency: int = DEFAULT_CONCURRENCY,
+    parse=None,
+) -> Iterator[Tuple[str, Path, Optional[Any], Optional[str]]]:
+    parse = parse or parse_config
+    if backend == "async":
+        texts = _read_async(items, concurrency)
+    else:
+        texts = _read_serial(items)
+    try:
+        for (kind, config_dir), text, exc in texts:
+            if exc is not None:
+                yield kind, config_dir, None, f"YAML parse error: {exc}"
+            else:
+                yield (kind, config_dir, *parse(text, kind))
+    finally:
+        texts.close()
+
+
+def stream_summaries(
+    project: Path,
+    kind: str,
+    backend: str = "serial",
+    sort: bool = True,
+    run_size: int = DEFAULT_RUN_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    # scan -> (external sort) -> read -> parse -> emit, one document at a time; only the
+    # small summary of each config survives past this generator. Paths stay plain
+    # strings here because pathlib interns every component it parses.
+    names = scan_config_names(project, kind)
+    if sort:
+        names = external_sort(names, run_size)
+    kind_dir = os.path.join(project, kind)
+    items = ((kind, os.path.join(kind_dir, name)) for name in names)
+    # Bounded like everything else here: a catalog full of `extends:` must not grow the memo without limit.
+    resolver = Resolver(project, max_memo=STREAM_RESOLVER_MEMO)
+    start = len(kind_dir) + 1
+    with closing(read_configs(items, backend, parse=parse_header)) as results:
+        for _, config_dir, data, error in results:
+            name = config_dir[start:]
+            yield summarize(config_dir, *resolver.resolve(kind, name, data, error), name=name)
+
+
+def yaml_missing(error: Optional[str]) -> bool:
+    return bool(error) and error.startswith("missing ") and error.endswith(".yaml")
+
+
+def summarize(config_dir: Path, data: Optional[Any], error: Optional[str], name: Optional[str] = None) -> Dict[str, Any]:
+    dir_name = name or os.path.basename(config_dir)
+    if yaml_missing(error):
+        return {"dir": dir_name, "status": "missing"}
+    if error or not isinstance(data, dict):
+        return {"dir": dir_name, "status": "invalid"}
+    return {
+        "dir": dir_name,
+        "status": "ok",
+        "name": data.get("name", dir_name),
+        "description": data.get("description", ""),
+        "version": data.get("version", ""),
+    }
+
+
+def prompt_bytes(config_dir: Path, data: dict) -> int:
+    """Size of the prompt an agent is invoked with: `system_prompt` plus `prompt.md`."""
+    size = len(str(data.get("system_prompt") or "").encode())
+    try:
+        size += os.stat(os.path.join(config_dir, "prompt.md")).st_size
+    except OSError:
+        pass
+    return size
+
+
+def config_fingerprint(config_dir: Path, kind: str) -> str:
+    parts = []
+    for name in (KINDS[kind], "prompt.md"):
+        try:
+            st = os.stat(os.path.join(config_dir, name))
+            parts.append(f"{st.st_mtime_ns}:{st.st_size}")
+        except OSError:
+            parts.append("-")
+    return "/".join(parts)
+
+
+def config_dir_for_path(project: Path, rel_path: str) -> Optional[Path]:
+    """The config dir a project-relative file belongs to, or None outside any config or in an ignored one."""
+    parts = Path(rel_path).parts
+    if len(parts) < 2 or parts[0] not in KINDS:
+        return None
+    kind = parts[0]
+    # The nearest directory holding the kind's YAML; a deleted config is known by its YAML's path.
+    end = next((end for end in range(2, len(parts)) if (project.joinpath(*parts[:end]) / KINDS[kind]).exists()), None)
+    if end is None:
+        end = len(parts) - 1 if len(parts) > 2 and parts[-1] == KINDS[kind] else 2
+    ignore = load_ignore(project)
+    if ignore is not None and ignore.match_any("/".join(parts[:end])):
+        return None
+    return project.joinpath(*parts[:end])
+
+
+EXTENDS_KEY = "extends"
+_UNSET = object()
+
+
+def split_ref(ref: str, default_kind: str) -> Tuple[str, str]:
+    """(kind, name) of a reference such as "skills/base", "payments/base" or "base"; names may be namespaced."""
+    kind, _, name = ref.partition("/")
+    if name and kind in KINDS:
+        return kind, name
+    return default_kind, ref
+
+
+def extends_target(kind: str, data: Any) -> Optional[Tuple[str, str]]:
+    """The (kind, name) a config's `extends:` names, whether or not that config exists."""
+    ref = data.get(EXTENDS_KEY) if isinstance(data, dict) else None
+    return split_ref(ref, kind) if isinstance(ref, str) and ref else None
+
+
+def deep_merge(base: Any, override: Any) -> Any:
+    # Mappings merge key by key; any other value in the override (lists included)
+    # replaces the base value outright.
+    if not isinstance(base, dict) or not isinstance(override, dict):
+        return override
+    merged = dict(base)
+    for key, value in override.items():
+        merged[key] = deep_merge(base[key], value) if key in base else value
+    return merged
+
+
+class Resolver:
+    """Resolves `extends:` chains, memoizing each base so it is loaded and merged once.
+
+    Only configs that take part in inheritance are kept: a config without an
+    `extends` key passed to `resolve` is returned as-is and not remembered.
+    With `max_memo`, at most that many are kept, least recently used first
+    out; an evicted base is simply loaded and merged again when next needed.
+    """
+
+    def __init__(self, project: Path, load=None, max_memo: Optional[int] = None):
+        self.project = Path(project)
+        self._load = load or load_config
+        self._resolved: Dict[Tuple[str, str], Tuple[Optional[Any], Optional[str]]] = {}
+        self._max_memo = max_memo
+
+    def _parent(self, key: Tuple[str, str], data: Optional[Any], error: Optional[str]):
+        # None when the config does not extend anything, an error string for a bad
+        # reference, otherwise the (kind, name) of the base.
+        if error or not isinstance(data, dict) or EXTENDS_KEY not in data:
+            return None
+        ref = data[EXTENDS_KEY]
+        if not isinstance(ref, str) or not ref:
+            return "extends: expected a config name"
+        kind, name = split_ref(ref, key[0])
+        if kind not in KINDS or not (self.project / kind / name).is_dir():
+            return f"extends: unknown config '{ref}'"
+        return kind, name
+
+    def base(self, kind: str, name: str, data: Any, error: Optional[str] = None) -> Optional[Tuple[str, str]]:
+        """The (kind, name) that a config extends, or None if it extends nothing valid."""
+        parent = self._parent((kind, name), data, error)
+        return parent if isinstance(parent, tuple) else None
+
+    def resolve(self, kind: str, name: str, data: Any = _UNSET, error: Optional[str] = None):
+        key = (kind, name)
+        if key in self._resolved:
+            if self._max_memo is not None:
+                self._resolved[key] = self._resolved.pop(key)
+            return self._resolved[key]
+        if data is not _UNSET and self._parent(key, data, error) is None:
+            return data, error
+
+        # Walk up the chain until a resolved base, a root config or a cycle, then
+        # merge back down; each config on the way is resolved exactly once.
+        chain = []
+        position = {}
+        while key not in self._resolved and key not in position:
+            if data is _UNSET:
+                data, error = self._load(self.project / key[0] / key[1], key[0])
+            position[key] = len(chain)
+            chain.append((key, data, error))
+            parent = self._parent(key, data, error)
+            if not isinstance(parent, tuple):
+                break
+            key, data, error = parent, _UNSET, None
+        else:
+            if key in position:
+                cycle = chain[position[key]:]
+                names = " -> ".join(f"{k}/{n}" for (k, n), _, _ in cycle + cycle[:1])
+                for k, _, _ in cycle:
+                    self._resolved[k] = (None, f"extends: cycle {names}")
+                chain = chain[:position[key]]
+
+        for key, data, error in reversed(chain):
+            parent = self._parent(key, data, error)
+            if parent is None:
+                self._resolved[key] = (data, error)
+            elif isinstance(parent, str):
+                self._resolved[key] = (None, parent)
+            else:
+                base, base_error = self._resolved[parent]
+                if base_error:
+                    self._resolved[key] = (None, f"extends '{data[EXTENDS_KEY]}': {base_error}")
+                else:
+                    own = {k: v for k, v in data.items() if k != EXTENDS_KEY}
+                    self._resolved[key] = (deep_merge(base, own), None)
+        result = self._resolved[(kind, name)]
+        # Evict only once the chain is merged, since merging reads every base on it.
+        if self._max_memo is not None:
+            while len(self._resolved) > self._max_memo:
+                del self._resolved[next(iter(self._resolved))]
+        return result
+
+
+def extends_dependents(project: Path, selected: Iterable[Path]) -> set:
+    """Config dirs whose `extends:` chain reaches any of `selected`."""
+    project = Path(project)
+    parents: Dict[Path, Path] = {}
+    for kind in KINDS:
+        for name, config_dir in iter_configs(project, kind):
+            text = _read_text(config_dir / KINDS[kind])
+            if text is None or EXTENDS_KEY not in text:
+                continue
+            # A base that does not exist (deleted, or not yet added) still ties its children to it.
+            target = extends_target(kind, parse_config(text, kind)[0])
+            if target is not None:
+                parents[config_dir] = project / target[0] / target[1]
+    hit = set(selected)
+    dependents = set()
+    for config_dir in parents:
+        seen = set()
+        d = config_dir
+        while d in parents and d not in seen:
+            seen.add(d)
+            d = parents[d]
+            if d in hit:
+                dependents.add(config_dir)
+                break
+    return dependents
+
+
+class Catalog:
+    """Parsed configs for one project, re-read only when a file's mtime or size changes."""
+
+    def __init__(self, project: Path):
+        self.project = Path(project)
+        self._cache: Dict[Path, Tuple[Tuple[int, int], Tuple[Optional[Any], Optional[str]]]] = {}
+
+    def load(self, config_dir: Path, kind: str) -> Tuple[Optional[Any], Optional[str]]:
+        yaml_f = config_dir / KINDS[kind]
+        try:
+            st = yaml_f.stat()
+        except OSError:
+            self._cache.pop(yaml_f, None)
+            return None, f"missing {KINDS[kind]}"
+        key = (st.st_mtime_ns, st.st_size)
+        hit = self._cache.get(yaml_f)
+        if hit and hit[0] == key:
+            return hit[1]
+        result = load_config(config_dir, kind)
+        self._cache[yaml_f] = (key, result)
+        return result
+
+    def configs(self, kind: str, resolver: Optional[Resolver] = None) -> Iterator[Tuple[Path, Optional[Any], Optional[str]]]:
+        resolver = resolver or Resolver(self.project, self.load)
+        for name, config_dir in iter_configs(self.project, kind):
+            data, error = resolver.resolve(kind, name, *self.load(config_dir, kind))
+            yield config_dir, data, error
@@ -1,12 +1,14 @@
+import json
 import os
 import re
 import shutil
 import sys
+import time
+from contextlib import closing
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 import typer
-import yaml
 from rich.align import Align
 from rich.console import Console
 from rich.panel import Panel
@@ -15,13 +17,25 @@ from rich.text import Text
 from typer.core import TyperGroup
 
 from agentspec_cli.banner import BANNER, TAGLINE, show_banner
-from agentspec_cli.ide import (
-    AGENT_CONFIG,
-    generate_ide_config,
-    generate_vscode_config,
-    get_ide_label,
-    select_ide,
+from agentspec_cli import metrics, serve
+from agentspec_cli.catalog import (
+    EXTENDS_KEY,
+    KINDS,
+    Resolver,
+    config_dir_for_path,
+    config_name,
+    extends_dependents,
+    io_backend,
+    iter_config_dirs,
+    parse_header,
+    read_configs,
+    stream_summaries,
+    summarize,
+    validation_error,
+    yaml_missing,
 )
+from agentspec_cli.git import changed_paths
+from agentspec_cli.output import Output
 
 console = Console()
 
@@ -42,7 +56,25 @@ app = typer.Typer(
 
 
 @app.callback()
-def callback(ctx: typer.Context):
+def callback(
+    ctx: typer.Context,
+    metrics_file: Optional[str] = typer.Option(
+        None,
+        "--metrics-file",
+        envvar="AGENTSPEC_METRICS_FILE",
+        help="Accumulate command durations and counters into this OpenMetrics textfile",
+    ),
+):
+    if metrics_file and ctx.invoked_subcommand:
+        recorder = metrics.start(ctx.invoked_subcommand)
+        started = time.perf_counter()
+
+        def flush_metrics():
+            recorder.record("total", time.perf_counter() - started)
+            metrics.stop()
+            recorder.flush(Path(metrics_file))
+
+        ctx.call_on_close(flush_metrics)
     if ctx.invoked_subcommand is None and "--help" not in sys.argv and "-h" not in sys.argv:
         show_banner()
         console.print(Align.center("[dim]Run 'agentspec --help' for usage information[/dim]"))
@@ -97,6 +129,7 @@ Use the prompt templates in `prompts/` with your IDE's AI chat:
 """
 
 GITIGNORE = """\
+.agentspec/
 .env
 .env.local
 .env.*.local
@@ -128,6 +161,12 @@ ENV_EXAMPLE = """\
 # Default author for new configs (optional)
 # AGENTSPEC_AUTHOR=your-name
 
+# File I/O backend for list/validate: serial or async (optional)
+# AGENTSPEC_IO=serial
+
+# Bearer token for HTTP model backends used by `agentspec eval` (optional)
+# AGENTSPEC_API_KEY=your-api-key
+
 # JIRA integration (for jira-story-creator skill)
 # JIRA_BASE_URL=https://your-org.atlassian.net
 # JIRA_API_TOKEN=your-api-token
@@ -274,6 +313,8 @@ def init(
     non_interactive: bool = typer.Option(False, "--non-interactive", help="Skip interactive prompts"),
 ):
     """Initialize a new agentspec project with IDE-specific configuration."""
+    from agentspec_cli.ide import generate_ide_config, generate_vscode_config, get_ide_label, select_ide
+
     show_banner()
 
     p = Path(project_path)
@@ -378,45 +419,45 @@ def init(
     ))
 
 
-@app.command("new-agent")
-def new_agent(
-    name: Optional[str] = typer.Option(None, "--name", help="Agent name (kebab-case)"),
-    description: Optional[str] = typer.Option(None, "--description", help="Agent description"),
-    project_dir: Optional[str] = typer.Option(None, "--project-dir", help="Project directory"),
-    non_interactive: bool = typer.Option(False, "--non-interactive", help="Skip interactive prompts"),
-):
-    """Create a new agent configuration."""
-    p = Path(project_dir) if project_dir else Path.cwd()
+def extends_error(project: Path, extends: Optional[str]) -> Optional[str]:
+    # The same lookup `extends:` gets when the config is loaded, namespaced names included.
+    if extends and Resolver(project).base("agents", "", {EXTENDS_KEY: extends}) is None:
+        return f"unknown base config '{extends}'"
+    return None
 
-    if not non_interactive:
-        console.print("[cyan]═══ Create New Agent ═══[/cyan]\n")
-        if not name:
-            name = typer.prompt("Agent name (kebab-case)")
-        if not description:
-            description = typer.prompt("Description")
-        author = typer.prompt("Author", default="agentspec")
-        tags_input = typer.prompt("Tags (comma-separated)", default="general")
-        tags = [t.strip() for t in tags_input.split(",")]
-    else:
-        if not name or not description:
-            console.print("[red]Error: --name and --description are required in non-interactive mode[/red]")
-            raise typer.Exit(1)
-        author = "agentspec"
-        tags = ["general"]
 
+def create_agent(
+    project: Path,
+    name: str,
+    description: str,
+    author: str = "agentspec",
+    tags: Optional[list] = None,
+    extends: Optional[str] = None,
+) -> Path:
     name = to_kebab_case(name)
-    agent_dir = p / "agents" / name
-
-    if agent_dir.exists() and not non_interactive:
-        if not typer.confirm(f"Agent '{name}' already exists. Overwrite?", default=False):
-            raise typer.Exit(0)
-
+    tags = tags or ["general"]
+    agent_dir = project / "agents" / name
     agent_dir.mkdir(parents=True, exist_ok=True)
 
     tags_yaml = "\n".join(f"  - {t}" for t in tags)
     system_prompt = f"You are an AI assistant for {name}. {description}"
 
-    agent_yaml = f"""\
+    if extends:
+        # Model preferences, inputs, outputs and tools come from the base config.
+        agent_yaml = f"""\
+name: {name}
+description: {description}
+version: 1.0.0
+author: {author}
+extends: {extends}
+tags:
+{tags_yaml}
+
+system_prompt: |
+  {system_prompt}
+"""
+    else:
+        agent_yaml = f"""\
 name: {name}
 description: {description}
 version: 1.0.0
@@ -427,6 +468,7 @@ model_preferences:
   - gemini-pro
 tags:
 {tags_yaml}
+
 system_prompt: |
   {system_prompt}
 
@@ -460,6 +502,69 @@ Use this agent to {description}.
 Provide your input and the agent will generate the appropriate output based on its configuration.
 """
     (agent_dir / "prompt.md").write_text(prompt_md)
+    return agent_dir
+
+
+def _warn_near_matches(p: Path, name: str, description: str) -> None:
+    try:
+        from agentspec_cli import similarity
+    except ImportError:
+        return
+    index = similarity.get_index(p)
+    if not len(index):
+        return
+    matches = [
+        m for m in index.top_k(index.vector(f"{name} {description}"), 3)
+        if m["score"] >= similarity.NEAR_MATCH_THRESHOLD and not (m["kind"] == "agents" and m["dir"] == name)
+    ]
+    if matches:
+        console.print("[yellow]Warning: similar configurations already exist:[/yellow]")
+        for m in matches:
+            console.print(f"  [yellow]●[/yellow] {m['kind']}/{m['dir']} [dim]({m['score']:.2f})[/dim]")
+
+
+@app.command("new-agent")
+def new_agent(
+    name: Optional[str] = typer.Option(None, "--name", help="Agent name (kebab-case)"),
+    description: Optional[str] = typer.Option(None, "--description", help="Agent description"),
+    project_dir: Optional[str] = typer.Option(None, "--project-dir", help="Project directory"),
+    non_interactive: bool = typer.Option(False, "--non-interactive", help="Skip interactive prompts"),
+    extends: Optional[str] = typer.Option(None, "--extends", help="Base agent or skill to inherit from (name or kind/name)"),
+):
+    """Create a new agent configuration."""
+    p = Path(project_dir) if project_dir else Path.cwd()
+
+    error = extends_error(p, extends)
+    if error:
+        console.print(f"[red]Error: {error}[/red]")
+        raise typer.Exit(1)
+
+    if not non_interactive:
+        console.print("[cyan]═══ Create New Agent ═══[/cyan]\n")
+        if not name:
+            name = typer.prompt("Agent name (kebab-case)")
+        if not description:
+            description = typer.prompt("Description")
+        author = typer.prompt("Author", default="agentspec")
+        tags_input = typer.prompt("Tags (comma-separated)", default="general")
+        tags = [t.strip() for t in tags_input.split(",")]
+    else:
+        if not name or not description:
+            console.print("[red]Error: --name and --description are required in non-interactive mode[/red]")
+            raise typer.Exit(1)
+        author = "agentspec"
+        tags = ["general"]
+
+    name = to_kebab_case(name)
+    agent_dir = p / "agents" / name
+
+    if agent_dir.exists() and not non_interactive:
+        if not typer.confirm(f"Agent '{name}' already exists. Overwrite?", default=False):
+            raise typer.Exit(0)
+
+    _warn_near_matches(p, name, description)
+
+    agent_dir = create_agent(p, name, description, author=author, tags=tags, extends=extends)
 
     console.print(f"[green]●[/green] Agent '{name}' created at: {agent_dir}")
     console.print("  Files created:")
@@ -516,6 +621,7 @@ version: 1.0.0
 author: {author}
 tags:
 {tags_yaml}
+
 system_prompt: |
   {system_prompt}
 
@@ -562,122 +668,832 @@ Use this skill to {description}.
     console.print(f"  - {skill_dir / 'prompt.md'}")
 
 
+def _print_summary(out: Output, entry: dict, yaml_name: str) -> None:
+    if entry["status"] == "missing":
+        out.row("  ", ("●", "yellow"), f" {entry['dir']} ", (f"(no {yaml_name})", "dim"))
+    elif entry["status"] == "invalid":
+        out.row("  ", ("●", "yellow"), f" {entry['dir']} ", ("(invalid yaml)", "dim"))
+    else:
+        # Namespaced configs keep their namespace, so same-named configs in different teams stay apart.
+        namespace = entry["dir"].rpartition("/")[0]
+        name = f"{namespace}/{entry['name']}" if namespace else entry["name"]
+        out.row("  ", ("●", "green"), f" {name} ", (f"(v{entry['version']})", "dim"), f" - {entry['description']}")
+
+
+def _resolve_io(io: Optional[str]) -> str:
+    try:
+        return io_backend(io)
+    except ValueError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+
+
+IO_HELP = "File I/O backend: serial or async (default: $AGENTSPEC_IO or serial)"
+PLAIN_HELP = "Plain text output without colors (default when stdout is not a terminal)"
+
+
+def _forward(p: Path, method: str):
+    # A daemon that answers badly is bypassed, not fatal: the command does the work in-process.
+    try:
+        return serve.call(p, method)
+    except serve.DaemonError as e:
+        Console(stderr=True).print(f"[yellow]Warning: agentspec serve failed ({e}); running without it[/yellow]")
+        return None
+
+
+def _list_kind(out: Output, p: Path, kind: str, yaml_name: str, backend: str, stream: bool, forwarded) -> None:
+    if stream:
+        entries = stream_summaries(p, kind, backend)
+    elif forwarded is not None:
+        entries = forwarded[kind]
+    else:
+        items = ((kind, d) for d in iter_config_dirs(p, kind))
+        results = read_configs(items, backend, parse=parse_header)
+        resolver = Resolver(p)
+        entries = (
+            summarize(d, *resolver.resolve(kind, name, data, error), name=name)
+            for _, d, data, error in results
+            for name in (config_name(p, kind, d),)
+        )
+    found = False
+    for entry in entries:
+        found = True
+        _print_summary(out, entry, yaml_name)
+    if not found:
+        out.row("  ", (f"No {kind} found", "dim"))
+
+
 @app.command("list")
 def list_configs(
     project_dir: Optional[str] = typer.Option(None, "--project-dir", help="Project directory"),
+    io: Optional[str] = typer.Option(None, "--io", help=IO_HELP),
+    stream: bool = typer.Option(False, "--stream", help="Stream configs with bounded memory (for very large catalogs)"),
+    plain: bool = typer.Option(False, "--plain", help=PLAIN_HELP),
 ):
     """List all agents and skills."""
     p = Path(project_dir) if project_dir else Path.cwd()
+    backend = _resolve_io(io)
 
-    agents_dir = p / "agents"
-    skills_dir = p / "skills"
-
-    console.print("[bold cyan]Agents:[/bold cyan]")
-    if agents_dir.exists():
-        agents = sorted([d for d in agents_dir.iterdir() if d.is_dir()])
-        if agents:
-            for agent in agents:
-                yaml_f = agent / "agent.yaml"
-                if yaml_f.exists():
-                    try:
-                        data = yaml.safe_load(yaml_f.read_text())
-                        n = data.get("name", agent.name)
-                        desc = data.get("description", "")
-                        ver = data.get("version", "")
-                        console.print(f"  [green]●[/green] {n} [dim](v{ver})[/dim] - {desc}")
-                    except Exception:
-                        console.print(f"  [yellow]●[/yellow] {agent.name} [dim](invalid yaml)[/dim]")
-                else:
-                    console.print(f"  [yellow]●[/yellow] {agent.name} [dim](no agent.yaml)[/dim]")
-        else:
-            console.print("  [dim]No agents found[/dim]")
-    else:
-        console.print("  [dim]No agents/ directory[/dim]")
+    forwarded = None if stream else _forward(p, "list")
 
-    console.print()
-    console.print("[bold cyan]Skills:[/bold cyan]")
-    if skills_dir.exists():
-        skills = sorted([d for d in skills_dir.iterdir() if d.is_dir()])
-        if skills:
-            for skill in skills:
-                yaml_f = skill / "skill.yaml"
-                if yaml_f.exists():
-                    try:
-                        data = yaml.safe_load(yaml_f.read_text())
-                        n = data.get("name", skill.name)
-                        desc = data.get("description", "")
-                        ver = data.get("version", "")
-                        console.print(f"  [green]●[/green] {n} [dim](v{ver})[/dim] - {desc}")
-                    except Exception:
-                        console.print(f"  [yellow]●[/yellow] {skill.name} [dim](invalid yaml)[/dim]")
-                else:
-                    console.print(f"  [yellow]●[/yellow] {skill.name} [dim](no skill.yaml)[/dim]")
-        else:
-            console.print("  [dim]No skills found[/dim]")
-    else:
-        console.print("  [dim]No skills/ directory[/dim]")
+    with Output(console, plain=plain or None) as out:
+        for i, (kind, yaml_name) in enumerate(KINDS.items()):
+            if i:
+                out.blank()
+            out.row((f"{kind.capitalize()}:", "bold cyan"))
+            if not (p / kind).exists():
+                out.row("  ", (f"No {kind}/ directory", "dim"))
+                continue
+            with metrics.phase(f"list_{kind}"):
+                _list_kind(out, p, kind, yaml_name, backend, stream, forwarded)
+
+
+def _validation_results(p: Path, items: list, backend: str):
+    forwarded = _forward(p, "validate")
+    if forwarded is not None:
+        wanted = {d for _, d in items}
+        for r in forwarded["results"]:
+            config_dir = p / r["kind"] / r["dir"]
+            if config_dir in wanted:
+                yield r["dir"], r["has_yaml"], r["error"]
+        return
+    resolver = Resolver(p)
+    with closing(read_configs(items, backend)) as results:
+        for kind, config_dir, data, error in results:
+            has_yaml = not yaml_missing(error)
+            name = config_name(p, kind, config_dir)
+            data, error = resolver.resolve(kind, name, data, error)
+            yield name, has_yaml, validation_error(data, error)
 
 
 @app.command("validate")
 def validate(
     project_dir: Optional[str] = typer.Option(None, "--project-dir", help="Project directory"),
+    fail_fast: bool = typer.Option(False, "--fail-fast", help="Stop at the first error"),
+    max_errors: Optional[int] = typer.Option(None, "--max-errors", min=1, help="Stop after N errors"),
+    quiet: bool = typer.Option(False, "--quiet", "-q", help="Only print configs with errors"),
+    since: Optional[str] = typer.Option(None, "--since", help="Only validate configs changed since this git ref"),
+    staged: bool = typer.Option(False, "--staged", help="Only validate configs with staged changes"),
+    io: Optional[str] = typer.Option(None, "--io", help=IO_HELP),
+    plain: bool = typer.Option(False, "--plain", help=PLAIN_HELP),
 ):
     """Validate all configurations."""
     p = Path(project_dir) if project_dir else Path.cwd()
+    backend = _resolve_io(io)
     errors = 0
     checked = 0
+    skipped = 0
+    limit = 1 if fail_fast else max_errors
+    stopped = False
 
-    console.print("[bold cyan]Validating AgentSpec configurations...[/bold cyan]\n")
-
-    agents_dir = p / "agents"
-    if agents_dir.exists():
-        for agent in sorted(agents_dir.iterdir()):
-            if not agent.is_dir():
-                continue
-            yaml_f = agent / "agent.yaml"
-            if not yaml_f.exists():
-                console.print(f"  [red]✗[/red] {agent.name}: missing agent.yaml")
-                errors += 1
-                continue
-            checked += 1
+    selected = None
+    with metrics.phase("select"):
+        if since or staged:
             try:
-                data = yaml.safe_load(yaml_f.read_text())
-                missing = [f for f in ["name", "description", "version"] if f not in data]
-                if missing:
-                    console.print(f"  [red]✗[/red] {agent.name}: missing fields: {', '.join(missing)}")
-                    errors += 1
+                changed = changed_paths(p, since=since, staged=staged)
+            except ValueError as e:
+                console.print(f"[red]Error: {e}[/red]")
+                raise typer.Exit(1)
+            if changed is None:
+                if not quiet:
+                    console.print("[yellow]Not a git checkout; validating all configurations[/yellow]")
+            else:
+                selected = {d for d in (config_dir_for_path(p, c) for c in changed) if d}
+                selected |= extends_dependents(p, selected)
+
+        items = []
+        for kind in KINDS:
+            for config_dir in iter_config_dirs(p, kind):
+                if selected is not None and config_dir not in selected:
+                    skipped += 1
                 else:
-                    console.print(f"  [green]✓[/green] {agent.name}: valid")
-            except Exception as e:
-                console.print(f"  [red]✗[/red] {agent.name}: YAML parse error: {e}")
-                errors += 1
-
-    skills_dir = p / "skills"
-    if skills_dir.exists():
-        for skill in sorted(skills_dir.iterdir()):
-            if not skill.is_dir():
-                continue
-            yaml_f = skill / "skill.yaml"
-            if not yaml_f.exists():
-                console.print(f"  [red]✗[/red] {skill.name}: missing skill.yaml")
-                errors += 1
-                continue
-            checked += 1
-            try:
-                data = yaml.safe_load(yaml_f.read_text())
-                missing = [f for f in ["name", "description", "version"] if f not in data]
-                if missing:
-                    console.print(f"  [red]✗[/red] {skill.name}: missing fields: {', '.join(missing)}")
+                    items.append((kind, config_dir))
+
+    with Output(console, plain=plain or None) as out:
+        if not quiet:
+            out.row(("Validating AgentSpec configurations...", "bold cyan"))
+            out.blank()
+
+        with metrics.phase("check"), closing(_validation_results(p, items, backend)) as results:
+            for name, has_yaml, error in results:
+                if has_yaml:
+                    checked += 1
+                if error:
+                    out.row("  ", ("✗", "red"), f" {name}: {error}")
                     errors += 1
+                    if limit and errors >= limit:
+                        stopped = True
+                        break
+                elif not quiet:
+                    out.row("  ", ("✓", "green"), f" {name}: valid")
+
+        if not quiet or errors:
+            out.blank()
+        if skipped and not quiet:
+            out.row((f"Skipped {skipped} unchanged config(s)", "dim"))
+        if stopped:
+            out.row((f"Validation stopped after {errors} error(s) in {checked} configs", "red"))
+        elif errors > 0:
+            out.row((f"Validation failed: {errors} error(s) in {checked} configs", "red"))
+        elif not quiet:
+            out.row((f"All {checked} configurations are valid", "green"))
+
+    metrics.count("configs_checked", checked)
+    metrics.count("configs_skipped", skipped)
+    metrics.count("validation_errors", errors)
+    if errors > 0:
+        raise typer.Exit(1)
+
+
+@app.command("search")
+def search_command(
+    terms: List[str] = typer.Argument(..., help="Search terms"),
+    project_dir: Optional[str] = typer.Option(None, "--project-dir", help="Project directory"),
+    limit: int = typer.Option(10, "--limit", "-n", min=1, help="Maximum number of results"),
+    no_refresh: bool = typer.Option(False, "--no-refresh", help="Query the index as-is without checking for changed files"),
+    reindex: bool = typer.Option(False, "--reindex", help="Rebuild the index from scratch"),
+    plain: bool = typer.Option(False, "--plain", help=PLAIN_HELP),
+):
+    """Full-text search over agent and skill names, descriptions, tags and prompts."""
+    from agentspec_cli import search
+
+    p = Path(project_dir) if project_dir else Path.cwd()
+    conn = search.connect(p)
+    try:
+        reindexed = removed = 0
+        if reindex or not no_refresh:
+            with metrics.phase("refresh"):
+                reindexed, removed = search.refresh(conn, p, rebuild=reindex)
+        with metrics.phase("query"):
+            results = search.query(conn, " ".join(terms), limit=limit)
+        metrics.count("configs_reindexed", reindexed)
+    finally:
+        conn.close()
+
+    with Output(console, plain=plain or None) as out:
+        if reindexed or removed:
+            out.row((f"Indexed {reindexed} config(s), removed {removed}", "dim"))
+        if not results:
+            out.row(("No matches", "yellow"))
+            return
+        for r in results:
+            out.row(
+                "  ", ("●", "green"), f" {r['name']} ", (f"({r['kind']}, {r['score']:.2f})", "dim"), f" - {r['description']}"
+            )
+
+
+@app.command("similar")
+def similar_command(
+    name: str = typer.Argument(..., help="Agent or skill name (or kind/name)"),
+    project_dir: Optional[str] = typer.Option(None, "--project-dir", help="Project directory"),
+    top_k: int = typer.Option(5, "--top-k", "-k", min=1, help="Number of neighbours to show"),
+    plain: bool = typer.Option(False, "--plain", help=PLAIN_HELP),
+):
+    """Show the configurations most similar to an agent or skill (TF-IDF cosine similarity)."""
+    try:
+        from agentspec_cli import similarity
+    except ImportError:
+        console.print("[red]Error: 'similar' requires numpy: pip install 'agentspec-cli[analytics]'[/red]")
+        raise typer.Exit(1)
+
+    p = Path(project_dir) if project_dir else Path.cwd()
+    index = similarity.get_index(p)
+    i = index.find(name)
+    if i is None:
+        console.print(f"[red]Error: no agent or skill named '{name}'[/red]")
+        raise typer.Exit(1)
+
+    with Output(console, plain=plain or None) as out:
+        matches = index.top_k(index.row(i), top_k, exclude=i)
+        if not matches:
+            out.row(("No similar configurations", "yellow"))
+        for m in matches:
+            out.row("  ", ("●", "green"), f" {m['kind']}/{m['dir']} ", (f"({m['score']:.2f})", "dim"))
+
+
+@app.command("stats")
+def stats_command(
+    project_dir: Optional[str] = typer.Option(None, "--project-dir", help="Project directory"),
+    kind: Optional[str] = typer.Option(None, "--kind", help="Only 'agents' or 'skills' (default: both)"),
+    top: int = typer.Option(10, "--top", min=1, help="Rows to show for tags, models and authors"),
+    as_json: bool = typer.Option(False, "--json", help="Print the report as JSON"),
+    as_csv: bool = typer.Option(False, "--csv", help="Print the report as section,key,metric,value CSV rows"),
+    plain: bool = typer.Option(False, "--plain", help=PLAIN_HELP),
+):
+    """Show catalog distributions: prompt sizes, tags, model preferences and inputs by author."""
+    try:
+        from agentspec_cli import stats
+    except ImportError:
+        console.print("[red]Error: 'stats' requires numpy: pip install 'agentspec-cli[analytics]'[/red]")
+        raise typer.Exit(1)
+    if kind is not None and kind not in KINDS:
+        console.print(f"[red]Error: --kind must be one of: {', '.join(KINDS)}[/red]")
+        raise typer.Exit(1)
+
+    p = Path(project_dir) if project_dir else Path.cwd()
+    with metrics.phase("refresh"):
+        features, reread = stats.load_features(p)
+    metrics.count("configs_reread", reread)
+    with metrics.phase("aggregate"):
+        report = stats.summarize(features, [kind] if kind else None, top)
+
+    if as_json:
+        console.file.write(json.dumps(report, indent=2) + "\n")
+        return
+    if as_csv:
+        import csv
+        writer = csv.writer(console.file, lineterminator="\n")
+        writer.writerow(["section", "key", "metric", "value"])
+        writer.writerows(stats.csv_rows(report))
+        return
+
+    def number(value: float) -> str:
+        return f"{value:,.0f}" if float(value).is_integer() else f"{value:,.1f}"
+
+    with Output(console, plain=plain or None) as out:
+        total = sum(report["configs"].values())
+        by_kind = ", ".join(f"{n} {k}" for k, n in report["configs"].items())
+        out.row(("Configs", "bold"), f"  {total} ({by_kind}), {report['invalid']} invalid")
+        for section, label in (("prompt_bytes", "Prompt bytes"), ("inputs", "Inputs per config")):
+            d = report[section]
+            cells = "  ".join(f"{k} {number(d[k])}" for k in ("mean", *(f"p{q}" for q in stats.PERCENTILES), "max"))
+            out.row((label, "bold"), f"  {cells}")
+        out.blank()
+        out.row(("Prompt size histogram", "bold"))
+        for bucket, n in report["prompt_bytes"]["histogram"].items():
+            out.row(f"  {bucket:>8}  {n:>7}")
+        if report["tags"]:
+            out.blank()
+            out.row(("Top tags", "bold"))
+            for t in report["tags"]:
+                out.row(f"  {t['configs']:>7}  {t['tag']}")
+        if report["models"]:
+            out.blank()
+            out.row(("Model preferences", "bold"), ("  (configs listing / listing first)", "dim"))
+            for m in report["models"]:
+                out.row(f"  {m['configs']:>7}  {m['primary']:>7}  {m['model']}")
+            lengths = ", ".join(f"{k}: {n}" for k, n in report["models_per_config"].items())
+            out.row(("  models per config ", "dim"), lengths)
+        if report["authors"]:
+            out.blank()
+            out.row(("Inputs by author", "bold"), ("  (configs, mean inputs, mean required, max)", "dim"))
+            for a in report["authors"]:
+                out.row(
+                    f"  {a['configs']:>7}  {a['mean_inputs']:>5.1f}  {a['mean_required_inputs']:>5.1f}"
+                    f"  {a['max_inputs']:>4}  {a['author']}"
+                )
+
+
+@app.command("diff")
+def diff_command(
+    old: str = typer.Argument(..., help="Old catalog: a directory or git ref"),
+    new: str = typer.Argument(..., help="New catalog: a directory or git ref"),
+    project_dir: Optional[str] = typer.Option(None, "--project-dir", help="Project directory (for git refs)"),
+    as_json: bool = typer.Option(False, "--json", help="Print the diff as JSON"),
+    plain: bool = typer.Option(False, "--plain", help=PLAIN_HELP),
+):
+    """Show agents and skills added, removed or changed between two catalogs."""
+    from agentspec_cli import diff
+
+    p = Path(project_dir) if project_dir else Path.cwd()
+    try:
+        result = diff.diff(diff.snapshot(p, old), diff.snapshot(p, new))
+    except ValueError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+
+    if as_json:
+        console.file.write(json.dumps(result, indent=2) + "\n")
+        return
+
+    with Output(console, plain=plain or None) as out:
+        if not (result["added"] or result["removed"] or result["changed"]):
+            out.row(("No differences", "green"))
+            return
+        for path in result["added"]:
+            out.row("  ", ("+", "green"), f" {path}")
+        for path in result["removed"]:
+            out.row("  ", ("-", "red"), f" {path}")
+        for change in result["changed"]:
+            marks = {"added": "+", "removed": "-"}
+            fields = ", ".join(marks.get(f["change"], "") + f["field"] for f in change["fields"]) or "formatting only"
+            out.row("  ", ("~", "yellow"), f" {change['path']} ", (f"({fields})", "dim"))
+        out.blank()
+        out.row(
+            f"{len(result['added'])} added, {len(result['removed'])} removed, {len(result['changed'])} changed"
+        )
+
+
+@app.command("lock")
+def lock_command(
+    project_dir: Optional[str] = typer.Option(None, "--project-dir", help="Project directory"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", min=1, help="Number of hashing threads"),
+):
+    """Write agentspec.lock with the SHA-256, size and version of every config file."""
+    from agentspec_cli import lock
+
+    p = Path(project_dir) if project_dir else Path.cwd()
+    data = lock.build_lock(p, workers=jobs)
+    lock.write_lock(lock.lock_path(p), data)
+    files = sum(len(c["files"]) for c in data["configs"].values())
+    console.print(f"[green]●[/green] Locked {len(data['configs'])} configs ({files} files) in {lock.LOCK_NAME}")
+
+
+@app.command("verify")
+def verify_command(
+    project_dir: Optional[str] = typer.Option(None, "--project-dir", help="Project directory"),
+    lockfile: Optional[str] = typer.Option(None, "--lockfile", help="Lockfile to verify against (default: agentspec.lock)"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", min=1, help="Number of hashing threads"),
+    plain: bool = typer.Option(False, "--plain", help=PLAIN_HELP),
+):
+    """Check every config file against agentspec.lock."""
+    from agentspec_cli import lock
+
+    p = Path(project_dir) if project_dir else Path.cwd()
+    try:
+        data = lock.read_lock(Path(lockfile) if lockfile else lock.lock_path(p))
+    except ValueError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+
+    checked, problems = lock.verify(p, data, workers=jobs)
+    with Output(console, plain=plain or None) as out:
+        for path, problem in problems:
+            out.row("  ", ("✗", "red"), f" {path}: {problem}")
+        if problems:
+            out.blank()
+            out.row((f"Verification failed: {len(problems)} problem(s) in {checked} locked files", "red"))
+        else:
+            out.row((f"All {checked} locked files match", "green"))
+    if problems:
+        raise typer.Exit(1)
+
+
+@app.command("migrate")
+def migrate_command(
+    migration_file: str = typer.Argument(..., help="Migration: a .yaml list of steps or a .py file defining migrate(doc)"),
+    project_dir: Optional[str] = typer.Option(None, "--project-dir", help="Project directory"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Show what would change without writing"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", min=1, help="Worker processes (default: a pool for large catalogs)"),
+    plain: bool = typer.Option(False, "--plain", help=PLAIN_HELP),
+):
+    """Apply a migration to every agent and skill config, keeping comments and key order."""
+    from agentspec_cli import migrate
+
+    p = Path(project_dir) if project_dir else Path.cwd()
+    try:
+        migration = migrate.Migration.load(Path(migration_file))
+    except ValueError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+
+    changed, failed, unchanged = [], [], 0
+    with Output(console, plain=plain or None) as out:
+        for rel, old, new, error in migrate.run(migration, p, jobs):
+            if error:
+                failed.append(rel)
+                out.row("  ", ("✗", "red"), f" {rel}: {error}")
+            elif new is None:
+                unchanged += 1
+            else:
+                changed.append((rel, new))
+                added, removed = migrate.line_changes(old, new)
+                out.row("  ", ("~", "yellow"), f" {rel} ", (f"(+{added} -{removed})", "dim"))
+        if changed or failed:
+            out.blank()
+        out.row(f"{len(changed)} changed, {unchanged} unchanged, {len(failed)} failed")
+        # Migrations are all-or-nothing: a failure anywhere leaves every file untouched.
+        if failed:
+            out.row(("Nothing written", "red"))
+        elif dry_run:
+            out.row(("Dry run: nothing written", "dim"))
+        elif changed:
+            migrate.write(p, changed)
+    if failed:
+        raise typer.Exit(1)
+
+
+@app.command("fmt")
+def fmt_command(
+    project_dir: Optional[str] = typer.Option(None, "--project-dir", help="Project directory"),
+    check: bool = typer.Option(False, "--check", help="List files that need formatting and exit 1 instead of rewriting"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Re-check every file instead of trusting the format cache"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", min=1, help="Worker processes (default: a pool for large catalogs)"),
+    plain: bool = typer.Option(False, "--plain", help=PLAIN_HELP),
+):
+    """Rewrite agent and skill YAML in the canonical layout."""
+    from agentspec_cli import fmt
+    from agentspec_cli.storage import atomic_write
+
+    p = Path(project_dir) if project_dir else Path.cwd()
+    cache = fmt.FormatCache(p)
+    counts = {"ok": 0, "reformat": 0, "error": 0}
+    with Output(console, plain=plain or None) as out:
+        for rel, status, formatted, digest, error in fmt.run(p, None if no_cache else cache, jobs):
+            counts[status] += 1
+            if status == "error":
+                cache.forget(rel)
+                out.row("  ", ("✗", "red"), f" {rel}: {error}")
+            elif status == "reformat":
+                if check:
+                    cache.forget(rel)
+                    out.row("  ", ("~", "yellow"), f" {rel}")
                 else:
-                    console.print(f"  [green]✓[/green] {skill.name}: valid")
-            except Exception as e:
-                console.print(f"  [red]✗[/red] {skill.name}: YAML parse error: {e}")
-                errors += 1
+                    atomic_write(p / rel, formatted.encode())
+                    cache.remember(rel, str(p / rel), fmt.content_hash(formatted.encode()), "ok")
+                    out.row("  ", ("●", "green"), f" {rel}")
+            elif digest is not None:
+                cache.remember(rel, str(p / rel), digest, status)
+        if counts["reformat"] or counts["error"]:
+            out.blank()
+        verb = "need formatting" if check else "formatted"
+        out.row(f"{counts['reformat']} {verb}, {counts['ok']} already formatted, {counts['error']} failed")
+    cache.save()
+    if counts["error"] or (check and counts["reformat"]):
+        raise typer.Exit(1)
 
-    console.print()
-    if errors > 0:
-        console.print(f"[red]Validation failed: {errors} error(s) in {checked} configs[/red]")
+
+@app.command("render")
+def render_command(
+    agent: str = typer.Argument(..., help="Agent whose prompt template to render"),
+    inputs_file: str = typer.Option(..., "--inputs", "-i", help="JSONL file of input records ('-' for stdin)"),
+    output_file: Optional[str] = typer.Option(None, "--output", "-o", help="Write JSONL here instead of stdout"),
+    project_dir: Optional[str] = typer.Option(None, "--project-dir", help="Project directory"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", min=1, help="Worker processes (default: a pool for large files)"),
+):
+    """Render an agent's prompt for every JSONL input record, writing JSONL."""
+    from agentspec_cli import render
+
+    p = Path(project_dir) if project_dir else Path.cwd()
+    err = Console(stderr=True)
+    try:
+        renderer = render.Renderer.from_config(p, agent)
+    except ValueError as e:
+        err.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+
+    try:
+        src = sys.stdin if inputs_file == "-" else open(inputs_file, encoding="utf-8")
+    except OSError as e:
+        err.print(f"[red]Error: cannot read {inputs_file}: {e.strerror}[/red]")
         raise typer.Exit(1)
+    if jobs is None:
+        large = src is not sys.stdin and os.fstat(src.fileno()).st_size > render.POOL_THRESHOLD_BYTES
+        jobs = (os.cpu_count() or 1) if large else 1
+
+    rendered = failed = 0
+    dst = open(output_file, "w", encoding="utf-8") if output_file else sys.stdout
+    try:
+        for line, ok in renderer.render_lines(src, jobs):
+            dst.write(line + "\n")
+            if ok:
+                rendered += 1
+            else:
+                failed += 1
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+
+    err.print(f"[dim]Rendered {rendered} prompt(s), {failed} record(s) failed[/dim]")
+    if failed:
+        raise typer.Exit(1)
+
+
+@app.command("check-inputs")
+def check_inputs_command(
+    log_file: str = typer.Argument(..., help="JSONL invocation log ('-' for stdin)"),
+    agent: Optional[str] = typer.Option(None, "--agent", help="Treat every line as a payload for this agent or skill"),
+    project_dir: Optional[str] = typer.Option(None, "--project-dir", help="Project directory"),
+    strict: bool = typer.Option(False, "--strict", help="Also fail on unknown input fields"),
+    as_json: bool = typer.Option(False, "--json", help="Print the report as JSON"),
+    plain: bool = typer.Option(False, "--plain", help=PLAIN_HELP),
+):
+    """Audit logged invocation payloads against each agent's declared inputs."""
+    from agentspec_cli.inputs import audit
+
+    p = Path(project_dir) if project_dir else Path.cwd()
+    try:
+        src = sys.stdin if log_file == "-" else open(log_file, encoding="utf-8")
+    except OSError as e:
+        console.print(f"[red]Error: cannot read {log_file}: {e.strerror}[/red]")
+        raise typer.Exit(1)
+    try:
+        report = audit(src, p, agent)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+
+    agents = report["agents"]
+    failed = sum(report["errors"].values()) + sum(a["invalid"] for a in agents.values())
+    if strict:
+        failed += sum(sum(a["unknown"].values()) for a in agents.values())
+
+    if as_json:
+        console.file.write(json.dumps(report, indent=2) + "\n")
     else:
-        console.print(f"[green]All {checked} configurations are valid[/green]")
+        with Output(console, plain=plain or None) as out:
+            for name, a in agents.items():
+                ok = not a["invalid"] and not (strict and a["unknown"])
+                out.row("  ", ("✓", "green") if ok else ("✗", "red"), f" {name}: {a['records']} record(s), {a['invalid']} invalid")
+                for label, key, style in (("missing", "missing", "red"), ("unknown", "unknown", "yellow"),
+                                          ("default applied", "defaulted", "dim")):
+                    for field, count in sorted(a[key].items()):
+                        out.row("      ", (f"{label}: {field}", style), f" ({count})")
+            for error, count in sorted(report["errors"].items()):
+                out.row("  ", ("✗", "red"), f" {error} ({count})")
+            out.blank()
+            out.row(
+                (f"Checked {report['records']} record(s) in {report['seconds']:.2f}s "
+                 f"({report['records_per_second']:,.0f} records/s)", "red" if failed else "green")
+            )
+    if failed:
+        raise typer.Exit(1)
+
+
+@app.command("run-skill")
+def run_skill_command(
+    skill: str = typer.Argument(..., help="Skill to run"),
+    inputs: Optional[List[str]] = typer.Option(None, "--input", help="Skill input as name=value (repeatable)"),
+    project_dir: Optional[str] = typer.Option(None, "--project-dir", help="Project directory"),
+    backend: str = typer.Option("stub", "--backend", help="Model backend: 'stub' or an OpenAI-compatible http(s):// URL"),
+    model: Optional[str] = typer.Option(None, "--model", help="Model name sent to an HTTP backend"),
+    concurrency: int = typer.Option(8, "--concurrency", "-c", min=1, help="Maximum in-flight requests to the backend"),
+    stub_latency: float = typer.Option(0.0, "--stub-latency", min=0.0, help="Seconds the stub backend waits per step"),
+    trace: Optional[str] = typer.Option(None, "--trace", help="Write a Chrome trace-event JSON file of the run"),
+    as_json: bool = typer.Option(False, "--json", help="Print the full run report, including step outputs, as JSON"),
+    plain: bool = typer.Option(False, "--plain", help=PLAIN_HELP),
+):
+    """Run a skill's steps as a dependency graph, independent steps concurrently."""
+    from agentspec_cli import backends, skillrun
+
+    p = Path(project_dir) if project_dir else Path.cwd()
+    values = {}
+    for item in inputs or []:
+        key, sep, value = item.partition("=")
+        if not sep or not key:
+            console.print(f"[red]Error: --input expects name=value, got '{item}'[/red]")
+            raise typer.Exit(1)
+        values[key] = value
+    try:
+        model_backend = backends.get_backend(backend, concurrency, model, latency=stub_latency)
+        report = skillrun.run(skillrun.SkillPlan.from_config(p, skill), model_backend, values)
+    except ValueError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+
+    if trace:
+        Path(trace).write_text(json.dumps(skillrun.chrome_trace(report)) + "\n")
+    failed = [r for r in report["steps"].values() if r["status"] != "ok"]
+
+    if as_json:
+        console.file.write(json.dumps(report, indent=2) + "\n")
+    else:
+        wall = report["wall"]
+        critical = set(report["critical_path"])
+        width = max(len(name) for name in report["steps"])
+        marks = {"ok": ("✓", "green"), "failed": ("✗", "red"), "skipped": ("-", "dim")}
+        with Output(console, plain=plain or None) as out:
+            for name, r in report["steps"].items():
+                if r["start"] is None:
+                    out.row("  ", marks[r["status"]], f" {name.ljust(width)} ", ("skipped", "dim"))
+                    continue
+                offset = int(r["start"] / wall * 30) if wall else 0
+                bar = " " * offset + "█" * max(1, int(r["duration"] / wall * 30) if wall else 1)
+                out.row(
+                    "  ", marks[r["status"]], f" {name.ljust(width)} ",
+                    (f"{r['start'] * 1000:7.0f} ms +{r['duration'] * 1000:6.0f} ms ", "dim"),
+                    (bar.ljust(31), "magenta" if name in critical else "cyan"),
+                    (" critical" if name in critical else "", "magenta"),
+                )
+                if r["error"]:
+                    out.row("      ", (r["error"], "red"))
+            out.blank()
+            path_time = sum(report["steps"][n]["duration"] for n in report["critical_path"])
+            out.row(
+                ("Critical path: ", "bold"), " → ".join(report["critical_path"]),
+                (f" ({path_time * 1000:.0f} ms of {wall * 1000:.0f} ms wall)", "dim"),
+            )
+    if failed:
+        raise typer.Exit(1)
+
+
+@app.command("eval")
+def eval_command(
+    agents: Optional[List[str]] = typer.Argument(None, help="Agents to evaluate (default: all with an evals.yaml)"),
+    project_dir: Optional[str] = typer.Option(None, "--project-dir", help="Project directory"),
+    backend: str = typer.Option("stub", "--backend", help="Model backend: 'stub' or an OpenAI-compatible http(s):// URL"),
+    model: Optional[str] = typer.Option(None, "--model", help="Model name sent to an HTTP backend"),
+    concurrency: int = typer.Option(8, "--concurrency", "-c", min=1, help="Maximum in-flight requests to the backend"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Always call the backend; do not read or write cached responses"),
+    plain: bool = typer.Option(False, "--plain", help=PLAIN_HELP),
+):
+    """Run each agent's evals.yaml cases against a model backend and check the outputs."""
+    from agentspec_cli import backends, evals
+
+    p = Path(project_dir) if project_dir else Path.cwd()
+    try:
+        model_backend = backends.get_backend(backend, concurrency, model)
+    except ValueError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+
+    suites = evals.collect(p, agents)
+    reports = evals.run(model_backend, suites, evals.ResponseCache(None if no_cache else evals.cache_dir(p)))
+    failed = sum(r["cases"] - r["passed"] for r in reports) + sum(1 for s in suites if s["error"])
+
+    with Output(console, plain=plain or None) as out:
+        if not suites:
+            out.row((f"No agents with {evals.SUITE_NAME} found", "yellow"))
+            return
+        for suite in suites:
+            if suite["error"]:
+                out.row("  ", ("✗", "red"), f" {suite['agent']}: {suite['error']}")
+        for r in reports:
+            status = ("✓", "green") if r["passed"] == r["cases"] else ("✗", "red")
+            out.row(
+                "  ", status, f" {r['agent']}: {r['passed']}/{r['cases']} passed ",
+                (
+                    f"(p50 {r['p50'] * 1000:.0f} ms, p95 {r['p95'] * 1000:.0f} ms, p99 {r['p99'] * 1000:.0f} ms, "
+                    f"{r['throughput']:.1f} req/s, {r['cached']} cached)",
+                    "dim",
+                ),
+            )
+            for result in r["results"]:
+                for failure in result["failures"]:
+                    out.row("      ", ("✗", "red"), f" {result['name']}: {failure}")
+        out.blank()
+        if failed:
+            out.row((f"Eval failed: {failed} failing case(s) or suite(s)", "red"))
+        else:
+            out.row((f"All {sum(r['cases'] for r in reports)} cases passed", "green"))
+    if failed:
+        raise typer.Exit(1)
+
+
+@app.command("stub-server")
+def stub_server_command(
+    host: str = typer.Option("127.0.0.1", "--host", help="Address to bind"),
+    port: int = typer.Option(8765, "--port", help="Port to listen on"),
+):
+    """Serve a deterministic OpenAI-compatible stub model for offline evals."""
+    from agentspec_cli.backends import StubServer
+
+    server = StubServer(host, port)
+    console.print(f"[green]●[/green] Stub model listening on [bold]{server.url}[/bold]")
+    console.print("[dim]Press Ctrl+C to stop[/dim]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+@app.command("metrics")
+def metrics_command(
+    project_dir: Optional[str] = typer.Option(None, "--project-dir", help="Project directory"),
+    output_file: Optional[str] = typer.Option(None, "--output", "-o", help="Write the textfile here instead of stdout"),
+    io: Optional[str] = typer.Option(None, "--io", help=IO_HELP),
+):
+    """Write catalog health metrics in OpenMetrics text format."""
+    p = Path(project_dir) if project_dir else Path.cwd()
+    backend = _resolve_io(io)
+    with metrics.phase("aggregate"):
+        text = metrics.render(metrics.catalog_families(p, backend))
+    if output_file:
+        metrics.write_textfile(Path(output_file), text)
+    else:
+        console.file.write(text)
+
+
+@app.command("serve")
+def serve_command(
+    project_dir: Optional[str] = typer.Option(None, "--project-dir", help="Project directory"),
+    socket_file: Optional[str] = typer.Option(None, "--socket", help="Unix socket path (default: .agentspec/serve.sock)"),
+):
+    """Keep the catalog loaded and answer JSON-RPC requests over a Unix socket."""
+    p = Path(project_dir) if project_dir else Path.cwd()
+    if not serve.supported():
+        console.print("[red]Error: Unix domain sockets are not supported on this platform[/red]")
+        raise typer.Exit(1)
+
+    try:
+        server = serve.CatalogServer(p, Path(socket_file) if socket_file else None)
+    except OSError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+    console.print(f"[green]●[/green] Serving {p.resolve()} on [bold]{server.path}[/bold]")
+    console.print("[dim]Press Ctrl+C to stop[/dim]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+routes_app = typer.Typer(help="Precompiled agent -> model routing tables.", no_args_is_help=True)
+app.add_typer(routes_app, name="routes")
+
+
+@routes_app.command("build")
+def routes_build_command(
+    project_dir: Optional[str] = typer.Option(None, "--project-dir", help="Project directory"),
+    output_file: Optional[str] = typer.Option(None, "--output", "-o", help="JSON table path (default: routes.json in the project)"),
+    binary: bool = typer.Option(False, "--binary", help="Also write the memory-mappable binary table next to it (.bin)"),
+    plain: bool = typer.Option(False, "--plain", help=PLAIN_HELP),
+):
+    """Compile every agent's model_preferences and routes.yaml tag overrides into a lookup table."""
+    from agentspec_cli import routes
+
+    p = Path(project_dir) if project_dir else Path.cwd()
+    try:
+        table, skipped = routes.build(p)
+    except ValueError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+    target = Path(output_file) if output_file else p / routes.TABLE_NAME
+    written = [target]
+    routes.write(target, table)
+    if binary:
+        written.append(target.with_suffix(".bin"))
+        routes.write(written[-1], table)
+    with Output(console, plain=plain or None) as out:
+        for name, error in skipped:
+            out.row("  ", ("✗", "red"), f" {name}: {error}")
+        if skipped:
+            out.blank()
+        for path in written:
+            out.row("  ", ("●", "green"), f" {path}")
+        out.row(f"{len(table)} agents routed, {len(skipped)} skipped (invalid)")
+
+
+@routes_app.command("lookup")
+def routes_lookup_command(
+    agent: str = typer.Argument(..., help="Agent name"),
+    project_dir: Optional[str] = typer.Option(None, "--project-dir", help="Project directory"),
+    table_file: Optional[str] = typer.Option(
+        None, "--table", help="Built table (default: routes.bin, else routes.json, in the project)"
+    ),
+):
+    """Print an agent's models in preference order, one per line."""
+    from agentspec_cli import routes
+
+    if table_file:
+        path = Path(table_file)
+    else:
+        path = (Path(project_dir) if project_dir else Path.cwd()) / routes.TABLE_NAME
+        if path.with_suffix(".bin").exists():
+            path = path.with_suffix(".bin")
+    try:
+        table = routes.RouteTable.open(path)
+    except (OSError, ValueError) as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+    models = table.get(agent)
+    if models is None:
+        console.print(f"[red]Error: no route for agent '{agent}' in {path}[/red]")
+        raise typer.Exit(1)
+    console.file.write("".join(f"{m}\n" for m in models))
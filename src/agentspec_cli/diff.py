@@ -0,0 +1,157 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from agentspec_cli import git
+from agentspec_cli.catalog import KINDS, parse_config, scan_config_names
+from agentspec_cli.ignore import load_ignore
+
+# Files that make up one config, besides its kind's YAML file.
+EXTRA_FILES = ("prompt.md",)
+
+Key = Tuple[str, str]
+
+
+def blob_id(data: bytes) -> str:
+    # Same content hash git uses, so directory and git-ref snapshots compare directly.
+    h = hashlib.sha1(b"blob %d\0" % len(data))
+    h.update(data)
+    return h.hexdigest()
+
+
+class Snapshot:
+    """Content hashes of every config file in one version of the catalog."""
+
+    def __init__(self, label: str, files: Dict[Key, Dict[str, str]], read: Callable[[Iterable[str]], Dict[str, bytes]]):
+        self.label = label
+        self.files = files
+        self.read = read
+
+
+def dir_snapshot(root: Path) -> Snapshot:
+    files: Dict[Key, Dict[str, str]] = {}
+    paths: Dict[str, str] = {}
+    for kind, yaml_name in KINDS.items():
+        kind_dir = os.path.join(root, kind)
+        for name in scan_config_names(root, kind):
+            entry = {}
+            for file_name in (yaml_name, *EXTRA_FILES):
+                path = os.path.join(kind_dir, name, file_name)
+                try:
+                    with open(path, "rb") as f:
+                        sha = blob_id(f.read())
+                except (FileNotFoundError, IsADirectoryError):
+                    continue
+                entry[file_name] = sha
+                paths[sha] = path
+            if yaml_name in entry:
+                files[(kind, name)] = entry
+
+    def read(shas: Iterable[str]) -> Dict[str, bytes]:
+        blobs = {}
+        for sha in shas:
+            with open(paths[sha], "rb") as f:
+                blobs[sha] = f.read()
+        return blobs
+
+    return Snapshot(str(root), files, read)
+
+
+def git_snapshot(project: Path, ref: str) -> Snapshot:
+    files: Dict[Key, Dict[str, str]] = {}
+    for path, sha in git.tree_blobs(project, ref, *KINDS).items():
+        parts = path.split("/")
+        if len(parts) < 3 or parts[0] not in KINDS:
+            continue
+        kind, name, file_name = parts[0], "/".join(parts[1:-1]), parts[-1]
+        if file_name == KINDS[kind] or file_name in EXTRA_FILES:
+            files.setdefault((kind, name), {})[file_name] = sha
+    files = {key: entry for key, entry in files.items() if KINDS[key[0]] in entry}
+    # Match directory discovery: configs are not nested in configs, and ignored
+    # subtrees (per the working tree's .agentspecignore) are left out.
+    ignore = load_ignore(project)
+
+    def included(kind: str, name: str) -> bool:
+        parts = name.split("/")
+        if any((kind, "/".join(parts[:i])) in files for i in range(1, len(parts))):
+            return False
+        return ignore is None or not ignore.match_any(f"{kind}/{name}")
+
+    files = {key: entry for key, entry in files.items() if included(*key)}
+    return Snapshot(ref, files, lambda shas: git.read_blobs(project, shas))
+
+
+def snapshot(project: Path, spec: str) -> Snapshot:
+    """A directory if `spec` names one, otherwise a git ref in `project`."""
+    if Path(spec).is_dir():
+        return dir_snapshot(Path(spec))
+    if git.resolve_tree(project, spec) is None:
+        raise ValueError(f"'{spec}' is neither a directory nor a git ref")
+    return git_snapshot(project, spec)
+
+
+def field_changes(old: Any, new: Any, prefix: str = "") -> List[Tuple[str, str]]:
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in list(old) + [k for k in new if k not in old]:
+            path = f"{prefix}.{key}" if prefix else str(key)
+            if key not in new:
+                changes.append((path, "removed"))
+            elif key not in old:
+                changes.append((path, "added"))
+            else:
+                changes.extend(field_changes(old[key], new[key], path))
+        return changes
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        changes = []
+        for i, (a, b) in enumerate(zip(old, new)):
+            changes.extend(field_changes(a, b, f"{prefix}[{i}]"))
+        return changes
+    if old == new:
+        return []
+    return [(prefix or "(document)", "modified")]
+
+
+def _parse(kind: str, data: Optional[bytes]) -> Tuple[Optional[Any], Optional[str]]:
+    return parse_config(data.decode("utf-8", errors="replace") if data is not None else None, kind)
+
+
+def diff(old: Snapshot, new: Snapshot) -> Dict[str, Any]:
+    # Hash-join on (kind, name): one pass over each side, then only configs whose
+    # file hashes differ are read and deep-diffed.
+    added = sorted(key for key in new.files if key not in old.files)
+    removed = sorted(key for key in old.files if key not in new.files)
+    changed = sorted(key for key, entry in new.files.items() if key in old.files and old.files[key] != entry)
+
+    old_blobs = old.read(sha for key in changed for sha in old.files[key].values())
+    new_blobs = new.read(sha for key in changed for sha in new.files[key].values())
+
+    changes = []
+    for kind, name in changed:
+        a, b = old.files[(kind, name)], new.files[(kind, name)]
+        yaml_name = KINDS[kind]
+        fields: List[Tuple[str, str]] = []
+        if a[yaml_name] != b[yaml_name]:
+            old_data, old_error = _parse(kind, old_blobs[a[yaml_name]])
+            new_data, new_error = _parse(kind, new_blobs[b[yaml_name]])
+            if old_error or new_error:
+                fields.append((yaml_name, "invalid yaml"))
+            else:
+                fields.extend(field_changes(old_data, new_data))
+        for file_name in EXTRA_FILES:
+            if a.get(file_name) != b.get(file_name):
+                status = "added" if file_name not in a else "removed" if file_name not in b else "modified"
+                fields.append((file_name, status))
+        changes.append({
+            "path": f"{kind}/{name}",
+            "fields": [{"field": f, "change": c} for f, c in fields],
+        })
+
+    return {
+        "old": old.label,
+        "new": new.label,
+        "added": [f"{kind}/{name}" for kind, name in added],
+        "removed": [f"{kind}/{name}" for kind, name in removed],
+        "changed": changes,
+    }
@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import json
+import math
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+from agentspec_cli import storage
+from agentspec_cli.backends import Backend, Message
+from agentspec_cli.catalog import Resolver, iter_configs
+from agentspec_cli.render import prompt_source
+
+SUITE_NAME = "evals.yaml"
+CACHE_DIR = ".agentspec/eval-cache"
+CHECKS = ("equals", "contains", "not_contains", "regex")
+
+
+def cache_dir(project: Path) -> Path:
+    return Path(project) / CACHE_DIR
+
+
+class ResponseCache:
+    """Responses stored under the SHA-256 of (backend, messages)."""
+
+    def __init__(self, root: Optional[Path]):
+        self.root = root
+
+    @staticmethod
+    def key(backend: Backend, messages: List[Message]) -> str:
+        payload = json.dumps({"backend": backend.cache_key, "messages": messages}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        if self.root is None:
+            return None
+        try:
+            return json.loads(self._path(key).read_text())["response"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key: str, response: str) -> None:
+        if self.root is None:
+            return
+        storage.atomic_write(self._path(key), json.dumps({"response": response}).encode())
+
+
+def load_suite(path: Path) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    try:
+        data = yaml.safe_load(path.read_text())
+    except Exception as e:
+        return [], f"YAML parse error: {e}"
+    cases = data.get("cases") if isinstance(data, dict) else None
+    if not isinstance(cases, list):
+        return [], "expected a 'cases' list"
+    for i, case in enumerate(cases):
+        if not isinstance(case, dict) or "input" not in case:
+            return [], f"case {i + 1}: missing 'input'"
+        unknown = set(case.get("expect") or {}) - set(CHECKS)
+        if unknown:
+            return [], f"case {i + 1}: unknown checks: {', '.join(sorted(unknown))}"
+        # Bad patterns are suite errors here, not crashes when the case is checked.
+        for pattern in _as_list((case.get("expect") or {}).get("regex")):
+            try:
+                re.compile(str(pattern))
+            except re.error as e:
+                return [], f"case {i + 1}: invalid regex /{pattern}/: {e}"
+    return cases, None
+
+
+def check(expect: Dict[str, Any], output: str) -> List[str]:
+    failures = []
+    if "equals" in expect and output != str(expect["equals"]):
+        failures.append("output does not equal expected text")
+    for needle in _as_list(expect.get("contains")):
+        if str(needle) not in output:
+            failures.append(f"missing {str(needle)!r}")
+    for needle in _as_list(expect.get("not_contains")):
+        if str(needle) in output:
+            failures.append(f"unexpected {str(needle)!r}")
+    for pattern in _as_list(expect.get("regex")):
+        if not re.search(str(pattern), output):
+            failures.append(f"no match for /{pattern}/")
+    return failures
+
+
+def _as_list(value: Any) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    # Nearest-rank percentile; 0.0 for an empty sample.
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def collect(project: Path, agents: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+    """One entry per agent with an evals.yaml: its system message, cases or load error."""
+    project = Path(project)
+    wanted = set(agents) if agents else None
+    resolver = Resolver(project)
+    suites = []
+    for name, config_dir in iter_configs(project, "agents"):
+        suite = config_dir / SUITE_NAME
+        if (wanted is not None and name not in wanted) or not suite.exists():
+            continue
+        entry = {"agent": name, "cases": [], "error": None, "system": ""}
+        data, error = resolver.resolve("agents", name)
+        if error or not isinstance(data, dict):
+            entry["error"] = error or "YAML parse error: expected a mapping at the top level"
+        else:
+            entry["system"] = prompt_source(config_dir, data)
+            entry["cases"], entry["error"] = load_suite(suite)
+        suites.append(entry)
+    return suites
+
+
+async def _run_case(backend: Backend, limit: asyncio.Semaphore, cache: ResponseCache, system: str, case: Dict[str, Any]):
+    messages = [{"role": "system", "content": system}, {"role": "user", "content": str(case["input"])}]
+    key = ResponseCache.key(backend, messages)
+    start = time.perf_counter()
+    output = cache.get(key)
+    cached = output is not None
+    error = None
+    if not cached:
+        async with limit:
+            start = time.perf_counter()
+            try:
+                output = await backend.complete(messages)
+            except Exception as e:
+                error = f"backend error: {e}"
+        if error is None:
+            cache.put(key, output)
+    end = time.perf_counter()
+    failures = [error] if error else check(case.get("expect") or {}, output)
+    return {
+        "name": str(case.get("name") or case["input"])[:60],
+        "passed": not failures,
+        "failures": failures,
+        "cached": cached,
+        "start": start,
+        "end": end,
+        "latency": end - start,
+    }
+
+
+async def _run(backend: Backend, suites: List[Dict[str, Any]], cache: ResponseCache) -> List[List[Dict[str, Any]]]:
+    # One semaphore per backend bounds in-flight requests; every case of every agent is
+    # scheduled up front so slow agents do not hold up the others.
+    limit = asyncio.Semaphore(backend.concurrency)
+    return await asyncio.gather(*(
+        asyncio.gather(*(_run_case(backend, limit, cache, s["system"], case) for case in s["cases"]))
+        for s in suites
+    ))
+
+
+def summarize_results(agent: str, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    live = [r["latency"] for r in results if not r["cached"]]
+    wall = max((r["end"] for r in results), default=0.0) - min((r["start"] for r in results), default=0.0)
+    return {
+        "agent": agent,
+        "cases": len(results),
+        "passed": sum(r["passed"] for r in results),
+        "cached": len(results) - len(live),
+        "p50": percentile(live, 50),
+        "p95": percentile(live, 95),
+        "p99": percentile(live, 99),
+        "throughput": len(results) / wall if wall > 0 else 0.0,
+    }
+
+
+def run(backend: Backend, suites: List[Dict[str, Any]], cache: ResponseCache) -> List[Dict[str, Any]]:
+    """Evaluate all loadable suites; returns per-agent reports with case results."""
+    runnable = [s for s in suites if not s["error"]]
+    outcomes = asyncio.run(_run(backend, runnable, cache))
+    reports = []
+    for suite, results in zip(runnable, outcomes):
+        report = summarize_results(suite["agent"], results)
+        report["results"] = results
+        reports.append(report)
+    return reports
@@ -0,0 +1,283 @@
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+from agentspec_cli import storage
+from agentspec_cli.catalog import FAST_LOADER, KINDS, dump_yaml, iter_config_dirs
+
+CACHE_NAME = ".agentspec/fmt-cache.json"
+# Bump whenever the canonical layout changes, so cached "already formatted" entries are dropped.
+FORMAT_VERSION = 2
+CHUNK_SIZE = 200
+# More files than this to (re)check are formatted on a process pool unless --jobs is given.
+POOL_THRESHOLD = 1_000
+
+KEY_ORDER = (
+    "name",
+    "description",
+    "version",
+    "author",
+    "extends",
+    "model_preferences",
+    "tags",
+    "system_prompt",
+    "inputs",
+    "outputs",
+    "tools",
+    "steps",
+)
+ITEM_KEY_ORDER = ("name", "description")
+
+_COMMENT_RE = re.compile(r"(?:^|(?<=\s))#")
+
+
+def has_comments(text: str) -> bool:
+    """True if the text has a YAML comment; a '#' inside a scalar does not count."""
+    if "#" not in text:
+        return False
+    try:
+        spans = [
+            (token.start_mark.index, token.end_mark.index)
+            for token in yaml.scan(text)
+            if isinstance(token, yaml.ScalarToken)
+        ]
+    except yaml.YAMLError:
+        return True
+    return any(
+        not any(start <= m.start() < end for start, end in spans) for m in _COMMENT_RE.finditer(text)
+    )
+
+
+def _ordered(data: Dict[str, Any], order: Tuple[str, ...]) -> Dict[str, Any]:
+    keys = [k for k in order if k in data] + [k for k in data if k not in order]
+    return {k: data[k] for k in keys}
+
+
+def _is_section(value: Any) -> bool:
+    if isinstance(value, str):
+        return "\n" in value
+    if isinstance(value, list):
+        return any(isinstance(item, dict) for item in value)
+    return isinstance(value, dict)
+
+
+def _dump_entry(key: str, value: Any) -> str:
+    if isinstance(value, list):
+        value = [_ordered(item, ITEM_KEY_ORDER) if isinstance(item, dict) else item for item in value]
+    return dump_yaml({key: value})
+
+
+def _load(text: str) -> Dict[str, Any]:
+    try:
+        data = yaml.load(text, Loader=FAST_LOADER)
+    except yaml.YAMLError as e:
+        raise ValueError(f"YAML parse error: {e}")
+    if not isinstance(data, dict):
+        raise ValueError("not a YAML mapping")
+    return data
+
+
+def format_text(text: str) -> str:
+    """The canonical layout of a config: fixed key order, two-space indented lists, `|` for multi-line text.
+
+    Keys outside KEY_ORDER keep their relative order after the known ones, and
+    every block-valued key (prompt text, lists of mappings) is preceded by a
+    blank line. Text with comments goes through `format_commented`. Raises
+    ValueError if the text is not a YAML mapping or cannot be laid out.
+    """
+    if has_comments(text):
+        return format_commented(text)
+    data = _load(text)
+    chunks = []
+    for key, value in _ordered(data, KEY_ORDER).items():
+        chunk = _dump_entry(key, value)
+        chunks.append("\n" + chunk if chunks and _is_section(value) else chunk)
+    out = "".join(chunks)
+    if yaml.load(out, Loader=FAST_LOADER) != data:
+        raise ValueError("cannot be formatted without changing its meaning")
+    return out
+
+
+def _comment_lines(lines: List[str]) -> Optional[List[str]]:
+    # The comment lines of a stretch between top-level keys; None if it holds anything else.
+    comments = [line if line.endswith("\n") else line + "\n" for line in lines if line.strip()]
+    return comments if all(line.lstrip().startswith("#") for line in comments) else None
+
+
+def format_commented(text: str) -> str:
+    """The canonical layout of a config with comments, keeping every comment.
+
+    Top-level keys are reordered as whole blocks (via migrate.Document), each
+    with the comment lines directly above it. A block without comments inside
+    is re-dumped like `format_text` would; one with comments keeps its lines
+    as written. Comments above the first key that are followed by a blank
+    line stay at the top of the file, and those after the last key stay at
+    the end.
+    """
+    from agentspec_cli.migrate import Document
+
+    data = _load(text)
+    doc = Document(text)
+    lines = doc.lines
+    blocks = doc.blocks()
+    entries = []
+    header: List[str] = []
+    prev_end = 0
+    for i, (key, start, end) in enumerate(blocks):
+        gap = lines[prev_end:start]
+        lead = _comment_lines(gap)
+        if lead is None:
+            raise ValueError(f"cannot be formatted without losing comments (unsupported content before '{key}')")
+        if i == 0:
+            # Only comments touching the first key belong to it; the rest is the file header.
+            split = len(gap) - next((n for n, line in enumerate(reversed(gap)) if not line.strip()), len(gap))
+            header, lead = _comment_lines(gap[:split]), _comment_lines(gap[split:])
+        body = "".join(lines[start:end])
+        if not body.endswith("\n"):
+            body += "\n"
+        value = data.get(key)
+        if not has_comments(body):
+            body = _dump_entry(key, value)
+        entries.append((key, lead, body, _is_section(value)))
+        prev_end = end
+    footer = _comment_lines(lines[prev_end:])
+    if footer is None or len({key for key, _, _, _ in entries}) != len(entries):
+        raise ValueError("cannot be formatted without losing comments")
+
+    order = {key: n for n, key in enumerate(_ordered({key: None for key, _, _, _ in entries}, KEY_ORDER))}
+    chunks = ["".join(header) + "\n"] if header else []
+    for key, lead, body, section in sorted(entries, key=lambda entry: order[entry[0]]):
+        sep = "\n" if chunks and (section or lead) and not chunks[-1].endswith("\n\n") else ""
+        chunks.append(sep + "".join(lead) + body)
+    out = "".join(chunks) + "".join(footer)
+    if yaml.load(out, Loader=FAST_LOADER) != data:
+        raise ValueError("cannot be formatted without changing its meaning")
+    return out
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def iter_config_files(project: Path) -> Iterator[Tuple[str, str]]:
+    """Yield (relative path, absolute path) of every agent.yaml and skill.yaml."""
+    for kind, file_name in KINDS.items():
+        for config_dir in iter_config_dirs(project, kind):
+            path = config_dir / file_name
+            if path.exists():
+                yield path.relative_to(project).as_posix(), str(path)
+
+
+class FormatCache:
+    """Files known to need no formatting, keyed by path with their stat and content hash.
+
+    A matching mtime and size skips the read; a matching hash skips the parse.
+    """
+
+    def __init__(self, project: Path):
+        self.path = Path(project) / CACHE_NAME
+        self.entries: Dict[str, list] = {}
+        self.dirty: Dict[str, Optional[list]] = {}
+        data = storage.read_bytes(self.path)
+        try:
+            loaded = json.loads(data) if data else {}
+        except ValueError:
+            loaded = {}
+        if loaded.get("version") == FORMAT_VERSION:
+            self.entries = loaded.get("files", {})
+
+    def lookup(self, rel: str, path: str) -> Optional[str]:
+        """The cached status ("ok") if the file is unchanged since it was checked."""
+        entry = self.entries.get(rel)
+        if entry is None:
+            return None
+        mtime_ns, size, digest, status = entry
+        st = os.stat(path)
+        if (st.st_mtime_ns, st.st_size) == (mtime_ns, size):
+            return status
+        with open(path, "rb") as f:
+            if content_hash(f.read()) != digest:
+                return None
+        self.remember(rel, path, digest, status)
+        return status
+
+    def remember(self, rel: str, path: str, digest: str, status: str) -> None:
+        st = os.stat(path)
+        self.dirty[rel] = [st.st_mtime_ns, st.st_size, digest, status]
+
+    def forget(self, rel: str) -> None:
+        if rel in self.entries:
+            self.dirty[rel] = None
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+
+        # Concurrent runs may have cached other files meanwhile; merge rather than overwrite.
+        def merge(data: Optional[bytes]) -> bytes:
+            try:
+                current = json.loads(data) if data else {}
+            except ValueError:
+                current = {}
+            files = current.get("files", {}) if current.get("version") == FORMAT_VERSION else {}
+            for rel, entry in self.dirty.items():
+                if entry is None:
+                    files.pop(rel, None)
+                else:
+                    files[rel] = entry
+            return json.dumps({"version": FORMAT_VERSION, "files": files}, sort_keys=True).encode()
+
+        storage.update(self.path, merge)
+
+
+# (relative path, status, formatted text, digest of the original, error)
+# status is "ok" (already canonical), "reformat" or "error".
+Result = Tuple[str, str, Optional[str], Optional[str], Optional[str]]
+
+
+def format_file(rel: str, path: str) -> Result:
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+        text = raw.decode()
+    except (OSError, UnicodeDecodeError) as e:
+        return rel, "error", None, None, str(e)
+    digest = content_hash(raw)
+    try:
+        formatted = format_text(text)
+    except ValueError as e:
+        return rel, "error", None, digest, str(e)
+    if formatted == text:
+        return rel, "ok", None, digest, None
+    return rel, "reformat", formatted, digest, None
+
+
+def _format_chunk(chunk: List[Tuple[str, str]]) -> List[Result]:
+    return [format_file(rel, path) for rel, path in chunk]
+
+
+def run(project: Path, cache: Optional[FormatCache], jobs: Optional[int] = None) -> Iterator[Result]:
+    """Check every config, yielding a result per file; files the cache vouches for are not reopened."""
+    project = Path(project)
+    todo = []
+    for rel, path in iter_config_files(project):
+        status = cache.lookup(rel, path) if cache else None
+        if status is not None:
+            yield rel, status, None, None, None
+        else:
+            todo.append((rel, path))
+    if jobs is None:
+        jobs = (os.cpu_count() or 1) if len(todo) > POOL_THRESHOLD else 1
+    if jobs <= 1:
+        yield from _format_chunk(todo)
+        return
+    chunks = [todo[i:i + CHUNK_SIZE] for i in range(0, len(todo), CHUNK_SIZE)]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for results in pool.map(_format_chunk, chunks):
+            yield from results
@@ -0,0 +1,94 @@
+import os
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+def _git(project: Path, *args: str) -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", *args],
+            cwd=project,
+            capture_output=True,
+            text=True,
+        )
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout
+
+
+def is_git_checkout(project: Path) -> bool:
+    out = _git(project, "rev-parse", "--is-inside-work-tree")
+    return out is not None and out.strip() == "true"
+
+
+def changed_paths(project: Path, since: Optional[str] = None, staged: bool = False) -> Optional[List[str]]:
+    if not is_git_checkout(project):
+        return None
+    if not staged:
+        _git(project, "update-index", "-q", "--refresh")
+    args = ["diff-index", "--name-only", "--relative", "-z"]
+    ref = since or "HEAD"
+    if staged:
+        args.append("--cached")
+        if since is None and resolve_tree(project, ref) is None:
+            # Before the first commit everything staged is new: diff against the empty tree.
+            ref = (_git(project, "hash-object", "-t", "tree", os.devnull) or "").strip() or ref
+    args.append(ref)
+    out = _git(project, *args)
+    if out is None:
+        raise ValueError(f"cannot diff against git ref '{since or 'HEAD'}'")
+    paths = [p for p in out.split("\0") if p]
+    if not staged:
+        untracked = _git(project, "ls-files", "--others", "--exclude-standard", "-z")
+        if untracked:
+            paths.extend(p for p in untracked.split("\0") if p)
+    return paths
+
+
+def resolve_tree(project: Path, ref: str) -> Optional[str]:
+    out = _git(project, "rev-parse", "--verify", "-q", f"{ref}^{{tree}}")
+    return out.strip() if out else None
+
+
+def tree_blobs(project: Path, ref: str, *paths: str) -> Dict[str, str]:
+    """Map each file under `paths` at `ref` (relative to `project`) to its blob id."""
+    out = _git(project, "ls-tree", "-r", "-z", ref, "--", *paths)
+    if out is None:
+        raise ValueError(f"cannot read git ref '{ref}'")
+    blobs = {}
+    for record in out.split("\0"):
+        if not record:
+            continue
+        meta, _, path = record.partition("\t")
+        _, obj_type, sha = meta.split()
+        if obj_type == "blob":
+            blobs[path] = sha
+    return blobs
+
+
+def read_blobs(project: Path, shas: Iterable[str]) -> Dict[str, bytes]:
+    shas = list(dict.fromkeys(shas))
+    if not shas:
+        return {}
+    result = subprocess.run(
+        ["git", "cat-file", "--batch"],
+        cwd=project,
+        input="".join(f"{sha}\n" for sha in shas).encode(),
+        capture_output=True,
+        check=True,
+    )
+    blobs = {}
+    out = result.stdout
+    pos = 0
+    for sha in shas:
+        end = out.index(b"\n", pos)
+        header = out[pos:end].split()
+        if header[1] == b"missing":
+            raise ValueError(f"git object {sha} is missing")
+        size = int(header[2])
+        blobs[sha] = out[end + 1:end + 1 + size]
+        pos = end + 1 + size + 1
+    return blobs
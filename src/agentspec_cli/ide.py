@@ -1,15 +1,20 @@
+import hashlib
+import importlib
+import json
 import os
+import sys
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, List, Optional
 
-import readchar
 from rich.console import Console
-from rich.live import Live
-from rich.panel import Panel
-from rich.table import Table
+
+from agentspec_cli.storage import atomic_write, user_cache_dir
 
 console = Console()
 
+ENTRY_POINT_GROUP = "agentspec.ide"
+
 AGENT_CONFIG = {
     "copilot": {"name": "GitHub Copilot", "folder": ".github/", "requires_cli": False},
     "claude": {"name": "Claude Code", "folder": ".claude/", "requires_cli": True},
@@ -31,8 +36,86 @@ AGENT_CONFIG = {
     "devin": {"name": "Devin", "folder": ".devin/", "requires_cli": False},
 }
 
+# Generators are referenced as "module:function" strings and imported only when
+# their IDE is selected, so adding targets does not add import time.
+BUILTIN_GENERATORS = {
+    "copilot": "agentspec_cli.ide_targets:_gen_copilot",
+    "claude": "agentspec_cli.ide_targets:_gen_claude",
+    "gemini": "agentspec_cli.ide_targets:_gen_gemini",
+    "cursor-agent": "agentspec_cli.ide_targets:_gen_cursor",
+    "qwen": "agentspec_cli.ide_targets:_gen_qwen",
+    "opencode": "agentspec_cli.ide_targets:_gen_opencode",
+    "codex": "agentspec_cli.ide_targets:_gen_codex",
+    "windsurf": "agentspec_cli.ide_targets:_gen_windsurf",
+    "kilocode": "agentspec_cli.ide_targets:_gen_kilocode",
+    "auggie": "agentspec_cli.ide_targets:_gen_auggie",
+    "codebuddy": "agentspec_cli.ide_targets:_gen_codebuddy",
+    "qoder": "agentspec_cli.ide_targets:_gen_qoder",
+    "roo": "agentspec_cli.ide_targets:_gen_roo",
+    "q": "agentspec_cli.ide_targets:_gen_q",
+    "amp": "agentspec_cli.ide_targets:_gen_amp",
+    "shai": "agentspec_cli.ide_targets:_gen_shai",
+    "bob": "agentspec_cli.ide_targets:_gen_bob",
+    "devin": "agentspec_cli.ide_targets:_gen_devin",
+}
+
+
+def _distribution_key() -> str:
+    # The names of *.dist-info / *.egg-info directories on sys.path encode the
+    # installed distribution set (name and version) without opening any files.
+    h = hashlib.sha256()
+    for entry in sys.path:
+        try:
+            names = sorted(n for n in os.listdir(entry or ".") if n.endswith((".dist-info", ".egg-info")))
+        except OSError:
+            continue
+        h.update(entry.encode() + b"\0" + "\0".join(names).encode() + b"\n")
+    return h.hexdigest()
+
+
+def _scan_entry_points() -> Dict[str, str]:
+    from importlib.metadata import entry_points
+
+    return {ep.name: ep.value for ep in entry_points(group=ENTRY_POINT_GROUP)}
+
+
+@lru_cache(maxsize=None)
+def plugin_generators() -> Dict[str, str]:
+    key = _distribution_key()
+    cache_file = user_cache_dir() / "ide-registry.json"
+    try:
+        cached = json.loads(cache_file.read_text())
+        if cached.get("key") == key:
+            return cached["generators"]
+    except (OSError, ValueError, KeyError):
+        pass
+    generators = _scan_entry_points()
+    try:
+        atomic_write(cache_file, json.dumps({"key": key, "generators": generators}).encode())
+    except OSError:
+        pass
+    return generators
+
+
+def ide_keys() -> List[str]:
+    return list(BUILTIN_GENERATORS) + [k for k in plugin_generators() if k not in BUILTIN_GENERATORS]
+
+
+@lru_cache(maxsize=None)
+def load_generator(ide_key: str) -> Optional[Callable[[Path], None]]:
+    target = BUILTIN_GENERATORS.get(ide_key) or plugin_generators().get(ide_key)
+    if not target:
+        return None
+    module_name, _, attr = target.partition(":")
+    obj = importlib.import_module(module_name)
+    for part in attr.split("."):
+        obj = getattr(obj, part)
+    return obj
+
 
 def get_key() -> str:
+    import readchar
+
     key = readchar.readkey()
     if key in (readchar.key.UP, readchar.key.CTRL_P):
         return "up"
@@ -48,7 +131,11 @@ def get_key() -> str:
 
 
 def select_ide(default_key: Optional[str] = None) -> str:
-    option_keys = list(AGENT_CONFIG.keys())
+    from rich.live import Live
+    from rich.panel import Panel
+    from rich.table import Table
+
+    option_keys = ide_keys()
     selected_index = 0
     if default_key and default_key in option_keys:
         selected_index = option_keys.index(default_key)
@@ -61,7 +148,7 @@ def select_ide(default_key: Optional[str] = None) -> str:
         table.add_column(style="white", justify="left")
 
         for i, key in enumerate(option_keys):
-            label = AGENT_CONFIG[key]["name"]
+            label = get_ide_label(key)
             if i == selected_index:
                 table.add_row("▶", f"[bold cyan]{key}[/bold cyan] [dim]({label})[/dim]")
             else:
@@ -105,165 +192,18 @@ def get_ide_label(ide_key: str) -> str:
     config = AGENT_CONFIG.get(ide_key)
     if config:
         return config["name"]
+    if ide_key in plugin_generators():
+        return getattr(load_generator(ide_key), "label", ide_key)
     return ide_key
 
 
 def generate_ide_config(project_path: Path, ide_key: str) -> None:
-    p = project_path
-    configs = {
-        "copilot": _gen_copilot,
-        "claude": _gen_claude,
-        "gemini": _gen_gemini,
-        "cursor-agent": _gen_cursor,
-        "qwen": _gen_qwen,
-        "opencode": _gen_opencode,
-        "codex": _gen_codex,
-        "windsurf": _gen_windsurf,
-        "kilocode": _gen_kilocode,
-        "auggie": _gen_auggie,
-        "codebuddy": _gen_codebuddy,
-        "qoder": _gen_qoder,
-        "roo": _gen_roo,
-        "q": _gen_q,
-        "amp": _gen_amp,
-        "shai": _gen_shai,
-        "bob": _gen_bob,
-        "devin": _gen_devin,
-    }
-    gen_fn = configs.get(ide_key)
+    gen_fn = load_generator(ide_key)
     if gen_fn:
-        gen_fn(p)
-
-
-AGENTSPEC_CONTEXT = """\
-This is an AgentSpec project for managing AI agent configurations and skills.
-
-## Project Structure
-- `agents/` - Agent configurations with agent.yaml and prompt.md
-- `skills/` - Skill configurations with skill.yaml and prompt.md
-- `templates/` - Templates for new agents/skills
-- `prompts/` - Chat prompt templates for interactive creation
-
-## Conventions
-- All config names use kebab-case
-- Agent configs: `agents/{name}/agent.yaml` + `prompt.md`
-- Skill configs: `skills/{name}/skill.yaml` + `prompt.md`
-- YAML files must have: name, description, version
-
-## Available Commands
-- `agentspec new-agent` - Create new agent interactively
-- `agentspec new-skill` - Create new skill interactively
-- `agentspec list` - List all configs
-- `agentspec validate` - Validate all configs
-"""
-
-
-def _write(path: Path, content: str) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content)
-
-
-def _gen_copilot(p: Path) -> None:
-    _write(
-        p / ".github" / "copilot-instructions.md",
-        f"# GitHub Copilot Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}",
-    )
-
-
-def _gen_claude(p: Path) -> None:
-    _write(p / "CLAUDE.md", f"# Claude Code Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
-
-
-def _gen_gemini(p: Path) -> None:
-    import json
-
-    settings = {
-        "projectContext": (
-            "AgentSpec - AI Agent Configuration Toolkit. "
-            "Manages agent configs in agents/{name}/agent.yaml "
-            "and skills in skills/{name}/skill.yaml. "
-            "All names kebab-case. YAML requires name, description, version fields."
-        ),
-        "codeStyle": {"yamlIndent": 2, "namingConvention": "kebab-case"},
-    }
-    _write(p / ".gemini" / "settings.json", json.dumps(settings, indent=2) + "\n")
-
-
-def _gen_cursor(p: Path) -> None:
-    _write(
-        p / ".cursor" / "rules" / "agentspec.md",
-        f"# AgentSpec Rules for Cursor\n\nYou are working in an AgentSpec project.\n\n{AGENTSPEC_CONTEXT}",
-    )
-
-
-def _gen_qwen(p: Path) -> None:
-    _write(p / ".qwen", f"# Qwen Code Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
-
-
-def _gen_opencode(p: Path) -> None:
-    _write(p / ".opencode", f"# opencode Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
-
-
-def _gen_codex(p: Path) -> None:
-    _write(
-        p / ".codex" / "instructions.md",
-        f"# Codex CLI Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}",
-    )
-
-
-def _gen_windsurf(p: Path) -> None:
-    _write(
-        p / ".windsurf" / "rules" / "agentspec.md",
-        f"# AgentSpec Rules for Windsurf\n\n{AGENTSPEC_CONTEXT}",
-    )
-
-
-def _gen_kilocode(p: Path) -> None:
-    _write(p / ".kilocode", f"# Kilo Code Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
-
-
-def _gen_auggie(p: Path) -> None:
-    _write(p / ".auggie", f"# Auggie CLI Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
-
-
-def _gen_codebuddy(p: Path) -> None:
-    _write(p / ".codebuddy", f"# CodeBuddy Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
-
-
-def _gen_qoder(p: Path) -> None:
-    _write(p / ".qoder", f"# Qoder CLI Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
-
-
-def _gen_roo(p: Path) -> None:
-    _write(p / ".roo", f"# Roo Code Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
-
-
-def _gen_q(p: Path) -> None:
-    _write(p / ".q", f"# Amazon Q Developer CLI Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
-
-
-def _gen_amp(p: Path) -> None:
-    _write(p / ".amp", f"# Amp Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
-
-
-def _gen_shai(p: Path) -> None:
-    _write(p / ".shai", f"# SHAI Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
-
-
-def _gen_bob(p: Path) -> None:
-    _write(p / ".bob", f"# IBM Bob Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
-
-
-def _gen_devin(p: Path) -> None:
-    _write(
-        p / ".devin" / "instructions.md",
-        f"# Devin Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}",
-    )
+        gen_fn(project_path)
 
 
 def generate_vscode_config(project_path: Path) -> None:
-    import json
-
     vscode = project_path / ".vscode"
     vscode.mkdir(parents=True, exist_ok=True)
 
@@ -0,0 +1,126 @@
+from pathlib import Path
+
+AGENTSPEC_CONTEXT = """\
+This is an AgentSpec project for managing AI agent configurations and skills.
+
+## Project Structure
+- `agents/` - Agent configurations with agent.yaml and prompt.md
+- `skills/` - Skill configurations with skill.yaml and prompt.md
+- `templates/` - Templates for new agents/skills
+- `prompts/` - Chat prompt templates for interactive creation
+
+## Conventions
+- All config names use kebab-case
+- Agent configs: `agents/{name}/agent.yaml` + `prompt.md`
+- Skill configs: `skills/{name}/skill.yaml` + `prompt.md`
+- YAML files must have: name, description, version
+
+## Available Commands
+- `agentspec new-agent` - Create new agent interactively
+- `agentspec new-skill` - Create new skill interactively
+- `agentspec list` - List all configs
+- `agentspec validate` - Validate all configs
+"""
+
+
+def _write(path: Path, content: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+def _gen_copilot(p: Path) -> None:
+    _write(
+        p / ".github" / "copilot-instructions.md",
+        f"# GitHub Copilot Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}",
+    )
+
+
+def _gen_claude(p: Path) -> None:
+    _write(p / "CLAUDE.md", f"# Claude Code Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
+
+
+def _gen_gemini(p: Path) -> None:
+    import json
+
+    settings = {
+        "projectContext": (
+            "AgentSpec - AI Agent Configuration Toolkit. "
+            "Manages agent configs in agents/{name}/agent.yaml "
+            "and skills in skills/{name}/skill.yaml. "
+            "All names kebab-case. YAML requires name, description, version fields."
+        ),
+        "codeStyle": {"yamlIndent": 2, "namingConvention": "kebab-case"},
+    }
+    _write(p / ".gemini" / "settings.json", json.dumps(settings, indent=2) + "\n")
+
+
+def _gen_cursor(p: Path) -> None:
+    _write(
+        p / ".cursor" / "rules" / "agentspec.md",
+        f"# AgentSpec Rules for Cursor\n\nYou are working in an AgentSpec project.\n\n{AGENTSPEC_CONTEXT}",
+    )
+
+
+def _gen_qwen(p: Path) -> None:
+    _write(p / ".qwen", f"# Qwen Code Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
+
+
+def _gen_opencode(p: Path) -> None:
+    _write(p / ".opencode", f"# opencode Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
+
+
+def _gen_codex(p: Path) -> None:
+    _write(
+        p / ".codex" / "instructions.md",
+        f"# Codex CLI Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}",
+    )
+
+
+def _gen_windsurf(p: Path) -> None:
+    _write(
+        p / ".windsurf" / "rules" / "agentspec.md",
+        f"# AgentSpec Rules for Windsurf\n\n{AGENTSPEC_CONTEXT}",
+    )
+
+
+def _gen_kilocode(p: Path) -> None:
+    _write(p / ".kilocode", f"# Kilo Code Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
+
+
+def _gen_auggie(p: Path) -> None:
+    _write(p / ".auggie", f"# Auggie CLI Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
+
+
+def _gen_codebuddy(p: Path) -> None:
+    _write(p / ".codebuddy", f"# CodeBuddy Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
+
+
+def _gen_qoder(p: Path) -> None:
+    _write(p / ".qoder", f"# Qoder CLI Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
+
+
+def _gen_roo(p: Path) -> None:
+    _write(p / ".roo", f"# Roo Code Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
+
+
+def _gen_q(p: Path) -> None:
+    _write(p / ".q", f"# Amazon Q Developer CLI Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
+
+
+def _gen_amp(p: Path) -> None:
+    _write(p / ".amp", f"# Amp Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
+
+
+def _gen_shai(p: Path) -> None:
+    _write(p / ".shai", f"# SHAI Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
+
+
+def _gen_bob(p: Path) -> None:
+    _write(p / ".bob", f"# IBM Bob Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}")
+
+
+def _gen_devin(p: Path) -> None:
+    _write(
+        p / ".devin" / "instructions.md",
+        f"# Devin Instructions for AgentSpec\n\n{AGENTSPEC_CONTEXT}",
+    )
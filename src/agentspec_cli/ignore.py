@@ -0,0 +1,115 @@
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+IGNORE_FILE = ".agentspecignore"
+
+_cache: Dict[str, Tuple[Tuple[int, int], Optional["IgnoreSpec"]]] = {}
+
+
+def _translate(glob: str) -> str:
+    out = []
+    i, n = 0, len(glob)
+    while i < n:
+        c = glob[i]
+        if glob.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if glob.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            # A "]" right after "[" (or "[!") is part of the class, as in fnmatch.
+            end = glob.find("]", i + 3 if glob[i + 1:i + 2] in ("!", "^") else i + 2)
+            if end < 0:
+                out.append(re.escape(c))
+            else:
+                body = glob[i + 1:end]
+                if body[:1] in ("!", "^"):
+                    body = "^" + body[1:]
+                out.append(f"[{body.replace(chr(92), chr(92) * 2)}]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(glob[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def compile_pattern(line: str) -> Optional[Tuple[str, bool]]:
+    """A gitignore line as (regex over a project-relative directory path, negated), or None for blanks and comments."""
+    line = line.rstrip("\n").rstrip()
+    if not line or line.startswith("#"):
+        return None
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    elif line.startswith("\\"):
+        line = line[1:]
+    line = line.rstrip("/")
+    if not line:
+        return None
+    # As in gitignore, a slash anywhere but the end anchors the pattern to the root;
+    # otherwise it matches a directory of that name at any depth.
+    anchored = "/" in line
+    regex = _translate(line.lstrip("/"))
+    return (regex if anchored else "(?:.*/)?" + regex), negate
+
+
+class IgnoreSpec:
+    """Compiled .agentspecignore patterns, matched against directory paths relative to the project root.
+
+    All patterns are compiled into one regex whose alternatives run from the last
+    pattern to the first, so a single match call finds the pattern that decides,
+    as gitignore's "last match wins" does.
+    """
+
+    def __init__(self, lines: List[str]):
+        patterns = [p for p in (compile_pattern(line) for line in lines) if p]
+        self.patterns = patterns
+        alternatives = [
+            f"(?P<{'n' if negate else 'i'}{i}>{regex})" for i, (regex, negate) in reversed(list(enumerate(patterns)))
+        ]
+        self._regex = re.compile("|".join(alternatives)) if alternatives else None
+
+    def __bool__(self) -> bool:
+        return self._regex is not None
+
+    def match(self, rel_path: str) -> bool:
+        """True if the directory is ignored by its own path (callers prune, so parents are never reached)."""
+        if self._regex is None:
+            return False
+        m = self._regex.fullmatch(rel_path)
+        return m is not None and m.lastgroup[0] == "i"
+
+    def match_any(self, rel_path: str) -> bool:
+        """True if the directory or any directory above it is ignored."""
+        parts = rel_path.split("/")
+        return any(self.match("/".join(parts[:i])) for i in range(1, len(parts) + 1))
+
+
+def load_ignore(project: Path) -> Optional[IgnoreSpec]:
+    """The project's .agentspecignore, compiled once and reused until the file changes; None without one."""
+    path = os.path.join(project, IGNORE_FILE)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (st.st_mtime_ns, st.st_size)
+    hit = _cache.get(path)
+    if hit and hit[0] == key:
+        return hit[1]
+    with open(path, encoding="utf-8") as f:
+        spec = IgnoreSpec(f.readlines())
+    spec = spec if spec else None
+    _cache[path] = (key, spec)
+    return spec
@@ -0,0 +1,155 @@
+import json
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from agentspec_cli.catalog import KINDS, Resolver, split_ref
+
+
+class InputSpec:
+    """An agent's `inputs` declaration compiled into sets and a defaults table."""
+
+    __slots__ = ("names", "required", "defaults", "known", "defaulted")
+
+    def __init__(self, names: Tuple[str, ...], required: frozenset, defaults: Dict[str, Any]):
+        self.names = names
+        self.required = required
+        self.defaults = defaults
+        self.known = frozenset(names)
+        self.defaulted = frozenset(defaults)
+
+    def check(self, record: Dict[str, Any]) -> Tuple[set, set, set]:
+        """(missing required, unknown, defaulted) field names for one payload."""
+        keys = record.keys()
+        defaulted = self.defaulted - keys
+        # A required input with a default is filled in, as `apply` does for render.
+        missing = self.required - keys - defaulted
+        if self.required:
+            missing |= {name for name in self.required & keys if record[name] is None}
+        return missing, keys - self.known, defaulted
+
+    def apply(self, record: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+        """Fill defaults into `record`; returns (values, missing required names)."""
+        values = dict(self.defaults)
+        values.update(record)
+        missing = [name for name in self.names if name in self.required and values.get(name) is None]
+        return values, missing
+
+
+def compile_inputs(data: Dict[str, Any]) -> InputSpec:
+    names = []
+    required = set()
+    defaults = {}
+    for item in data.get("inputs") or []:
+        if not isinstance(item, dict) or not item.get("name"):
+            continue
+        name = str(item["name"])
+        names.append(name)
+        if item.get("required"):
+            required.add(name)
+        if item.get("default") is not None:
+            defaults[name] = item["default"]
+    return InputSpec(tuple(names), frozenset(required), defaults)
+
+
+def as_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if value is None:
+        return ""
+    return json.dumps(value) if isinstance(value, (dict, list)) else str(value)
+
+
+def parse_record(line: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return None, f"invalid JSON: {e}"
+    if not isinstance(record, dict):
+        return None, "expected a JSON object"
+    return record, None
+
+
+def load_spec(project: Path, name: str, kind: str = "agents") -> InputSpec:
+    project = Path(project)
+    if kind not in KINDS or not (project / kind / name).is_dir():
+        raise ValueError(f"no {kind[:-1]} named '{name}'")
+    data, error = Resolver(project).resolve(kind, name)
+    if error or not isinstance(data, dict):
+        raise ValueError(f"{kind}/{name}: {error or 'expected a mapping at the top level'}")
+    return compile_inputs(data)
+
+
+def _lookup_spec(project: Path, name: str) -> InputSpec:
+    # "kind/name", or a bare name looked up among agents first, then skills.
+    kind, base = split_ref(name, "")
+    if kind:
+        return load_spec(project, base, kind)
+    for kind in KINDS:
+        if (Path(project) / kind / name).is_dir():
+            return load_spec(project, name, kind)
+    raise ValueError(f"no agent or skill named '{name}'")
+
+
+def _new_stats() -> Dict[str, Any]:
+    return {"records": 0, "invalid": 0, "missing": Counter(), "unknown": Counter(), "defaulted": Counter()}
+
+
+def audit(lines: Iterable[str], project: Path, agent: Optional[str] = None) -> Dict[str, Any]:
+    """Check a JSONL payload log against compiled input specs.
+
+    Each line is a payload for `agent`, or, without `agent`, an object with
+    "agent" and "inputs" keys; either name may also be a skill. Specs are compiled once per agent on first use.
+    """
+    specs: Dict[str, Any] = {}
+    stats: Dict[str, Dict[str, Any]] = {}
+    errors: Counter = Counter()
+    records = 0
+    start = time.perf_counter()
+    for line in lines:
+        if not line.strip():
+            continue
+        records += 1
+        record, error = parse_record(line)
+        if error:
+            errors[error.split(":")[0]] += 1
+            continue
+        name, payload = agent, record
+        if agent is None:
+            name, payload = record.get("agent"), record.get("inputs")
+            if not isinstance(name, str) or not isinstance(payload, dict):
+                errors["expected 'agent' and 'inputs' keys"] += 1
+                continue
+        spec = specs.get(name)
+        if spec is None:
+            try:
+                spec = specs[name] = _lookup_spec(project, name)
+            except ValueError as e:
+                spec = specs[name] = str(e)
+        if isinstance(spec, str):
+            errors[spec] += 1
+            continue
+        missing, unknown, defaulted = spec.check(payload)
+        s = stats.get(name)
+        if s is None:
+            s = stats[name] = _new_stats()
+        s["records"] += 1
+        if missing:
+            s["invalid"] += 1
+            s["missing"].update(missing)
+        if unknown:
+            s["unknown"].update(unknown)
+        if defaulted:
+            s["defaulted"].update(defaulted)
+    elapsed = time.perf_counter() - start
+    return {
+        "records": records,
+        "seconds": elapsed,
+        "records_per_second": records / elapsed if elapsed > 0 else 0.0,
+        "errors": dict(errors),
+        "agents": {
+            name: {**s, "missing": dict(s["missing"]), "unknown": dict(s["unknown"]), "defaulted": dict(s["defaulted"])}
+            for name, s in sorted(stats.items())
+        },
+    }
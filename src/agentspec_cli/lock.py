@@ -0,0 +1,113 @@
+import hashlib
+import json
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from agentspec_cli import storage
+from agentspec_cli.catalog import KINDS, parse_header, scan_config_names
+
+LOCK_NAME = "agentspec.lock"
+LOCK_VERSION = 1
+
+
+def default_workers() -> int:
+    return min(32, (os.cpu_count() or 1) * 2)
+
+
+def lock_path(project: Path) -> Path:
+    return Path(project) / LOCK_NAME
+
+
+def iter_config_files(project: Path) -> Iterator[Tuple[str, str, str]]:
+    """Yield (config, relative file path, absolute path) for every file of every config."""
+    for kind in KINDS:
+        for name in sorted(scan_config_names(project, kind)):
+            config = f"{kind}/{name}"
+            config_dir = os.path.join(project, kind, name)
+            for root, dirs, files in os.walk(config_dir):
+                dirs.sort()
+                for file_name in sorted(files):
+                    path = os.path.join(root, file_name)
+                    yield config, os.path.relpath(path, project).replace(os.sep, "/"), path
+
+
+def hash_file(path: str) -> Tuple[int, str]:
+    # hashlib releases the GIL on large buffers, so mmap'd files hash in parallel
+    # across threads without copying their contents into Python bytes.
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return 0, hashlib.sha256().hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            return size, hashlib.sha256(m).hexdigest()
+
+
+def _config_version(project: Path, config: str) -> Optional[str]:
+    kind = config.split("/", 1)[0]
+    try:
+        with open(os.path.join(project, config, KINDS[kind])) as f:
+            data, error = parse_header(f.read(), kind)
+    except OSError:
+        return None
+    if error or not isinstance(data, dict) or data.get("version") is None:
+        return None
+    return str(data["version"])
+
+
+def build_lock(project: Path, workers: Optional[int] = None) -> Dict[str, Any]:
+    entries = list(iter_config_files(project))
+    with ThreadPoolExecutor(max_workers=workers or default_workers()) as pool:
+        hashes = pool.map(hash_file, [path for _, _, path in entries])
+        configs: Dict[str, Dict[str, Any]] = {}
+        for (config, rel, _), (size, sha) in zip(entries, hashes):
+            if config not in configs:
+                configs[config] = {"version": _config_version(project, config), "files": {}}
+            configs[config]["files"][rel] = {"sha256": sha, "size": size}
+    return {"lock_version": LOCK_VERSION, "configs": configs}
+
+
+def write_lock(path: Path, lock: Dict[str, Any]) -> None:
+    storage.atomic_write(path, (json.dumps(lock, indent=2, sort_keys=True) + "\n").encode())
+
+
+def read_lock(path: Path) -> Dict[str, Any]:
+    try:
+        lock = json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        raise ValueError(f"{path} not found; run 'agentspec lock' first")
+    except ValueError as e:
+        raise ValueError(f"{path} is not valid JSON: {e}")
+    if not isinstance(lock, dict) or lock.get("lock_version") != LOCK_VERSION:
+        raise ValueError(f"{path} has an unsupported lock format")
+    return lock
+
+
+def _check(path: str, size: int, sha: str) -> Optional[str]:
+    try:
+        # A size mismatch already proves the file changed, so it is never hashed.
+        if os.stat(path).st_size != size:
+            return "size mismatch"
+        actual = hash_file(path)[1]
+    except FileNotFoundError:
+        return "missing"
+    except OSError as e:
+        return f"unreadable: {e}"
+    return None if actual == sha else "hash mismatch"
+
+
+def verify(project: Path, lock: Dict[str, Any], workers: Optional[int] = None) -> Tuple[int, List[Tuple[str, str]]]:
+    """Re-hash every locked file; returns (files checked, [(path, problem)])."""
+    expected = [
+        (rel, meta["size"], meta["sha256"])
+        for config in lock["configs"].values()
+        for rel, meta in config["files"].items()
+    ]
+    with ThreadPoolExecutor(max_workers=workers or default_workers()) as pool:
+        results = pool.map(lambda e: _check(os.path.join(project, e[0]), e[1], e[2]), expected)
+        problems = [(rel, problem) for (rel, _, _), problem in zip(expected, results) if problem]
+    locked = {rel for rel, _, _ in expected}
+    problems.extend((rel, "not in lockfile") for _, rel, _ in iter_config_files(project) if rel not in locked)
+    return len(expected), sorted(problems)
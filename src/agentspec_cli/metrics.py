@@ -0,0 +1,224 @@
+import re
+import time
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from agentspec_cli import storage
+from agentspec_cli.catalog import (
+    KINDS,
+    STREAM_RESOLVER_MEMO,
+    Resolver,
+    config_name,
+    iter_config_dirs,
+    prompt_bytes,
+    read_configs,
+    validation_error,
+)
+
+PREFIX = "agentspec"
+PROMPT_BUCKETS = (256, 1024, 4096, 16384, 65536)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_SAMPLE_RE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})?\s+(\S+)$")
+_LABEL_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _unescape(value: str) -> str:
+    return re.sub(r"\\(.)", lambda m: "\n" if m.group(1) == "n" else m.group(1), value)
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Family:
+    """One OpenMetrics metric family: its type, help text and samples."""
+
+    def __init__(self, name: str, kind: str, help_text: str):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.samples: Dict[Tuple[str, Labels], float] = {}
+
+    def add(self, value: float, suffix: str = "", **labels: str) -> None:
+        key = (suffix, tuple(sorted(labels.items())))
+        self.samples[key] = self.samples.get(key, 0.0) + value
+
+    def set(self, value: float, suffix: str = "", **labels: str) -> None:
+        self.samples[(suffix, tuple(sorted(labels.items())))] = value
+
+    def lines(self) -> Iterator[str]:
+        yield f"# TYPE {self.name} {self.kind}"
+        yield f"# HELP {self.name} {self.help}"
+        for (suffix, labels), value in sorted(self.samples.items(), key=_sample_order):
+            yield f"{self.name}{suffix}{_labels(labels)} {_number(value)}"
+
+
+def _sample_order(item):
+    (suffix, labels), _ = item
+    # Keep histogram buckets in ascending `le` order, with +Inf last.
+    le = dict(labels).get("le")
+    bound = float("inf") if le == "+Inf" else float(le) if le is not None else 0.0
+    return tuple(kv for kv in labels if kv[0] != "le"), suffix, bound
+
+
+def render(families: List[Family]) -> str:
+    lines = [line for family in families for line in family.lines()]
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path: Path, text: str) -> None:
+    # The textfile collector may read at any moment, so never expose a partial file.
+    storage.atomic_write(Path(path), text.encode())
+
+
+def catalog_families(project: Path, backend: str = "serial") -> List[Family]:
+    """Catalog health gauges, aggregated in one streaming pass over every config."""
+    configs = Family(f"{PREFIX}_configs", "gauge", "Number of agent and skill configurations.")
+    invalid = Family(f"{PREFIX}_configs_invalid", "gauge", "Configurations that fail validation.")
+    prompt = Family(f"{PREFIX}_prompt_bytes", "histogram", "Size of system_prompt plus prompt.md, in bytes.")
+    largest = Family(f"{PREFIX}_prompt_bytes_max", "gauge", "Largest prompt in the catalog, in bytes.")
+
+    resolver = Resolver(project, max_memo=STREAM_RESOLVER_MEMO)
+    for kind in KINDS:
+        configs.set(0, kind=kind)
+        invalid.set(0, kind=kind)
+        largest.set(0, kind=kind)
+        for le in (*PROMPT_BUCKETS, "+Inf"):
+            prompt.set(0, "_bucket", kind=kind, le=str(le))
+        prompt.set(0, "_sum", kind=kind)
+        prompt.set(0, "_count", kind=kind)
+
+        items = ((kind, d) for d in iter_config_dirs(project, kind))
+        with closing(read_configs(items, backend)) as results:
+            for _, config_dir, data, error in results:
+                # A directory missing its YAML counts as a config that fails validation, as `validate` reports it.
+                data, error = resolver.resolve(kind, config_name(project, kind, config_dir), data, error)
+                configs.add(1, kind=kind)
+                if validation_error(data, error):
+                    invalid.add(1, kind=kind)
+                if not isinstance(data, dict):
+                    continue
+                size = prompt_bytes(config_dir, data)
+                for le in PROMPT_BUCKETS:
+                    if size <= le:
+                        prompt.add(1, "_bucket", kind=kind, le=str(le))
+                prompt.add(1, "_bucket", kind=kind, le="+Inf")
+                prompt.add(size, "_sum", kind=kind)
+                prompt.add(1, "_count", kind=kind)
+                if size > largest.samples[("", (("kind", kind),))]:
+                    largest.set(size, kind=kind)
+    return [configs, invalid, prompt, largest]
+
+
+class Recorder:
+    """Phase durations and counters for one CLI invocation, merged into a textfile on exit."""
+
+    def __init__(self, command: str):
+        self.command = command
+        self.phases: Dict[str, float] = {}
+        self.counters: Dict[str, float] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def count(self, name: str, value: float = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0.0) + value
+
+    def families(self, previous: Dict[Tuple[str, Labels], float]) -> List[Family]:
+        runs = Family(f"{PREFIX}_command_runs", "counter", "CLI invocations.")
+        durations = Family(f"{PREFIX}_phase_duration_seconds", "summary", "Time spent in each command phase.")
+        events = Family(f"{PREFIX}_events", "counter", "Counters reported by CLI commands.")
+        families = [runs, durations, events]
+
+        # Carry the accumulated totals of earlier runs forward.
+        for (name, labels), value in previous.items():
+            for family in families:
+                if name.startswith(family.name):
+                    suffix = name[len(family.name):]
+                    family.add(value, suffix, **dict(labels))
+                    break
+
+        runs.add(1, "_total", command=self.command)
+        for phase, seconds in self.phases.items():
+            durations.add(seconds, "_sum", command=self.command, phase=phase)
+            durations.add(1, "_count", command=self.command, phase=phase)
+        for name, value in self.counters.items():
+            events.add(value, "_total", command=self.command, event=name)
+        return families
+
+    def flush(self, path: Path) -> None:
+        # Concurrent commands add to the same totals, so merge under the file's lock.
+        def merge(data: Optional[bytes]) -> bytes:
+            previous = parse_samples(data.decode()) if data else {}
+            return render(self.families(previous)).encode()
+
+        storage.update(Path(path), merge)
+
+
+def parse_samples(text: str) -> Dict[Tuple[str, Labels], float]:
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        match = _SAMPLE_RE.match(line)
+        if not match:
+            continue
+        name, labels, value = match.groups()
+        parsed = tuple(sorted((k, _unescape(v)) for k, v in _LABEL_RE.findall(labels or "")))
+        try:
+            samples[(name, parsed)] = float(value)
+        except ValueError:
+            continue
+    return samples
+
+
+_current: Optional[Recorder] = None
+
+
+def start(command: str) -> Recorder:
+    global _current
+    _current = Recorder(command)
+    return _current
+
+
+def stop() -> Optional[Recorder]:
+    global _current
+    recorder, _current = _current, None
+    return recorder
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a phase of the running command; a no-op unless metrics are being recorded."""
+    if _current is None:
+        yield
+        return
+    with _current.phase(name):
+        yield
+
+
+def count(name: str, value: float = 1) -> None:
+    if _current is not None:
+        _current.count(name, value)
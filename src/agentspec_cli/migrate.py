@@ -0,0 +1,278 @@
+import difflib
+import importlib.util
+import itertools
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+import yaml
+
+from agentspec_cli import storage
+from agentspec_cli.catalog import KINDS, config_name, dump_yaml, iter_config_dirs
+
+CHUNK_SIZE = 200
+# Catalogs with more configs than this are migrated on a process pool unless --jobs is given.
+POOL_THRESHOLD = 1_000
+
+_KEY_RE = re.compile(r"^([A-Za-z_][\w-]*)[ \t]*:(?=\s|$)")
+_ITEM_RE = re.compile(r"^([ \t]*-[ \t]+)(['\"]?)(.*?)\2([ \t]*(?:#.*)?)$")
+
+
+def dump_entry(key: str, value: Any) -> str:
+    return dump_yaml({key: value})
+
+
+def _is_boundary(line: str) -> bool:
+    # Indentless list items ("- x" at column 0) still belong to the key above them.
+    return bool(line) and line[0] not in " \t\r\n#-"
+
+
+class Document:
+    """A config file edited as text, so comments, key order and layout survive.
+
+    Edits address top-level keys. A key's block runs from its line up to the
+    next top-level key, minus trailing blank and comment lines, which belong
+    to whatever follows.
+    """
+
+    def __init__(self, text: str, kind: str = "agents", name: str = ""):
+        self.kind = kind
+        self.name = name
+        self.lines = text.splitlines(keepends=True)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.lines)
+
+    def data(self) -> Any:
+        return yaml.safe_load(self.text)
+
+    def _block(self, key: str) -> Optional[Tuple[int, int]]:
+        for start, line in enumerate(self.lines):
+            match = _KEY_RE.match(line)
+            if not match or match.group(1) != key:
+                continue
+            end = next((i for i in range(start + 1, len(self.lines)) if _is_boundary(self.lines[i])), len(self.lines))
+            while end > start + 1 and self.lines[end - 1].lstrip(" \t").startswith(("#", "\n", "\r")):
+                end -= 1
+            return start, end
+        return None
+
+    def blocks(self) -> List[Tuple[str, int, int]]:
+        """(key, start, end) of every top-level key's block, in file order."""
+        starts = [(i, m.group(1)) for i, m in ((i, _KEY_RE.match(line)) for i, line in enumerate(self.lines)) if m]
+        blocks = []
+        for start, key in starts:
+            end = next((i for i in range(start + 1, len(self.lines)) if _is_boundary(self.lines[i])), len(self.lines))
+            while end > start + 1 and self.lines[end - 1].lstrip(" \t").startswith(("#", "\n", "\r")):
+                end -= 1
+            blocks.append((key, start, end))
+        return blocks
+
+    def has(self, key: str) -> bool:
+        return self._block(key) is not None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        block = self._block(key)
+        if block is None:
+            return default
+        parsed = yaml.safe_load("".join(self.lines[block[0]:block[1]]))
+        return parsed.get(key, default) if isinstance(parsed, dict) else default
+
+    def set(self, key: str, value: Any) -> None:
+        entry = dump_entry(key, value).splitlines(keepends=True)
+        block = self._block(key)
+        if block is None:
+            if self.lines and not self.lines[-1].endswith("\n"):
+                self.lines[-1] += "\n"
+            self.lines.extend(entry)
+        else:
+            self.lines[block[0]:block[1]] = entry
+
+    def setdefault(self, key: str, value: Any) -> None:
+        if not self.has(key):
+            self.set(key, value)
+
+    def rename(self, old: str, new: str) -> None:
+        block = self._block(old)
+        if block is None or self.has(new):
+            return
+        line = self.lines[block[0]]
+        self.lines[block[0]] = new + line[_KEY_RE.match(line).end(1):]
+
+    def remove(self, key: str) -> None:
+        block = self._block(key)
+        if block is not None:
+            del self.lines[block[0]:block[1]]
+
+    def replace(self, key: str, old: Any, new: Any) -> None:
+        """Replace the scalar `old` with `new` as the value of `key` or as one of its list items."""
+        value = self.get(key)
+        if value == old:
+            self.set(key, new)
+            return
+        if not isinstance(value, list) or old not in value:
+            return
+        start, end = self._block(key)
+        item = dump_entry("x", new)[len("x: "):].rstrip("\n")
+        for i in range(start + 1, end):
+            body = self.lines[i].rstrip("\r\n")
+            match = _ITEM_RE.match(body)
+            if match and _load_scalar(match.group(2) + match.group(3) + match.group(2)) == old:
+                self.lines[i] = match.group(1) + item + match.group(4) + self.lines[i][len(body):]
+        if old in (self.get(key) or []):
+            # Flow-style lists have no item lines to edit, so rewrite the whole value.
+            self.set(key, [new if v == old else v for v in value])
+
+
+def _load_scalar(text: str) -> Any:
+    try:
+        return yaml.safe_load(text)
+    except yaml.YAMLError:
+        return None
+
+
+OPERATIONS = {
+    "set": ("key", "value"),
+    "set_default": ("key", "value"),
+    "rename": ("from", "to"),
+    "remove": ("key",),
+    "replace": ("key", "from", "to"),
+}
+
+
+def _declarative_step(step: Any) -> Callable[[Document], None]:
+    if not isinstance(step, dict) or len(step) != 1:
+        raise ValueError(f"each step must be a mapping with one operation, got {step!r}")
+    (op, args), = step.items()
+    if op not in OPERATIONS:
+        raise ValueError(f"unknown operation '{op}' (expected one of: {', '.join(OPERATIONS)})")
+    if op == "remove" and isinstance(args, str):
+        args = {"key": args}
+    if not isinstance(args, dict) or set(args) != set(OPERATIONS[op]):
+        raise ValueError(f"'{op}' takes: {', '.join(OPERATIONS[op])}")
+    if op == "set":
+        return lambda doc: doc.set(args["key"], args["value"])
+    if op == "set_default":
+        return lambda doc: doc.setdefault(args["key"], args["value"])
+    if op == "rename":
+        return lambda doc: doc.rename(args["from"], args["to"])
+    if op == "remove":
+        return lambda doc: doc.remove(args["key"])
+    return lambda doc: doc.replace(args["key"], args["from"], args["to"])
+
+
+class Migration:
+    """An ordered list of edits applied to every config of the selected kinds."""
+
+    def __init__(self, path: Path, steps: List[Callable[[Document], None]], kinds: Iterable[str]):
+        self.path = Path(path)
+        self.steps = steps
+        self.kinds = list(kinds)
+
+    @classmethod
+    def load(cls, path: Path) -> "Migration":
+        """Load a declarative .yaml migration, or a .py module defining `migrate(doc)`."""
+        path = Path(path)
+        if path.suffix == ".py":
+            spec = importlib.util.spec_from_file_location(f"agentspec_migration_{path.stem}", path)
+            module = importlib.util.module_from_spec(spec)
+            try:
+                spec.loader.exec_module(module)
+            except OSError as e:
+                raise ValueError(f"cannot read {path}: {e.strerror}")
+            except Exception as e:
+                # Syntax errors and anything the module raises on import are the migration's fault, not ours.
+                raise ValueError(f"{path}: {type(e).__name__}: {e}")
+            if not callable(getattr(module, "migrate", None)):
+                raise ValueError(f"{path} does not define migrate(doc)")
+            return cls(path, [module.migrate], getattr(module, "KINDS", KINDS))
+        try:
+            data = yaml.safe_load(path.read_text())
+        except OSError as e:
+            raise ValueError(f"cannot read {path}: {e.strerror}")
+        except yaml.YAMLError as e:
+            raise ValueError(f"{path}: YAML parse error: {e}")
+        if not isinstance(data, dict) or not isinstance(data.get("steps"), list):
+            raise ValueError(f"{path}: expected a mapping with a 'steps' list")
+        kinds = data.get("kinds") or list(KINDS)
+        unknown = [k for k in kinds if k not in KINDS]
+        if unknown:
+            raise ValueError(f"{path}: unknown kinds: {', '.join(map(str, unknown))}")
+        return cls(path, [_declarative_step(s) for s in data["steps"]], kinds)
+
+    def apply(self, text: str, kind: str, name: str) -> str:
+        doc = Document(text, kind, name)
+        for step in self.steps:
+            step(doc)
+        return doc.text
+
+
+# (relative path, original text, migrated text or None if unchanged, error)
+Result = Tuple[str, str, Optional[str], Optional[str]]
+
+
+def _migrate_file(migration: Migration, project: Path, kind: str, config_dir: Path) -> Optional[Result]:
+    path = config_dir / KINDS[kind]
+    rel = path.relative_to(project).as_posix()
+    try:
+        text = path.read_text()
+    except FileNotFoundError:
+        return None
+    try:
+        new = migration.apply(text, kind, config_name(project, kind, config_dir))
+        # Never write a file that no longer parses.
+        yaml.safe_load(new)
+    except Exception as e:
+        return rel, text, None, f"{type(e).__name__}: {e}"
+    return rel, text, (new if new != text else None), None
+
+
+def _migrate_chunk(project: Path, chunk: List[Tuple[str, Path]]) -> List[Result]:
+    results = (_migrate_file(_worker, project, kind, d) for kind, d in chunk)
+    return [r for r in results if r is not None]
+
+
+_worker: Optional[Migration] = None
+
+
+def _init_worker(path: Path) -> None:
+    global _worker
+    # Python migrations are re-imported in each worker instead of being pickled.
+    _worker = Migration.load(path)
+
+
+def run(migration: Migration, project: Path, jobs: Optional[int] = None) -> Iterator[Result]:
+    """Migrate every config, yielding a result per file in catalog order."""
+    project = Path(project)
+    items = [(kind, d) for kind in migration.kinds for d in iter_config_dirs(project, kind)]
+    if jobs is None:
+        jobs = (os.cpu_count() or 1) if len(items) > POOL_THRESHOLD else 1
+    if jobs <= 1:
+        global _worker
+        _worker = migration
+        yield from _migrate_chunk(project, items)
+        return
+    chunks = [items[i:i + CHUNK_SIZE] for i in range(0, len(items), CHUNK_SIZE)]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(migration.path,)) as pool:
+        for results in pool.map(_migrate_chunk, itertools.repeat(project), chunks):
+            yield from results
+
+
+def line_changes(old: str, new: str) -> Tuple[int, int]:
+    added = removed = 0
+    for line in difflib.unified_diff(old.splitlines(), new.splitlines(), lineterm="", n=0):
+        if line.startswith("+") and not line.startswith("+++"):
+            added += 1
+        elif line.startswith("-") and not line.startswith("---"):
+            removed += 1
+    return added, removed
+
+
+def write(project: Path, changed: List[Tuple[str, str]]) -> None:
+    """Write all migrated files in one journaled transaction."""
+    with storage.transaction(project) as txn:
+        for rel, text in changed:
+            txn.write(rel, text.encode())
@@ -0,0 +1,52 @@
+from typing import List, Optional, Tuple, Union
+
+from rich.console import Console, Group
+from rich.text import Text
+
+Span = Tuple[str, Optional[str]]
+
+FLUSH_EVERY = 1000
+
+
+class Output:
+    """Row-oriented writer for list-style command output.
+
+    On a terminal, rows are collected as ``Text`` objects (no markup parsing) and
+    rendered as one Rich ``Group``. When stdout is not a terminal, or ``plain`` is
+    set, rows are pre-formatted strings written through a single buffered write.
+    Either way, rows are flushed every ``FLUSH_EVERY`` lines so streaming output
+    stays bounded.
+    """
+
+    def __init__(self, console: Console, plain: Optional[bool] = None):
+        self.console = console
+        self.plain = (not console.is_terminal) if plain is None else plain
+        self._rows: List[Union[str, Text]] = []
+
+    def row(self, *spans: Union[str, Span]) -> None:
+        spans = [(s, None) if isinstance(s, str) else s for s in spans]
+        if self.plain:
+            self._rows.append("".join(text for text, _ in spans))
+        else:
+            self._rows.append(Text.assemble(*spans))
+        if len(self._rows) >= FLUSH_EVERY:
+            self.flush()
+
+    def blank(self) -> None:
+        self.row("")
+
+    def flush(self) -> None:
+        if not self._rows:
+            return
+        if self.plain:
+            self.console.file.write("\n".join(self._rows) + "\n")
+            self.console.file.flush()
+        else:
+            self.console.print(Group(*self._rows))
+        self._rows = []
+
+    def __enter__(self) -> "Output":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.flush()
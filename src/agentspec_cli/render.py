@@ -0,0 +1,116 @@
+import itertools
+import json
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from agentspec_cli.catalog import Resolver
+from agentspec_cli.inputs import InputSpec, as_text, load_spec, parse_record
+
+PLACEHOLDER_RE = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_-]*)\s*\}\}")
+CHUNK_SIZE = 5_000
+# Input files larger than this are rendered on a process pool unless --jobs is given.
+POOL_THRESHOLD_BYTES = 16 * 1024 * 1024
+
+
+def prompt_source(config_dir: Path, data: Dict[str, Any]) -> str:
+    """The prompt an agent is invoked with: its `system_prompt` followed by `prompt.md`."""
+    parts = [str(data.get("system_prompt") or "").strip()]
+    prompt_md = Path(config_dir) / "prompt.md"
+    if prompt_md.exists():
+        parts.append(prompt_md.read_text().strip())
+    return "\n\n".join(p for p in parts if p)
+
+
+class Template:
+    """A prompt split once into literal text and `{{input}}` slots.
+
+    Declared inputs that the text never references are appended as an
+    "Inputs" section, so agents without placeholders still render usefully.
+    """
+
+    __slots__ = ("literals", "fields", "extra")
+
+    def __init__(self, source: str, declared: Iterable[str] = ()):
+        pieces = PLACEHOLDER_RE.split(source)
+        self.literals = tuple(pieces[0::2])
+        self.fields = tuple(pieces[1::2])
+        referenced = set(self.fields)
+        self.extra = tuple(name for name in declared if name not in referenced)
+
+    def render(self, values: Dict[str, Any]) -> str:
+        out = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            out.append(as_text(values.get(field)))
+            out.append(literal)
+        given = [name for name in self.extra if values.get(name) is not None]
+        if given:
+            out.append("\n\n## Inputs\n")
+            for name in given:
+                out.append(f"\n- {name}: {as_text(values[name])}")
+        return "".join(out)
+
+
+class Renderer:
+    """Compiled template plus input validation for one agent; cheap to pickle to workers."""
+
+    def __init__(self, template: Template, spec: InputSpec):
+        self.template = template
+        self.spec = spec
+
+    @classmethod
+    def from_config(cls, project: Path, name: str, kind: str = "agents") -> "Renderer":
+        project = Path(project)
+        spec = load_spec(project, name, kind)
+        data, _ = Resolver(project).resolve(kind, name)
+        return cls(Template(prompt_source(project / kind / name, data), spec.names), spec)
+
+    def render(self, record: Dict[str, Any]) -> str:
+        values, missing = self.spec.apply(record)
+        if missing:
+            raise ValueError(f"missing required inputs: {', '.join(missing)}")
+        return self.template.render(values)
+
+    def render_line(self, index: int, line: str) -> Tuple[str, bool]:
+        """One JSONL output line for one JSONL input line, and whether it rendered."""
+        record, error = parse_record(line)
+        if record is not None:
+            try:
+                return json.dumps({"index": index, "prompt": self.render(record)}), True
+            except ValueError as e:
+                error = str(e)
+        return json.dumps({"index": index, "error": error}), False
+
+    def render_chunk(self, chunk: List[Tuple[int, str]]) -> List[Tuple[str, bool]]:
+        return [self.render_line(index, line) for index, line in chunk]
+
+    def render_lines(self, lines: Iterable[str], jobs: int = 1) -> Iterator[Tuple[str, bool]]:
+        """Render JSONL input lines in order; `jobs` > 1 fans chunks out to a process pool."""
+        numbered = ((i, line) for i, line in enumerate(lines) if line.strip())
+        if jobs <= 1:
+            for index, line in numbered:
+                yield self.render_line(index, line)
+            return
+        chunks = iter(lambda: list(itertools.islice(numbered, CHUNK_SIZE)), [])
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(self,)) as pool:
+            # Keep a bounded number of chunks in flight so huge inputs stream through.
+            pending = []
+            for chunk in chunks:
+                pending.append(pool.submit(_render_chunk, chunk))
+                if len(pending) >= jobs * 2:
+                    yield from pending.pop(0).result()
+            for future in pending:
+                yield from future.result()
+
+
+_worker: Optional[Renderer] = None
+
+
+def _init_worker(renderer: Renderer) -> None:
+    global _worker
+    _worker = renderer
+
+
+def _render_chunk(chunk: List[Tuple[int, str]]) -> List[Tuple[str, bool]]:
+    return _worker.render_chunk(chunk)
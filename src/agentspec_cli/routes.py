@@ -0,0 +1,253 @@
+import abc
+import json
+import mmap
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+from agentspec_cli import storage
+from agentspec_cli.catalog import FAST_LOADER, Resolver, iter_configs, load_config, validation_error
+
+ROUTES_FILE = "routes.yaml"
+TABLE_NAME = "routes.json"
+TABLE_VERSION = 1
+
+# Binary table layout, all little-endian:
+#   header   MAGIC, version u32, slot count u32 (a power of two), agent count u32,
+#            model count u32, then the byte offsets of the four sections below as u32
+#   models   per model: u16 length + UTF-8 name
+#   slots    per slot: u32 CRC-32 of the key (0 = empty), u32 key offset, u32 route offset
+#   keys     per agent: u16 length + UTF-8 name
+#   routes   per agent: u8 model count + u16 model index per model
+MAGIC = b"ASRT"
+_HEADER = struct.Struct("<4sIIII4I")
+_SLOT = struct.Struct("<III")
+_LEN = struct.Struct("<H")
+_IDS = [struct.Struct(f"<{n}H") for n in range(256)]
+# Slots are kept at most half full, so a probe ends within a few slots.
+LOAD_FACTOR = 0.5
+
+
+def _hash(key: bytes) -> int:
+    # CRC-32 is stable across processes (unlike hash()) and an order of magnitude
+    # cheaper than a cryptographic digest; 0 marks an empty slot, so it is never a key's hash.
+    return zlib.crc32(key) or 1
+
+
+def load_rules(project: Path) -> Dict[str, Any]:
+    """routes.yaml: an optional `default` model list and tag-based `overrides`."""
+    path = Path(project) / ROUTES_FILE
+    try:
+        rules = yaml.safe_load(path.read_text()) or {}
+    except FileNotFoundError:
+        return {"default": [], "overrides": []}
+    except yaml.YAMLError as e:
+        raise ValueError(f"{ROUTES_FILE}: YAML parse error: {e}")
+    if not isinstance(rules, dict):
+        raise ValueError(f"{ROUTES_FILE}: expected a mapping")
+    default = rules.get("default") or []
+    overrides = rules.get("overrides") or []
+    if not isinstance(default, list) or not isinstance(overrides, list):
+        raise ValueError(f"{ROUTES_FILE}: 'default' and 'overrides' must be lists")
+    for i, rule in enumerate(overrides):
+        if not isinstance(rule, dict) or not isinstance(rule.get("tag"), str):
+            raise ValueError(f"{ROUTES_FILE}: overrides[{i}] needs a 'tag'")
+        actions = [a for a in ("models", "prepend", "append", "exclude") if a in rule]
+        if not actions:
+            raise ValueError(f"{ROUTES_FILE}: overrides[{i}] needs one of models, prepend, append, exclude")
+        for action in actions:
+            if not isinstance(rule[action], list):
+                raise ValueError(f"{ROUTES_FILE}: overrides[{i}].{action} must be a list")
+    return {"default": [str(m) for m in default], "overrides": overrides}
+
+
+def route(data: Dict[str, Any], rules: Dict[str, Any]) -> List[str]:
+    """An agent's ordered models: its `model_preferences` (or the default), then each matching override in order."""
+    prefs = data.get("model_preferences")
+    models = [str(m) for m in prefs] if isinstance(prefs, list) and prefs else list(rules["default"])
+    tags = data.get("tags")
+    tags = {str(t) for t in tags} if isinstance(tags, list) else set()
+    for rule in rules["overrides"]:
+        if rule["tag"] not in tags:
+            continue
+        if "models" in rule:
+            models = [str(m) for m in rule["models"]]
+        models = [str(m) for m in rule.get("prepend", [])] + models + [str(m) for m in rule.get("append", [])]
+        excluded = {str(m) for m in rule.get("exclude", [])}
+        models = [m for m in models if m not in excluded]
+    return list(dict.fromkeys(models))
+
+
+def _fast_load(config_dir: Path, kind: str):
+    return load_config(config_dir, kind, FAST_LOADER)
+
+
+def build(project: Path) -> Tuple[Dict[str, List[str]], List[Tuple[str, str]]]:
+    """Routes for every valid agent, and (agent, error) for the agents left out."""
+    project = Path(project)
+    rules = load_rules(project)
+    resolver = Resolver(project, load=_fast_load)
+    routes: Dict[str, List[str]] = {}
+    skipped = []
+    for name, config_dir in iter_configs(project, "agents"):
+        data, error = resolver.resolve("agents", name, *_fast_load(config_dir, "agents"))
+        error = validation_error(data, error)
+        if error:
+            skipped.append((name, error))
+            continue
+        routes[name] = route(data, rules)
+    return routes, skipped
+
+
+def to_json(routes: Dict[str, List[str]]) -> bytes:
+    return (json.dumps({"version": TABLE_VERSION, "routes": routes}, separators=(",", ":"), sort_keys=True) + "\n").encode()
+
+
+def to_binary(routes: Dict[str, List[str]]) -> bytes:
+    model_ids: Dict[str, int] = {}
+    for models in routes.values():
+        for m in models:
+            model_ids.setdefault(m, len(model_ids))
+    if len(model_ids) > 0xFFFF:
+        raise ValueError("routes: more than 65535 distinct models")
+
+    n_slots = 1
+    while n_slots * LOAD_FACTOR < max(len(routes), 1):
+        n_slots *= 2
+
+    model_blob = bytearray()
+    for m in model_ids:
+        encoded = m.encode()
+        model_blob += _LEN.pack(len(encoded)) + encoded
+    keys = bytearray()
+    lists = bytearray()
+    slots = [(0, 0, 0)] * n_slots
+    for name, models in routes.items():
+        if len(models) > 0xFF:
+            raise ValueError(f"routes: agent '{name}' has more than 255 models")
+        encoded = name.encode()
+        h = _hash(encoded)
+        i = h & (n_slots - 1)
+        while slots[i][0]:
+            i = (i + 1) & (n_slots - 1)
+        slots[i] = (h, len(keys), len(lists))
+        keys += _LEN.pack(len(encoded)) + encoded
+        lists += bytes([len(models)]) + _IDS[len(models)].pack(*(model_ids[m] for m in models))
+
+    models_at = _HEADER.size
+    slots_at = models_at + len(model_blob)
+    keys_at = slots_at + n_slots * _SLOT.size
+    routes_at = keys_at + len(keys)
+    header = _HEADER.pack(MAGIC, TABLE_VERSION, n_slots, len(routes), len(model_ids), models_at, slots_at, keys_at, routes_at)
+    slot_blob = b"".join(_SLOT.pack(*s) for s in slots)
+    return header + bytes(model_blob) + slot_blob + bytes(keys) + bytes(lists)
+
+
+def write(path: Path, routes: Dict[str, List[str]]) -> None:
+    path = Path(path)
+    storage.atomic_write(path, to_binary(routes) if path.suffix == ".bin" else to_json(routes))
+
+
+class RouteTable(abc.ABC):
+    """Read-only `agent -> ordered models` lookups from a built table."""
+
+    @abc.abstractmethod
+    def get(self, agent: str) -> Optional[Tuple[str, ...]]:
+        """The agent's models in order, or None for an agent not in the table."""
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        """Number of agents in the table."""
+
+    @abc.abstractmethod
+    def __iter__(self) -> Iterator[str]:
+        """The agent names, in no particular order."""
+
+    def __getitem__(self, agent: str) -> Tuple[str, ...]:
+        models = self.get(agent)
+        if models is None:
+            raise KeyError(agent)
+        return models
+
+    def __contains__(self, agent: str) -> bool:
+        return self.get(agent) is not None
+
+    @staticmethod
+    def open(path: Path) -> "RouteTable":
+        """Open a routes.json, or memory-map a binary table (by its magic bytes)."""
+        path = Path(path)
+        with open(path, "rb") as f:
+            binary = f.read(len(MAGIC)) == MAGIC
+        return BinaryRouteTable(path) if binary else JSONRouteTable(path)
+
+
+class JSONRouteTable(RouteTable):
+    def __init__(self, path: Path):
+        data = json.loads(Path(path).read_text())
+        if not isinstance(data, dict) or data.get("version") != TABLE_VERSION:
+            raise ValueError(f"{path}: not a version {TABLE_VERSION} routes table")
+        # Interning the lists as tuples makes every lookup one dict access.
+        self._routes = {agent: tuple(models) for agent, models in data["routes"].items()}
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._routes)
+
+    def get(self, agent: str) -> Optional[Tuple[str, ...]]:
+        return self._routes.get(agent)
+
+
+class BinaryRouteTable(RouteTable):
+    """Memory-mapped open-addressing hash table; opening costs only the model list, not the agents."""
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._n_slots, self._n_agents, n_models, models_at, self._slots_at, self._keys_at, self._routes_at = (
+            _HEADER.unpack_from(self._buf, 0)
+        )
+        if magic != MAGIC or version != TABLE_VERSION:
+            raise ValueError(f"{path}: not a version {TABLE_VERSION} binary routes table")
+        self._models: List[str] = []
+        offset = models_at
+        for _ in range(n_models):
+            (length,) = _LEN.unpack_from(self._buf, offset)
+            self._models.append(self._buf[offset + 2:offset + 2 + length].decode())
+            offset += 2 + length
+
+    def close(self) -> None:
+        self._buf.close()
+
+    def __len__(self) -> int:
+        return self._n_agents
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._n_slots):
+            h, key_at, _ = _SLOT.unpack_from(self._buf, self._slots_at + i * _SLOT.size)
+            if h:
+                (length,) = _LEN.unpack_from(self._buf, self._keys_at + key_at)
+                start = self._keys_at + key_at + 2
+                yield self._buf[start:start + length].decode()
+
+    def get(self, agent: str) -> Optional[Tuple[str, ...]]:
+        key = agent.encode()
+        h = _hash(key)
+        mask = self._n_slots - 1
+        i = h & mask
+        buf = self._buf
+        while True:
+            slot_h, key_at, route_at = _SLOT.unpack_from(buf, self._slots_at + i * _SLOT.size)
+            if not slot_h:
+                return None
+            if slot_h == h:
+                start = self._keys_at + key_at + 2
+                if buf[start:start + len(key)] == key and _LEN.unpack_from(buf, start - 2)[0] == len(key):
+                    at = self._routes_at + route_at
+                    models = self._models
+                    return tuple(models[m] for m in _IDS[buf[at]].unpack_from(buf, at + 1))
+            i = (i + 1) & mask
@@ -0,0 +1,149 @@
+import math
+import re
+import sqlite3
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from agentspec_cli.catalog import KINDS, config_fingerprint, iter_configs, load_config
+
+INDEX_NAME = ".agentspec/search.db"
+
+# BM25 parameters and per-field term-frequency weights.
+K1 = 1.2
+B = 0.75
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "tags": 2.0,
+    "description": 2.0,
+    "system_prompt": 1.0,
+    "prompt.md": 1.0,
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    length REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc INTEGER NOT NULL REFERENCES docs(id) ON DELETE CASCADE,
+    tf REAL NOT NULL,
+    PRIMARY KEY (term, doc)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings(doc);
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def index_path(project: Path) -> Path:
+    return Path(project) / INDEX_NAME
+
+
+def connect(project: Path) -> sqlite3.Connection:
+    path = index_path(project)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # SQLite does its own locking; wait for a concurrent writer instead of failing.
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def field_texts(config_dir: Path, kind: str) -> Optional[Dict[str, str]]:
+    data, error = load_config(config_dir, kind)
+    if error or not isinstance(data, dict):
+        return None
+    tags = data.get("tags") or []
+    fields = {
+        "name": str(data.get("name", config_dir.name)),
+        "tags": " ".join(str(t) for t in tags) if isinstance(tags, list) else str(tags),
+        "description": str(data.get("description", "")),
+        "system_prompt": str(data.get("system_prompt", "")),
+    }
+    prompt_md = config_dir / "prompt.md"
+    fields["prompt.md"] = prompt_md.read_text() if prompt_md.exists() else ""
+    return fields
+
+
+def _weighted_terms(fields: Dict[str, str]) -> Counter:
+    terms = Counter()
+    for field, text in fields.items():
+        weight = FIELD_WEIGHTS[field]
+        for token in tokenize(text):
+            terms[token] += weight
+    return terms
+
+
+def refresh(conn: sqlite3.Connection, project: Path, rebuild: bool = False) -> Tuple[int, int]:
+    """Bring the index up to date; returns (reindexed, removed) config counts."""
+    project = Path(project)
+    stored = {path: (doc_id, fp) for doc_id, path, fp in conn.execute("SELECT id, path, fingerprint FROM docs")}
+    seen = set()
+    reindexed = 0
+    with conn:
+        for kind in KINDS:
+            for name, config_dir in iter_configs(project, kind):
+                rel = f"{kind}/{name}"
+                seen.add(rel)
+                fp = config_fingerprint(config_dir, kind)
+                old = stored.get(rel)
+                if old and old[1] == fp and not rebuild:
+                    continue
+                if old:
+                    conn.execute("DELETE FROM docs WHERE id = ?", (old[0],))
+                fields = field_texts(config_dir, kind)
+                if fields is None:
+                    continue
+                terms = _weighted_terms(fields)
+                cur = conn.execute(
+                    "INSERT INTO docs (path, kind, name, description, fingerprint, length) VALUES (?, ?, ?, ?, ?, ?)",
+                    (rel, kind, fields["name"], fields["description"], fp, sum(terms.values())),
+                )
+                conn.executemany(
+                    "INSERT INTO postings (term, doc, tf) VALUES (?, ?, ?)",
+                    ((term, cur.lastrowid, tf) for term, tf in terms.items()),
+                )
+                reindexed += 1
+        removed = [doc_id for path, (doc_id, _) in stored.items() if path not in seen]
+        conn.executemany("DELETE FROM docs WHERE id = ?", ((doc_id,) for doc_id in removed))
+    return reindexed, len(removed)
+
+
+def query(conn: sqlite3.Connection, text: str, limit: int = 10) -> List[Dict[str, Any]]:
+    terms = set(tokenize(text))
+    if not terms:
+        return []
+    n_docs, avg_len = conn.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+    if not n_docs:
+        return []
+    scores: Dict[int, float] = {}
+    for term in terms:
+        postings = conn.execute(
+            "SELECT p.doc, p.tf, d.length FROM postings p JOIN docs d ON d.id = p.doc WHERE p.term = ?", (term,)
+        ).fetchall()
+        if not postings:
+            continue
+        idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+        for doc_id, tf, length in postings:
+            norm = tf + K1 * (1 - B + B * length / avg_len)
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / norm
+    top = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    results = []
+    for doc_id, score in top:
+        path, kind, name, description = conn.execute(
+            "SELECT path, kind, name, description FROM docs WHERE id = ?", (doc_id,)
+        ).fetchone()
+        results.append({"path": path, "kind": kind, "name": name, "description": description, "score": score})
+    return results
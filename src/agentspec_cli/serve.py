@@ -0,0 +1,213 @@
+import inspect
+import json
+import os
+import socket
+import socketserver
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from agentspec_cli.catalog import KINDS, Catalog, Resolver, config_name, summarize, validation_error, yaml_missing
+
+SOCKET_NAME = ".agentspec/serve.sock"
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+def socket_path(project: Path) -> Path:
+    return Path(project) / SOCKET_NAME
+
+
+def supported() -> bool:
+    return hasattr(socket, "AF_UNIX")
+
+
+class CatalogService:
+    def __init__(self, project: Path):
+        self.project = Path(project)
+        self.catalog = Catalog(self.project)
+        self.methods = {
+            "list": self.list_configs,
+            "validate": self.validate,
+            "query": self.query,
+            "new-agent": self.new_agent,
+        }
+
+    def _resolver(self) -> Resolver:
+        return Resolver(self.project, self.catalog.load)
+
+    def list_configs(self) -> Dict[str, Any]:
+        resolver = self._resolver()
+        return {
+            kind: [
+                summarize(d, data, error, name=config_name(self.project, kind, d))
+                for d, data, error in self.catalog.configs(kind, resolver)
+            ]
+            for kind in KINDS
+        }
+
+    def validate(self) -> Dict[str, Any]:
+        resolver = self._resolver()
+        results = []
+        for kind in KINDS:
+            for d, data, error in self.catalog.configs(kind, resolver):
+                results.append({
+                    "kind": kind,
+                    "dir": config_name(self.project, kind, d),
+                    "has_yaml": not yaml_missing(error),
+                    "error": validation_error(data, error),
+                })
+        return {"results": results}
+
+    def query(self, kind: Optional[str] = None, name: Optional[str] = None, tag: Optional[str] = None):
+        if kind is not None and kind not in KINDS:
+            raise ValueError(f"unknown kind '{kind}'")
+        resolver = self._resolver()
+        matches = []
+        for k in [kind] if kind else KINDS:
+            for d, data, error in self.catalog.configs(k, resolver):
+                if not isinstance(data, dict):
+                    continue
+                dir_name = config_name(self.project, k, d)
+                if name is not None and data.get("name", dir_name) != name:
+                    continue
+                if tag is not None and tag not in (data.get("tags") or []):
+                    continue
+                matches.append({"kind": k, "dir": dir_name, "config": data})
+        return matches
+
+    def new_agent(
+        self,
+        name: str,
+        description: str,
+        author: str = "agentspec",
+        tags: Optional[list] = None,
+        extends: Optional[str] = None,
+    ):
+        from agentspec_cli.commands import create_agent, extends_error, to_kebab_case
+
+        # There is no one to confirm an overwrite over the socket, so an existing agent is refused.
+        if (self.project / "agents" / to_kebab_case(name)).exists():
+            raise ValueError(f"agent '{to_kebab_case(name)}' already exists")
+        error = extends_error(self.project, extends)
+        if error:
+            raise ValueError(error)
+        agent_dir = create_agent(self.project, name, description, author=author, tags=tags, extends=extends)
+        return {"path": str(agent_dir)}
+
+    def handle(self, request: Any) -> Optional[Dict[str, Any]]:
+        if not isinstance(request, dict) or request.get("jsonrpc") != "2.0" or "method" not in request:
+            return _error(None, INVALID_REQUEST, "Invalid Request")
+        req_id = request.get("id")
+        method = self.methods.get(request["method"])
+        if method is None:
+            return _error(req_id, METHOD_NOT_FOUND, f"Method not found: {request['method']}")
+        params = request.get("params") or {}
+        # Only a failure to bind is the caller's fault; a TypeError raised inside the method is a bug.
+        try:
+            signature = inspect.signature(method)
+            bound = signature.bind(*params) if isinstance(params, list) else signature.bind(**params)
+        except TypeError as e:
+            return _error(req_id, INVALID_PARAMS, str(e))
+        try:
+            result = method(*bound.args, **bound.kwargs)
+        except Exception as e:
+            return _error(req_id, INTERNAL_ERROR, str(e))
+        if "id" not in request:
+            return None
+        return {"jsonrpc": "2.0", "id": req_id, "result": result}
+
+
+def _error(req_id: Any, code: int, message: str) -> Dict[str, Any]:
+    return {"jsonrpc": "2.0", "id": req_id, "error": {"code": code, "message": message}}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError:
+                response = _error(None, PARSE_ERROR, "Parse error")
+            else:
+                with self.server.lock:
+                    response = self.server.service.handle(request)
+            if response is not None:
+                # YAML scalars such as dates have no JSON type; send them as their string form.
+                self.wfile.write(json.dumps(response, default=str).encode() + b"\n")
+                self.wfile.flush()
+
+
+class CatalogServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, project: Path, path: Optional[Path] = None):
+        self.service = CatalogService(project)
+        self.lock = threading.Lock()
+        self.path = Path(path) if path else socket_path(project)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            if _listening(self.path):
+                raise OSError(f"another daemon is already serving on {self.path}")
+            # Left behind by a daemon that did not shut down cleanly.
+            self.path.unlink()
+        super().__init__(str(self.path), _Handler)
+
+    def server_close(self):
+        super().server_close()
+        if self.path.exists():
+            self.path.unlink()
+
+
+def _listening(path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(1)
+        try:
+            sock.connect(str(path))
+        except OSError:
+            return False
+    return True
+
+
+class DaemonError(RuntimeError):
+    """The daemon answered with an error or with something that is not a JSON-RPC response."""
+
+
+def call(project: Path, method: str, params: Optional[Dict[str, Any]] = None, path: Optional[Path] = None) -> Any:
+    """Send one request to a running daemon; returns None when no daemon is listening.
+
+    Raises DaemonError when the daemon reports an error or its reply cannot be read.
+    """
+    if not supported() or os.environ.get("AGENTSPEC_NO_DAEMON"):
+        return None
+    sock_path = Path(path) if path else socket_path(project)
+    if not sock_path.exists():
+        return None
+    request = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params or {}}
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(5)
+            sock.connect(str(sock_path))
+            sock.sendall(json.dumps(request).encode() + b"\n")
+            with sock.makefile("rb") as f:
+                line = f.readline()
+    except OSError:
+        return None
+    if not line:
+        return None
+    try:
+        response = json.loads(line)
+    except ValueError:
+        raise DaemonError("malformed response from the daemon")
+    if not isinstance(response, dict) or not ("result" in response or "error" in response):
+        raise DaemonError("malformed response from the daemon")
+    if "error" in response:
+        error = response["error"]
+        raise DaemonError(error.get("message", "unknown error") if isinstance(error, dict) else str(error))
+    return response["result"]
@@ -0,0 +1,160 @@
+import hashlib
+import io
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from agentspec_cli import storage
+from agentspec_cli.catalog import KINDS, config_fingerprint, iter_configs
+from agentspec_cli.search import field_texts, tokenize
+
+CACHE_NAME = ".agentspec/similarity.npz"
+NEAR_MATCH_THRESHOLD = 0.5
+
+
+class SimilarityIndex:
+    """L2-normalised TF-IDF rows for every config, stored as CSR arrays."""
+
+    def __init__(self, docs, vocab, idf, indptr, indices, data, key=""):
+        self.docs: List[Dict[str, str]] = docs
+        self.vocab: Dict[str, int] = vocab
+        self.idf = idf
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.key = key
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def vector(self, text: str) -> np.ndarray:
+        q = np.zeros(len(self.vocab))
+        counts = Counter(t for t in tokenize(text) if t in self.vocab)
+        if counts:
+            ids = np.fromiter((self.vocab[t] for t in counts), dtype=np.int64, count=len(counts))
+            q[ids] = np.fromiter(counts.values(), dtype=np.float64, count=len(counts)) * self.idf[ids]
+            norm = np.linalg.norm(q)
+            if norm:
+                q /= norm
+        return q
+
+    def row(self, i: int) -> np.ndarray:
+        q = np.zeros(len(self.vocab))
+        start, end = self.indptr[i], self.indptr[i + 1]
+        q[self.indices[start:end]] = self.data[start:end]
+        return q
+
+    def scores(self, q: np.ndarray) -> np.ndarray:
+        # Sparse matrix x dense vector for every row at once: per-row sums of the
+        # products via a cumulative sum, which also handles empty rows.
+        products = np.concatenate(([0.0], np.cumsum(self.data * q[self.indices])))
+        return products[self.indptr[1:]] - products[self.indptr[:-1]]
+
+    def top_k(self, q: np.ndarray, k: int, exclude: Optional[int] = None) -> List[Dict[str, Any]]:
+        scores = self.scores(q)
+        if exclude is not None:
+            scores[exclude] = -1.0
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((top, -scores[top]))]
+        return [{**self.docs[i], "score": float(scores[i])} for i in top if scores[i] > 0]
+
+    def find(self, name: str) -> Optional[int]:
+        for i, doc in enumerate(self.docs):
+            if name in (doc["name"], doc["dir"], f"{doc['kind']}/{doc['dir']}"):
+                return i
+        return None
+
+
+def _catalog_key(project: Path) -> str:
+    h = hashlib.sha256()
+    for kind in KINDS:
+        for name, config_dir in iter_configs(project, kind):
+            h.update(f"{kind}/{name}={config_fingerprint(config_dir, kind)}\n".encode())
+    return h.hexdigest()
+
+
+def build(project: Path, key: str = "") -> SimilarityIndex:
+    docs = []
+    rows = []
+    for kind in KINDS:
+        for name, config_dir in iter_configs(project, kind):
+            fields = field_texts(config_dir, kind)
+            if fields is None:
+                continue
+            docs.append({"kind": kind, "dir": name, "name": fields["name"]})
+            rows.append(Counter(tokenize(" ".join(fields.values()))))
+
+    vocab: Dict[str, int] = {}
+    indptr = [0]
+    indices: List[int] = []
+    counts: List[float] = []
+    for row in rows:
+        for term, count in row.items():
+            indices.append(vocab.setdefault(term, len(vocab)))
+            counts.append(count)
+        indptr.append(len(indices))
+
+    indptr = np.asarray(indptr, dtype=np.int64)
+    indices = np.asarray(indices, dtype=np.int64)
+    df = np.bincount(indices, minlength=len(vocab))
+    idf = np.log((1 + len(docs)) / (1 + df)) + 1.0
+    data = np.asarray(counts, dtype=np.float64) * idf[indices]
+
+    row_ids = np.repeat(np.arange(len(docs)), np.diff(indptr))
+    sq = np.concatenate(([0.0], np.cumsum(data * data)))
+    norms = np.sqrt(sq[indptr[1:]] - sq[indptr[:-1]])
+    norms[norms == 0] = 1.0
+    data /= norms[row_ids]
+    return SimilarityIndex(docs, vocab, idf, indptr, indices, data, key=key)
+
+
+def dumps(index: SimilarityIndex) -> bytes:
+    terms = sorted(index.vocab, key=index.vocab.get)
+    buf = io.BytesIO()
+    np.savez(
+        buf,
+        meta=np.array(json.dumps({"key": index.key, "docs": index.docs, "vocab": terms})),
+        idf=index.idf,
+        indptr=index.indptr,
+        indices=index.indices.astype(np.int32),
+        data=index.data.astype(np.float32),
+    )
+    return buf.getvalue()
+
+
+def loads(data: bytes) -> Optional[SimilarityIndex]:
+    try:
+        with np.load(io.BytesIO(data)) as f:
+            meta = json.loads(str(f["meta"]))
+            return SimilarityIndex(
+                meta["docs"],
+                {t: i for i, t in enumerate(meta["vocab"])},
+                f["idf"],
+                f["indptr"],
+                f["indices"].astype(np.int64),
+                f["data"].astype(np.float64),
+                key=meta["key"],
+            )
+    except (OSError, ValueError, KeyError, EOFError):
+        return None
+
+
+def get_index(project: Path) -> SimilarityIndex:
+    project = Path(project)
+    key = _catalog_key(project)
+
+    def load_fresh(data: bytes) -> Optional[SimilarityIndex]:
+        index = loads(data)
+        return index if index is not None and index.key == key else None
+
+    def build_index():
+        index = build(project, key=key)
+        return index, dumps(index)
+
+    return storage.get_or_create(project / CACHE_NAME, load_fresh, build_index)
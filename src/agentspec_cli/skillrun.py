@@ -0,0 +1,134 @@
+import asyncio
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from agentspec_cli.backends import Backend
+from agentspec_cli.catalog import Resolver, step_dependencies
+from agentspec_cli.inputs import as_text, load_spec
+from agentspec_cli.render import prompt_source
+
+
+class SkillPlan:
+    """A skill's steps as a validated dependency graph, plus the skill's system prompt."""
+
+    def __init__(self, name: str, system: str, steps: List[Dict[str, Any]], deps: Dict[str, List[str]], spec):
+        self.name = name
+        self.system = system
+        self.steps = steps
+        self.deps = deps
+        self.spec = spec
+
+    @classmethod
+    def from_config(cls, project: Path, name: str) -> "SkillPlan":
+        project = Path(project)
+        spec = load_spec(project, name, "skills")
+        data, _ = Resolver(project).resolve("skills", name)
+        steps = data.get("steps") or []
+        deps, error = step_dependencies(steps)
+        if error:
+            raise ValueError(f"skills/{name}: {error}")
+        if not deps:
+            raise ValueError(f"skills/{name}: no steps to run")
+        return cls(name, prompt_source(project / "skills" / name, data), steps, deps, spec)
+
+
+def _messages(plan: SkillPlan, step: Dict[str, Any], inputs: Dict[str, Any], upstream: Dict[str, str]) -> List[Dict[str, str]]:
+    lines = [f"Step: {step['name']}"]
+    if step.get("description"):
+        lines.append(str(step["description"]))
+    if inputs:
+        lines.append("\nInputs:")
+        lines.extend(f"- {k}: {as_text(v)}" for k, v in inputs.items())
+    for name, output in upstream.items():
+        lines.append(f"\nOutput of {name}:\n{output}")
+    return [{"role": "system", "content": plan.system}, {"role": "user", "content": "\n".join(lines)}]
+
+
+async def _execute(plan: SkillPlan, backend: Backend, inputs: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    # Every step is a task that first awaits the tasks of its dependencies, so
+    # independent branches overlap; the backend semaphore caps in-flight calls.
+    limit = asyncio.Semaphore(backend.concurrency)
+    origin = time.perf_counter()
+    results: Dict[str, Dict[str, Any]] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run_step(step: Dict[str, Any]) -> None:
+        name = str(step["name"])
+        after = plan.deps[name]
+        await asyncio.gather(*(tasks[d] for d in after))
+        result = {"name": name, "depends_on": after, "output": None, "error": None}
+        results[name] = result
+        if any(results[d]["status"] != "ok" for d in after):
+            result.update(status="skipped", start=None, end=None, duration=0.0)
+            return
+        upstream = {d: results[d]["output"] for d in after}
+        async with limit:
+            start = time.perf_counter()
+            try:
+                result["output"] = await backend.complete(_messages(plan, step, inputs, upstream))
+                result["status"] = "ok"
+            except Exception as e:
+                result["status"] = "failed"
+                result["error"] = str(e)
+            end = time.perf_counter()
+        result.update(start=start - origin, end=end - origin, duration=end - start)
+
+    for step in plan.steps:
+        tasks[str(step["name"])] = asyncio.ensure_future(run_step(step))
+    await asyncio.gather(*tasks.values())
+    return {str(step["name"]): results[str(step["name"])] for step in plan.steps}
+
+
+def critical_path(results: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Walk back from the last step to finish, always through the dependency that finished last."""
+    ran = {name: r for name, r in results.items() if r["end"] is not None}
+    if not ran:
+        return []
+    name = max(ran, key=lambda n: ran[n]["end"])
+    path = [name]
+    while True:
+        before = [d for d in ran[name]["depends_on"] if d in ran]
+        if not before:
+            break
+        name = max(before, key=lambda n: ran[n]["end"])
+        path.append(name)
+    return path[::-1]
+
+
+def run(plan: SkillPlan, backend: Backend, inputs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    values, missing = plan.spec.apply(inputs or {})
+    if missing:
+        raise ValueError(f"missing required inputs: {', '.join(missing)}")
+    start = time.perf_counter()
+    steps = asyncio.run(_execute(plan, backend, values))
+    wall = time.perf_counter() - start
+    return {
+        "skill": plan.name,
+        "wall": wall,
+        "steps": steps,
+        "critical_path": critical_path(steps),
+    }
+
+
+def chrome_trace(report: Dict[str, Any]) -> Dict[str, Any]:
+    """The run as Trace Event Format JSON, viewable in chrome://tracing or Perfetto."""
+    events = []
+    lanes: List[float] = []
+    for r in sorted((r for r in report["steps"].values() if r["start"] is not None), key=lambda r: r["start"]):
+        # Reuse the first lane that is free again so concurrent steps stack visibly.
+        lane = next((i for i, free_at in enumerate(lanes) if free_at <= r["start"]), len(lanes))
+        if lane == len(lanes):
+            lanes.append(0.0)
+        lanes[lane] = r["end"]
+        events.append({
+            "name": r["name"],
+            "cat": r["status"],
+            "ph": "X",
+            "ts": r["start"] * 1e6,
+            "dur": r["duration"] * 1e6,
+            "pid": 1,
+            "tid": lane,
+            "args": {"depends_on": r["depends_on"], "critical": r["name"] in report["critical_path"]},
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
@@ -0,0 +1,390 @@
+import io
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from agentspec_cli import storage
+from agentspec_cli.catalog import (
+    FAST_LOADER,
+    KINDS,
+    Resolver,
+    config_fingerprint,
+    extends_target,
+    load_config,
+    prompt_bytes,
+    scan_config_names,
+    validation_error,
+)
+from agentspec_cli.metrics import PROMPT_BUCKETS
+
+CACHE_NAME = ".agentspec/stats.npz"
+# Bump when the extracted features change, so old caches are rebuilt.
+FEATURES_VERSION = 2
+PERCENTILES = (50, 90, 95, 99)
+KIND_NAMES = list(KINDS)
+
+# Per-config integer columns; each is one int64 array.
+COUNTS = ("prompt_bytes", "inputs", "required_inputs", "outputs", "tools", "steps")
+# Per-config string lists, each stored as CSR: an index pointer plus codes into a vocabulary.
+LISTS = ("tags", "models")
+
+
+def _as_list(value: Any) -> list:
+    return value if isinstance(value, list) else []
+
+
+def extract(config_dir: Path, data: Any, error: Optional[str]) -> Dict[str, Any]:
+    """The features of one resolved config, as plain Python values."""
+    valid = validation_error(data, error) is None
+    parsed = isinstance(data, dict)
+    data = data if parsed else {}
+    inputs = _as_list(data.get("inputs"))
+    return {
+        "parsed": parsed,
+        "valid": valid,
+        "prompt_bytes": prompt_bytes(config_dir, data) if parsed else 0,
+        "inputs": len(inputs),
+        "required_inputs": sum(1 for i in inputs if isinstance(i, dict) and i.get("required")),
+        "outputs": len(_as_list(data.get("outputs"))),
+        "tools": len(_as_list(data.get("tools"))),
+        "steps": len(_as_list(data.get("steps"))),
+        "author": str(data.get("author") or ""),
+        "tags": [str(t) for t in _as_list(data.get("tags"))],
+        "models": [str(m) for m in _as_list(data.get("model_preferences"))],
+    }
+
+
+def _gather(indptr: np.ndarray, codes: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Select CSR rows without a Python loop: offset every kept element by where its row moves to.
+    lengths = indptr[rows + 1] - indptr[rows]
+    new_ptr = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+    shift = np.repeat(indptr[rows] - new_ptr[:-1], lengths)
+    return new_ptr, codes[np.arange(new_ptr[-1], dtype=np.int64) + shift]
+
+
+def _compact(vocab: np.ndarray, codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Merge duplicate strings, then drop the ones no row refers to any more.
+    names, remap = np.unique(vocab, return_inverse=True)
+    used, codes = np.unique(remap.reshape(-1)[codes], return_inverse=True)
+    return names[used], codes.reshape(-1).astype(np.int32)
+
+
+class Features:
+    """Numeric features of every config as column arrays, one row per config."""
+
+    def __init__(self, keys, fingerprints, parents, kind, parsed, valid, counts, author, authors, lists):
+        self.keys: np.ndarray = keys
+        self.fingerprints: np.ndarray = fingerprints
+        self.parents: np.ndarray = parents
+        self.kind: np.ndarray = kind
+        self.parsed: np.ndarray = parsed
+        self.valid: np.ndarray = valid
+        self.counts: Dict[str, np.ndarray] = counts
+        self.author: np.ndarray = author
+        self.authors: np.ndarray = authors
+        # name -> (indptr, codes, vocabulary)
+        self.lists: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = lists
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def empty(cls) -> "Features":
+        none = np.array([], dtype=str)
+        return cls(
+            none, none, none,
+            np.zeros(0, dtype=np.int8), np.zeros(0, dtype=bool), np.zeros(0, dtype=bool),
+            {c: np.zeros(0, dtype=np.int64) for c in COUNTS},
+            np.zeros(0, dtype=np.int32), none,
+            {name: (np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32), none) for name in LISTS},
+        )
+
+    @classmethod
+    def from_rows(cls, rows: List[Tuple[str, str, str, Dict[str, Any]]]) -> "Features":
+        """Build from (key, fingerprint, parent, features) tuples."""
+        if not rows:
+            return cls.empty()
+        author_codes: Dict[str, int] = {}
+        lists = {}
+        for name in LISTS:
+            vocab: Dict[str, int] = {}
+            indptr = [0]
+            codes: List[int] = []
+            for _, _, _, f in rows:
+                codes.extend(vocab.setdefault(v, len(vocab)) for v in f[name])
+                indptr.append(len(codes))
+            lists[name] = (
+                np.asarray(indptr, dtype=np.int64),
+                np.asarray(codes, dtype=np.int32),
+                np.array(sorted(vocab, key=vocab.get), dtype=str),
+            )
+        return cls(
+            np.array([r[0] for r in rows], dtype=str),
+            np.array([r[1] for r in rows], dtype=str),
+            np.array([r[2] for r in rows], dtype=str),
+            np.array([KIND_NAMES.index(r[0].split("/", 1)[0]) for r in rows], dtype=np.int8),
+            np.array([r[3]["parsed"] for r in rows], dtype=bool),
+            np.array([r[3]["valid"] for r in rows], dtype=bool),
+            {c: np.array([r[3][c] for r in rows], dtype=np.int64) for c in COUNTS},
+            np.array([author_codes.setdefault(r[3]["author"], len(author_codes)) for r in rows], dtype=np.int32),
+            np.array(sorted(author_codes, key=author_codes.get), dtype=str),
+            lists,
+        )
+
+    def take(self, rows: np.ndarray) -> "Features":
+        lists = {}
+        for name, (indptr, codes, vocab) in self.lists.items():
+            new_ptr, new_codes = _gather(indptr, codes, rows)
+            lists[name] = (new_ptr, new_codes, vocab)
+        return Features(
+            self.keys[rows], self.fingerprints[rows], self.parents[rows], self.kind[rows],
+            self.parsed[rows], self.valid[rows], {c: v[rows] for c, v in self.counts.items()},
+            self.author[rows], self.authors, lists,
+        )
+
+    @staticmethod
+    def concat(a: "Features", b: "Features") -> "Features":
+        # Codes of `b` are shifted past `a`'s vocabulary; compaction then merges shared strings.
+        authors, author = _compact(
+            np.concatenate((a.authors, b.authors)), np.concatenate((a.author, b.author + len(a.authors)))
+        )
+        lists = {}
+        for name in LISTS:
+            a_ptr, a_codes, a_vocab = a.lists[name]
+            b_ptr, b_codes, b_vocab = b.lists[name]
+            vocab, codes = _compact(
+                np.concatenate((a_vocab, b_vocab)), np.concatenate((a_codes, b_codes + len(a_vocab)))
+            )
+            lists[name] = (np.concatenate((a_ptr, b_ptr[1:] + a_ptr[-1])), codes, vocab)
+        return Features(
+            np.concatenate((a.keys, b.keys)),
+            np.concatenate((a.fingerprints, b.fingerprints)),
+            np.concatenate((a.parents, b.parents)),
+            np.concatenate((a.kind, b.kind)),
+            np.concatenate((a.parsed, b.parsed)),
+            np.concatenate((a.valid, b.valid)),
+            {c: np.concatenate((a.counts[c], b.counts[c])) for c in COUNTS},
+            author,
+            authors,
+            lists,
+        )
+
+
+def dumps(features: Features) -> bytes:
+    arrays = {
+        "keys": features.keys,
+        "fingerprints": features.fingerprints,
+        "parents": features.parents,
+        "kind": features.kind,
+        "parsed": features.parsed,
+        "valid": features.valid,
+        "author": features.author,
+        "authors": features.authors,
+        "meta": np.array(json.dumps({"version": FEATURES_VERSION})),
+    }
+    arrays.update({f"count_{c}": v for c, v in features.counts.items()})
+    for name, (indptr, codes, vocab) in features.lists.items():
+        arrays.update({f"{name}_indptr": indptr, f"{name}_codes": codes, f"{name}_vocab": vocab})
+    buf = io.BytesIO()
+    np.savez(buf, **arrays)
+    return buf.getvalue()
+
+
+def loads(data: bytes) -> Optional[Features]:
+    try:
+        with np.load(io.BytesIO(data)) as f:
+            if json.loads(str(f["meta"])).get("version") != FEATURES_VERSION:
+                return None
+            return Features(
+                f["keys"], f["fingerprints"], f["parents"], f["kind"], f["parsed"], f["valid"],
+                {c: f[f"count_{c}"] for c in COUNTS},
+                f["author"], f["authors"],
+                {name: (f[f"{name}_indptr"], f[f"{name}_codes"], f[f"{name}_vocab"]) for name in LISTS},
+            )
+    except (OSError, ValueError, KeyError, EOFError):
+        return None
+
+
+def _reusable(cached: Features, current: Dict[str, str]) -> np.ndarray:
+    """Rows of the cache whose config and whole `extends:` chain are unchanged.
+
+    A chain may end at a base that does not exist; it stays valid only while
+    that base is still missing.
+    """
+    index = {key: i for i, key in enumerate(cached.keys.tolist())}
+    fingerprints = cached.fingerprints.tolist()
+    parents = cached.parents.tolist()
+    ok: Dict[str, bool] = {}
+    for key in index:
+        chain = []
+        k = key
+        while k not in ok:
+            i = index.get(k)
+            if i is None and k not in current:
+                ok[k] = True
+                break
+            if i is None or current.get(k) != fingerprints[i] or k in chain:
+                ok[k] = False
+                break
+            chain.append(k)
+            if not parents[i]:
+                ok[k] = True
+                break
+            k = parents[i]
+        verdict = ok[k]
+        for c in chain:
+            ok[c] = verdict
+    return np.array([i for key, i in index.items() if ok[key]], dtype=np.int64)
+
+
+def _fast_load(config_dir: Path, kind: str):
+    return load_config(config_dir, kind, FAST_LOADER)
+
+
+def refresh(project: Path, cached: Optional[Features] = None) -> Tuple[Features, int]:
+    """Bring `cached` up to date with the catalog; returns the features and how many configs were re-read."""
+    project = Path(project)
+    current: Dict[str, str] = {}
+    for kind in KINDS:
+        # Plain scandir names and string paths: on a warm cache this loop is most of the work.
+        for name in scan_config_names(project, kind):
+            fingerprint = config_fingerprint(os.path.join(project, kind, name), kind)
+            if not fingerprint.startswith("-/"):
+                current[f"{kind}/{name}"] = fingerprint
+
+    kept = Features.empty()
+    if cached is not None and len(cached):
+        rows = _reusable(cached, current)
+        kept = cached.take(rows)
+    have = set(kept.keys.tolist())
+
+    resolver = Resolver(project, load=_fast_load)
+    fresh = []
+    for key in sorted(current.keys() - have):
+        kind, name = key.split("/", 1)
+        config_dir = project / kind / name
+        raw, raw_error = _fast_load(config_dir, kind)
+        # The named base even when it does not resolve, so creating it invalidates this row.
+        base = extends_target(kind, raw)
+        data, error = resolver.resolve(kind, name, raw, raw_error)
+        fresh.append((key, current[key], "/".join(base) if base else "", extract(config_dir, data, error)))
+    if not fresh:
+        return kept, 0
+    return Features.concat(kept, Features.from_rows(fresh)), len(fresh)
+
+
+def load_features(project: Path) -> Tuple[Features, int]:
+    """Features for the whole catalog, re-reading only configs changed since the cached copy."""
+    path = Path(project) / CACHE_NAME
+    data = storage.read_bytes(path)
+    cached = loads(data) if data else None
+    features, reread = refresh(project, cached)
+    if reread or cached is None or len(cached) != len(features):
+        try:
+            storage.atomic_write(path, dumps(features))
+        except OSError:
+            pass
+    return features, reread
+
+
+def _distribution(values: np.ndarray) -> Dict[str, float]:
+    if not len(values):
+        return {"mean": 0.0, **{f"p{p}": 0.0 for p in PERCENTILES}, "max": 0}
+    pct = np.percentile(values, PERCENTILES)
+    return {
+        "mean": float(values.mean()),
+        **{f"p{p}": float(v) for p, v in zip(PERCENTILES, pct)},
+        "max": int(values.max()),
+    }
+
+
+def _histogram(values: np.ndarray, bounds: Iterable[int]) -> Dict[str, int]:
+    bounds = list(bounds)
+    # searchsorted with side="left" puts v == bound into the bucket "<= bound".
+    counts = np.bincount(np.searchsorted(bounds, values, side="left"), minlength=len(bounds) + 1)
+    labels = [f"<={b}" for b in bounds] + [f">{bounds[-1]}"]
+    return dict(zip(labels, (int(c) for c in counts)))
+
+
+def _top(counts: np.ndarray, vocab: np.ndarray, top: Optional[int]) -> np.ndarray:
+    """Indices of the non-zero counts, most frequent first and ties by name."""
+    nonzero = np.flatnonzero(counts)
+    order = nonzero[np.lexsort((vocab[nonzero], -counts[nonzero]))]
+    return order if top is None else order[:top]
+
+
+def summarize(features: Features, kinds: Optional[Iterable[str]] = None, top: Optional[int] = 10) -> Dict[str, Any]:
+    """Catalog aggregates, computed with array operations over the selected kinds."""
+    wanted = [KIND_NAMES.index(k) for k in (kinds or KIND_NAMES)]
+    selected = np.isin(features.kind, wanted)
+    rows = np.flatnonzero(selected & features.parsed)
+    f = features.take(rows)
+
+    report: Dict[str, Any] = {
+        "configs": {KIND_NAMES[k]: int(np.count_nonzero(features.kind[selected] == k)) for k in wanted},
+        "invalid": int(np.count_nonzero(selected & ~features.valid)),
+    }
+    prompt = f.counts["prompt_bytes"]
+    report["prompt_bytes"] = {**_distribution(prompt), "histogram": _histogram(prompt, PROMPT_BUCKETS)}
+    report["inputs"] = _distribution(f.counts["inputs"])
+
+    tag_ptr, tag_codes, tag_vocab = f.lists["tags"]
+    tagged = np.bincount(tag_codes, minlength=len(tag_vocab))
+    report["tags"] = [{"tag": str(tag_vocab[i]), "configs": int(tagged[i])} for i in _top(tagged, tag_vocab, top)]
+
+    model_ptr, model_codes, model_vocab = f.lists["models"]
+    per_config = np.diff(model_ptr)
+    has_models = per_config > 0
+    primary = np.bincount(model_codes[model_ptr[:-1][has_models]], minlength=len(model_vocab))
+    listed = np.bincount(model_codes, minlength=len(model_vocab))
+    report["models"] = [
+        {"model": str(model_vocab[i]), "configs": int(listed[i]), "primary": int(primary[i])}
+        for i in _top(listed, model_vocab, top)
+    ]
+    lengths = np.bincount(per_config) if len(per_config) else np.zeros(0, dtype=np.int64)
+    report["models_per_config"] = {str(i): int(n) for i, n in enumerate(lengths) if n}
+
+    # Group-by author: counts and sums via bincount, maxima via an unbuffered ufunc.
+    n_authors = len(f.authors)
+    configs = np.bincount(f.author, minlength=n_authors)
+    inputs = np.bincount(f.author, weights=f.counts["inputs"], minlength=n_authors)
+    required = np.bincount(f.author, weights=f.counts["required_inputs"], minlength=n_authors)
+    most = np.zeros(n_authors, dtype=np.int64)
+    np.maximum.at(most, f.author, f.counts["inputs"])
+    report["authors"] = [
+        {
+            "author": str(f.authors[i]) or "(none)",
+            "configs": int(configs[i]),
+            "mean_inputs": float(inputs[i] / configs[i]),
+            "mean_required_inputs": float(required[i] / configs[i]),
+            "max_inputs": int(most[i]),
+        }
+        for i in _top(configs, f.authors, top)
+    ]
+    return report
+
+
+def csv_rows(report: Dict[str, Any]) -> Iterable[Tuple[str, str, str, Any]]:
+    """The report flattened to (section, key, metric, value) rows."""
+    for kind, n in report["configs"].items():
+        yield "configs", kind, "count", n
+    yield "configs", "all", "invalid", report["invalid"]
+    for section in ("prompt_bytes", "inputs"):
+        for metric, value in report[section].items():
+            if metric != "histogram":
+                yield section, "all", metric, value
+    for bucket, n in report["prompt_bytes"]["histogram"].items():
+        yield "prompt_bytes_histogram", bucket, "configs", n
+    for row in report["tags"]:
+        yield "tags", row["tag"], "configs", row["configs"]
+    for row in report["models"]:
+        yield "models", row["model"], "configs", row["configs"]
+        yield "models", row["model"], "primary", row["primary"]
+    for length, n in report["models_per_config"].items():
+        yield "models_per_config", length, "configs", n
+    for row in report["authors"]:
+        for metric in ("configs", "mean_inputs", "mean_required_inputs", "max_inputs"):
+            yield "authors", row["author"], metric, row[metric]
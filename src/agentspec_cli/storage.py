@@ -0,0 +1,221 @@
+import json
+import os
+import shutil
+import stat
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple, TypeVar
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+T = TypeVar("T")
+
+TXN_DIR = ".agentspec/txn"
+JOURNAL_NAME = "journal.json"
+
+
+def user_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "agentspec"
+
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_synced(path: Path, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _file_mode(path: Path) -> int:
+    # The mode `path` keeps, or the one open() would give a new file.
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """Replace `path` with `data` so that readers see either the old or the new file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        # mkstemp creates the file 0600, and the rename would carry that over.
+        os.chmod(tmp, _file_mode(path))
+        _write_synced(Path(tmp), data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    _fsync_dir(path.parent)
+
+
+def read_bytes(path: Path) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+class FileLock:
+    """Advisory exclusive lock on `<path>.lock`; a no-op where fcntl is unavailable.
+
+    There is deliberately no shared mode: files written with `atomic_write` are
+    read without any lock, because a rename swaps in the new copy whole and a
+    reader holds either the old or the new file. The lock only serializes
+    writers that must see the latest contents first, such as `update` and
+    `get_or_create`.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(f"{path}.lock")
+
+    @contextmanager
+    def _hold(self, operation: int) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, operation)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def exclusive(self):
+        return self._hold(fcntl.LOCK_EX if fcntl else 0)
+
+
+def update(path: Path, fn: Callable[[Optional[bytes]], Optional[bytes]]) -> Optional[bytes]:
+    """Read-modify-write `path` under its exclusive lock.
+
+    `fn` receives the current contents (None if missing) and returns the new
+    contents, or None to leave the file untouched.
+    """
+    with FileLock(path).exclusive():
+        data = fn(read_bytes(path))
+        if data is not None:
+            atomic_write(path, data)
+        return data
+
+
+def get_or_create(path: Path, load: Callable[[bytes], Optional[T]], build: Callable[[], Tuple[T, bytes]]) -> T:
+    """Return the cached value at `path`, building and storing it if missing or stale.
+
+    `load` parses stored bytes and returns None when they are stale or corrupt.
+    The warm path reads without locking. On a miss, builders queue on the
+    exclusive lock and re-check after acquiring it, so a cold cache is built by
+    one process and then shared by the others.
+    """
+    data = read_bytes(path)
+    value = load(data) if data is not None else None
+    if value is not None:
+        return value
+    with FileLock(path).exclusive():
+        data = read_bytes(path)
+        value = load(data) if data is not None else None
+        if value is not None:
+            return value
+        value, data = build()
+        try:
+            atomic_write(path, data)
+        except OSError:
+            pass
+        return value
+
+
+class Transaction:
+    """A set of file writes under `root` that become visible all together or not at all."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.staging = self.root / TXN_DIR
+        self._writes: List[Tuple[str, str]] = []
+
+    def write(self, rel_path: str, data: bytes) -> None:
+        name = f"{len(self._writes)}.tmp"
+        _write_synced(self.staging / name, data)
+        self._writes.append((name, str(rel_path)))
+
+    def _commit(self) -> None:
+        if not self._writes:
+            return
+        # The journal is the commit point: once it is on disk, recovery finishes the renames.
+        atomic_write(self.staging / JOURNAL_NAME, json.dumps(self._writes).encode())
+        _apply(self.root)
+
+
+def _apply(root: Path) -> None:
+    staging = root / TXN_DIR
+    journal = staging / JOURNAL_NAME
+    writes = json.loads(journal.read_text())
+    parents = set()
+    for name, rel_path in writes:
+        dest = root / rel_path
+        if (staging / name).exists():
+            os.replace(staging / name, dest)
+        parents.add(dest.parent)
+    for parent in parents:
+        _fsync_dir(parent)
+    journal.unlink()
+
+
+def recover(root: Path) -> None:
+    """Finish a committed transaction interrupted by a crash and drop uncommitted ones."""
+    root = Path(root)
+    staging = root / TXN_DIR
+    if not staging.exists():
+        return
+    journal = staging / JOURNAL_NAME
+    if journal.exists():
+        try:
+            _apply(root)
+        except ValueError:
+            journal.unlink()
+    shutil.rmtree(staging, ignore_errors=True)
+
+
+@contextmanager
+def transaction(root: Path) -> Iterator[Transaction]:
+    """Journaled multi-file update; exclusive against other transactions on `root`."""
+    root = Path(root)
+    staging = root / TXN_DIR
+    with FileLock(staging).exclusive():
+        recover(root)
+        staging.mkdir(parents=True, exist_ok=True)
+        txn = Transaction(root)
+        try:
+            yield txn
+            txn._commit()
+        except BaseException:
+            # Past the commit point the journal and staged files are what recover() finishes from.
+            if not (staging / JOURNAL_NAME).exists():
+                shutil.rmtree(staging, ignore_errors=True)
+            raise
+        shutil.rmtree(staging, ignore_errors=True)
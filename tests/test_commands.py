@@ -1,6 +1,8 @@
+import json
 import os
 import shutil
 import tempfile
+import time
 from pathlib import Path
 from unittest.mock import patch
 
@@ -358,3 +360,1953 @@ class TestHelpCommand:
         result = runner.invoke(app, ["--help"])
         assert "init" in result.output
         assert "new-agent" in result.output or "new_agent" in result.output
+
+
+@pytest.fixture
+def broken_project(tmp_path):
+    for name in ["a-bad", "b-bad", "c-good"]:
+        d = tmp_path / "agents" / name
+        d.mkdir(parents=True)
+        if name.endswith("good"):
+            (d / "agent.yaml").write_text("name: c-good\ndescription: ok\nversion: 1.0.0\n")
+        else:
+            (d / "agent.yaml").write_text(f"name: {name}\n")
+    return tmp_path
+
+
+class TestValidateLimits:
+    def test_validate_reports_all_errors_by_default(self, runner, broken_project):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["validate", "--project-dir", str(broken_project)])
+        assert result.exit_code == 1
+        assert "a-bad" in result.output and "b-bad" in result.output
+        assert "2 error(s)" in result.output
+
+    def test_validate_fail_fast_stops_at_first_error(self, runner, broken_project):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["validate", "--project-dir", str(broken_project), "--fail-fast"])
+        assert result.exit_code == 1
+        assert "a-bad" in result.output
+        assert "b-bad" not in result.output
+        assert "stopped" in result.output.lower()
+
+    def test_validate_max_errors(self, runner, broken_project):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["validate", "--project-dir", str(broken_project), "--max-errors", "2"])
+        assert result.exit_code == 1
+        assert "b-bad" in result.output
+        assert "c-good" not in result.output
+
+    def test_validate_quiet_hides_valid_configs(self, runner, broken_project):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["validate", "--project-dir", str(broken_project), "--quiet"])
+        assert result.exit_code == 1
+        assert "c-good" not in result.output
+        assert "a-bad" in result.output
+
+    def test_validate_quiet_silent_on_success(self, runner, project_root):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["validate", "--project-dir", str(project_root), "--quiet"])
+        assert result.exit_code == 0
+        assert result.output.strip() == ""
+
+
+def _git(cwd, *args):
+    import subprocess
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+        cwd=cwd, check=True, capture_output=True,
+    )
+
+
+@pytest.fixture
+def git_project(tmp_path):
+    for name in ["alpha", "beta", "gamma"]:
+        d = tmp_path / "agents" / name
+        d.mkdir(parents=True)
+        (d / "agent.yaml").write_text(f"name: {name}\ndescription: test\nversion: 1.0.0\n")
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "commit", "-qm", "init")
+    return tmp_path
+
+
+class TestValidateIncremental:
+    def test_since_only_checks_changed_configs(self, runner, git_project):
+        from agentspec_cli.commands import app
+        (git_project / "agents" / "beta" / "agent.yaml").write_text("name: beta\n")
+        result = runner.invoke(app, ["validate", "--project-dir", str(git_project), "--since", "HEAD"])
+        assert result.exit_code == 1
+        assert "beta" in result.output
+        assert "alpha" not in result.output
+        assert "Skipped 2" in result.output
+
+    def test_since_includes_untracked_configs(self, runner, git_project):
+        from agentspec_cli.commands import app
+        d = git_project / "agents" / "delta"
+        d.mkdir()
+        (d / "agent.yaml").write_text("name: delta\ndescription: new\nversion: 1.0.0\n")
+        result = runner.invoke(app, ["validate", "--project-dir", str(git_project), "--since", "HEAD"])
+        assert result.exit_code == 0
+        assert "delta: valid" in result.output
+        assert "Skipped 3" in result.output
+
+    def test_staged_ignores_unstaged_changes(self, runner, git_project):
+        from agentspec_cli.commands import app
+        (git_project / "agents" / "alpha" / "agent.yaml").write_text("name: alpha\n")
+        (git_project / "agents" / "gamma" / "agent.yaml").write_text("name: gamma\n")
+        _git(git_project, "add", "agents/gamma/agent.yaml")
+        result = runner.invoke(app, ["validate", "--project-dir", str(git_project), "--staged"])
+        assert "gamma" in result.output
+        assert "alpha" not in result.output
+
+    def test_staged_before_first_commit(self, runner, tmp_path):
+        from agentspec_cli.commands import app
+        d = tmp_path / "agents" / "first"
+        d.mkdir(parents=True)
+        (d / "agent.yaml").write_text("name: first\ndescription: d\nversion: 1.0.0\n")
+        _git(tmp_path, "init", "-q")
+        _git(tmp_path, "add", "-A")
+        result = runner.invoke(app, ["validate", "--project-dir", str(tmp_path), "--staged"])
+        assert result.exit_code == 0
+        assert "first: valid" in result.output
+
+    def test_unknown_ref_is_an_error(self, runner, git_project):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["validate", "--project-dir", str(git_project), "--since", "no-such-ref"])
+        assert result.exit_code == 1
+        assert "no-such-ref" in result.output
+
+    def test_falls_back_to_full_run_outside_git(self, runner, broken_project):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["validate", "--project-dir", str(broken_project), "--since", "HEAD"])
+        assert "not a git checkout" in result.output.lower()
+        assert "c-good" in result.output
+
+
+@pytest.fixture
+def daemon(git_project):
+    import threading
+    from agentspec_cli import serve
+    server = serve.CatalogServer(git_project)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestServe:
+    def test_socket_created_in_project(self, daemon, git_project):
+        assert (git_project / ".agentspec" / "serve.sock").exists()
+
+    def test_list_over_socket(self, daemon, git_project):
+        from agentspec_cli import serve
+        result = serve.call(git_project, "list")
+        assert [e["name"] for e in result["agents"]] == ["alpha", "beta", "gamma"]
+        assert result["skills"] == []
+
+    def test_catalog_stays_warm_but_sees_edits(self, daemon, git_project):
+        from agentspec_cli import serve
+        serve.call(git_project, "list")
+        (git_project / "agents" / "beta" / "agent.yaml").write_text("name: beta\n")
+        result = serve.call(git_project, "validate")
+        errors = {r["dir"]: r["error"] for r in result["results"]}
+        assert errors["alpha"] is None
+        assert "missing fields" in errors["beta"]
+
+    def test_query_by_name(self, daemon, git_project):
+        from agentspec_cli import serve
+        result = serve.call(git_project, "query", {"name": "gamma"})
+        assert len(result) == 1
+        assert result[0]["config"]["version"] == "1.0.0"
+
+    def test_new_agent_over_socket(self, daemon, git_project):
+        from agentspec_cli import serve
+        result = serve.call(git_project, "new-agent", {"name": "From Daemon", "description": "d"})
+        assert (git_project / "agents" / "from-daemon" / "agent.yaml").exists()
+        assert result["path"].endswith("from-daemon")
+
+    def test_new_agent_refuses_existing_and_unknown_base(self, git_project):
+        from agentspec_cli import serve
+        service = serve.CatalogService(git_project)
+        before = (git_project / "agents" / "alpha" / "agent.yaml").read_text()
+        for params, message in [
+            ({"name": "alpha", "description": "d"}, "agent 'alpha' already exists"),
+            ({"name": "fresh", "description": "d", "extends": "nope"}, "unknown base config 'nope'"),
+        ]:
+            response = service.handle({"jsonrpc": "2.0", "id": 1, "method": "new-agent", "params": params})
+            assert response["error"] == {"code": serve.INTERNAL_ERROR, "message": message}
+        assert (git_project / "agents" / "alpha" / "agent.yaml").read_text() == before
+        assert not (git_project / "agents" / "fresh").exists()
+
+    def test_type_errors_in_method_body_are_internal(self, git_project):
+        from agentspec_cli import serve
+        service = serve.CatalogService(git_project)
+        response = service.handle({"jsonrpc": "2.0", "id": 1, "method": "query", "params": {"bogus": 1}})
+        assert response["error"]["code"] == serve.INVALID_PARAMS
+        with patch.object(service.catalog, "configs", side_effect=TypeError("bug")):
+            response = service.handle({"jsonrpc": "2.0", "id": 1, "method": "query", "params": {}})
+        assert response["error"]["code"] == serve.INTERNAL_ERROR
+
+    def test_unknown_method_is_an_error(self, daemon, git_project):
+        from agentspec_cli import serve
+        with pytest.raises(RuntimeError):
+            serve.call(git_project, "nope")
+
+    def test_cli_forwards_to_daemon(self, runner, daemon, git_project):
+        from agentspec_cli.commands import app
+        with patch("agentspec_cli.commands.read_configs", side_effect=AssertionError("not forwarded")):
+            result = runner.invoke(app, ["list", "--project-dir", str(git_project)])
+        assert result.exit_code == 0
+        assert "alpha" in result.output
+
+    def test_query_serializes_dates(self, daemon, git_project):
+        from agentspec_cli import serve
+        (git_project / "agents" / "alpha" / "agent.yaml").write_text(
+            "name: alpha\ndescription: test\nversion: 1.0.0\nreviewed: 2024-05-01\n"
+        )
+        result = serve.call(git_project, "query", {"name": "alpha"})
+        assert result[0]["config"]["reviewed"] == "2024-05-01"
+
+    def test_second_daemon_does_not_steal_the_socket(self, daemon, git_project):
+        from agentspec_cli import serve
+        with pytest.raises(OSError, match="already serving"):
+            serve.CatalogServer(git_project)
+        assert serve.call(git_project, "list") is not None
+
+    def test_stale_socket_is_replaced(self, git_project):
+        import socket
+        from agentspec_cli import serve
+        path = git_project / ".agentspec" / "serve.sock"
+        path.parent.mkdir()
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(str(path))
+        stale.close()
+        server = serve.CatalogServer(git_project)
+        server.server_close()
+
+    def test_bad_daemon_replies_fall_back_in_process(self, runner, git_project):
+        import socket
+        import threading
+        from agentspec_cli.commands import app
+        path = git_project / ".agentspec" / "serve.sock"
+        path.parent.mkdir()
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(str(path))
+        listener.listen()
+        replies = [b"not json\n", b'{"jsonrpc": "2.0", "id": 1, "error": {"code": -32603, "message": "boom"}}\n']
+
+        def answer():
+            for reply in replies:
+                conn, _ = listener.accept()
+                with conn:
+                    conn.recv(65536)
+                    conn.sendall(reply)
+
+        thread = threading.Thread(target=answer, daemon=True)
+        thread.start()
+        try:
+            for command in ("list", "validate"):
+                result = runner.invoke(app, [command, "--project-dir", str(git_project)])
+                assert result.exit_code == 0, result.output
+                assert "alpha" in result.output
+        finally:
+            thread.join(5)
+            listener.close()
+
+    def test_call_without_daemon_returns_none(self, tmp_path):
+        from agentspec_cli import serve
+        assert serve.call(tmp_path, "list") is None
+
+
+@pytest.fixture
+def many_agents(tmp_path):
+    for i in range(40):
+        d = tmp_path / "agents" / f"agent-{i:03d}"
+        d.mkdir(parents=True)
+        (d / "agent.yaml").write_text(f"name: agent-{i:03d}\ndescription: test\nversion: 1.0.{i}\n")
+    (tmp_path / "agents" / "agent-no-yaml").mkdir()
+    return tmp_path
+
+
+class TestAsyncIO:
+    def test_async_matches_serial_order(self, many_agents):
+        from agentspec_cli.catalog import iter_config_dirs, read_configs
+        items = [("agents", d) for d in iter_config_dirs(many_agents, "agents")]
+        serial = list(read_configs(items, "serial"))
+        concurrent = list(read_configs(items, "async", concurrency=4))
+        assert concurrent == serial
+        assert serial[-1][3] == "missing agent.yaml"
+
+    def test_async_early_close_cancels_pending_reads(self, many_agents):
+        from agentspec_cli import catalog
+        items = [("agents", d) for d in catalog.iter_config_dirs(many_agents, "agents")]
+        reads = []
+        original = catalog._read_item
+
+        def counting_read(item):
+            reads.append(item)
+            return original(item)
+
+        with patch.object(catalog, "_read_item", counting_read):
+            results = catalog.read_configs(items, "async", concurrency=4)
+            next(results)
+            results.close()
+        assert len(reads) <= 5
+
+    def test_list_with_async_backend(self, runner, many_agents):
+        from agentspec_cli.commands import app
+        serial = runner.invoke(app, ["list", "--project-dir", str(many_agents)])
+        concurrent = runner.invoke(app, ["list", "--project-dir", str(many_agents), "--io", "async"])
+        assert concurrent.exit_code == 0
+        assert concurrent.output == serial.output
+
+    def test_validate_backend_from_env(self, runner, many_agents):
+        from agentspec_cli.commands import app
+        result = runner.invoke(
+            app, ["validate", "--project-dir", str(many_agents), "--fail-fast"], env={"AGENTSPEC_IO": "async"}
+        )
+        assert result.exit_code == 1
+        assert "agent-no-yaml: missing agent.yaml" in result.output
+
+    def test_unknown_backend_is_an_error(self, runner, many_agents):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["list", "--project-dir", str(many_agents), "--io", "mmap"])
+        assert result.exit_code == 1
+        assert "unknown I/O backend" in result.output
+
+
+class TestStreaming:
+    def test_external_sort_spills_and_merges(self):
+        import random
+        from agentspec_cli.catalog import external_sort
+        names = [f"agent-{i:05d}" for i in range(2500)]
+        shuffled = names[:]
+        random.Random(0).shuffle(shuffled)
+        assert list(external_sort(shuffled, run_size=300)) == names
+
+    def test_stream_matches_regular_list(self, runner, many_agents):
+        from agentspec_cli.commands import app
+        regular = runner.invoke(app, ["list", "--project-dir", str(many_agents)])
+        streamed = runner.invoke(app, ["list", "--project-dir", str(many_agents), "--stream"])
+        assert streamed.exit_code == 0
+        assert streamed.output == regular.output
+
+    def test_stream_resolver_memo_is_bounded(self, tmp_path):
+        from agentspec_cli import catalog
+        (tmp_path / "agents" / "base").mkdir(parents=True)
+        (tmp_path / "agents" / "base" / "agent.yaml").write_text("name: base\ndescription: d\nversion: 2.0.0\n")
+        for i in range(30):
+            d = tmp_path / "agents" / f"child-{i:02d}"
+            d.mkdir()
+            (d / "agent.yaml").write_text(f"extends: base\nname: child-{i:02d}\n")
+        sizes = []
+        resolve = catalog.Resolver.resolve
+
+        def tracked(self, *args, **kwargs):
+            result = resolve(self, *args, **kwargs)
+            sizes.append(len(self._resolved))
+            return result
+
+        with patch.object(catalog, "STREAM_RESOLVER_MEMO", 4), patch.object(catalog.Resolver, "resolve", tracked):
+            entries = list(catalog.stream_summaries(tmp_path, "agents"))
+        assert len(entries) == 31 and all(e["version"] == "2.0.0" for e in entries)
+        assert max(sizes) <= 4
+
+    @staticmethod
+    def _peak_bytes(root, count):
+        import tracemalloc
+        from agentspec_cli import catalog
+
+        # A real flat tree, so the directory scan is measured too; only the reads are stubbed.
+        agents = root / "agents"
+        agents.mkdir(parents=True)
+        for i in range(count):
+            d = agents / f"agent-{(i * 7919) % count:06d}"
+            d.mkdir()
+            (d / "agent.yaml").touch()
+        doc = {"name": "n", "description": "d", "version": "1.0.0", "system_prompt": "x" * 4096}
+        with patch.object(catalog, "_read_item", lambda item: "stub"), \
+                patch.object(catalog, "parse_header", lambda text, kind: (dict(doc), None)):
+            tracemalloc.start()
+            emitted = 0
+            for _ in catalog.stream_summaries(root, "agents", run_size=2000):
+                emitted += 1
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        assert emitted == count
+        return peak
+
+    def test_peak_memory_flat_from_1k_to_20k_configs(self, tmp_path):
+        small = self._peak_bytes(tmp_path / "small", 1_000)
+        large = self._peak_bytes(tmp_path / "large", 20_000)
+        assert large < small * 2 + 256 * 1024
+
+
+class TestHeaderParse:
+    def test_header_matches_full_parse_for_sample_configs(self, project_root):
+        from agentspec_cli.catalog import HEADER_FIELDS, parse_config, parse_header
+        for yaml_f in list(project_root.glob("agents/*/agent.yaml")) + list(project_root.glob("skills/*/skill.yaml")):
+            kind = yaml_f.parent.parent.name
+            text = yaml_f.read_text()
+            full, _ = parse_config(text, kind)
+            header, error = parse_header(text, kind)
+            assert error is None
+            assert header == {k: full[k] for k in HEADER_FIELDS}
+
+    def test_header_stops_before_large_prompt(self):
+        from agentspec_cli import catalog
+        text = "name: a\nversion: 1.0\ndescription: 'quoted'\nsystem_prompt: |\n" + "  line\n" * 1000
+        with patch.object(catalog, "parse_config", side_effect=AssertionError("fell back")):
+            header, error = catalog.parse_header(text, "agents")
+        assert header == {"name": "a", "version": 1.0, "description": "quoted"}
+
+    def test_header_skips_nested_collections(self):
+        from agentspec_cli.catalog import parse_header
+        text = "tags: [a, b]\ninputs:\n  - name: nested\n    description: no\nname: x\ndescription: d\nversion: 2.0.0\n"
+        header, _ = parse_header(text, "agents")
+        assert header == {"name": "x", "description": "d", "version": "2.0.0"}
+
+    def test_header_falls_back_when_keys_missing(self):
+        from agentspec_cli.catalog import parse_header
+        data, error = parse_header("name: x\ntags: [a]\n", "agents")
+        assert error is None
+        assert data == {"name": "x", "tags": ["a"]}
+
+    def test_header_reports_parse_errors_like_full_load(self):
+        from agentspec_cli.catalog import parse_config, parse_header
+        text = "name: [unclosed\n"
+        assert parse_header(text, "agents") == parse_config(text, "agents")
+
+
+class TestOutput:
+    def test_plain_output_is_one_buffered_write(self):
+        import io
+        from rich.console import Console
+        from agentspec_cli.output import Output
+        buf = io.StringIO()
+        writes = []
+        buf.write = lambda s, _w=buf.write: writes.append(s) or _w(s)
+        with Output(Console(file=buf), plain=True) as out:
+            out.row(("Agents:", "bold cyan"))
+            out.row("  ", ("●", "green"), " a ", ("(v1)", "dim"), " - desc")
+        assert len(writes) == 1
+        assert buf.getvalue() == "Agents:\n  ● a (v1) - desc\n"
+
+    def test_terminal_output_keeps_styles(self):
+        import io
+        from rich.console import Console
+        from agentspec_cli.output import Output
+        buf = io.StringIO()
+        with Output(Console(file=buf, force_terminal=True, width=80)) as out:
+            assert not out.plain
+            out.row(("ok", "green"))
+        assert "\x1b[" in buf.getvalue()
+        assert "ok" in buf.getvalue()
+
+    def test_list_does_not_interpret_markup_in_descriptions(self, runner, tmp_path):
+        from agentspec_cli.commands import app
+        d = tmp_path / "agents" / "brackets"
+        d.mkdir(parents=True)
+        (d / "agent.yaml").write_text("name: brackets\ndescription: 'Handles [red]tickets[/red]'\nversion: 1.0.0\n")
+        result = runner.invoke(app, ["list", "--project-dir", str(tmp_path), "--plain"])
+        assert "Handles [red]tickets[/red]" in result.output
+
+    def test_banner_is_plain_when_piped(self, capsys):
+        from agentspec_cli.banner import BANNER, TAGLINE, show_banner
+        show_banner()
+        assert capsys.readouterr().out == f"{BANNER}{TAGLINE}\n\n"
+
+
+@pytest.fixture
+def ide_plugin(tmp_path, monkeypatch):
+    from agentspec_cli import ide
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir()
+    (plugin_dir / "inhouse_ide.py").write_text(
+        "def generate(p):\n"
+        "    (p / '.inhouse').write_text('in-house assistant')\n"
+        "generate.label = 'In-House Assistant'\n"
+    )
+    monkeypatch.syspath_prepend(str(plugin_dir))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    scans = []
+
+    def fake_scan():
+        scans.append(1)
+        return {"inhouse": "inhouse_ide:generate"}
+
+    monkeypatch.setattr(ide, "_scan_entry_points", fake_scan)
+    ide.plugin_generators.cache_clear()
+    ide.load_generator.cache_clear()
+    yield scans
+    ide.plugin_generators.cache_clear()
+    ide.load_generator.cache_clear()
+
+
+class TestIDERegistry:
+    def test_plugin_generator_from_entry_points(self, ide_plugin, tmp_path):
+        from agentspec_cli.ide import generate_ide_config, get_ide_label, ide_keys
+        assert "inhouse" in ide_keys()
+        assert get_ide_label("inhouse") == "In-House Assistant"
+        project = tmp_path / "proj"
+        project.mkdir()
+        generate_ide_config(project, "inhouse")
+        assert (project / ".inhouse").read_text() == "in-house assistant"
+
+    def test_discovery_is_cached_on_disk(self, ide_plugin, tmp_path):
+        from agentspec_cli import ide
+        ide.plugin_generators()
+        ide.plugin_generators.cache_clear()
+        assert ide.plugin_generators() == {"inhouse": "inhouse_ide:generate"}
+        assert len(ide_plugin) == 1
+        assert (tmp_path / "cache" / "agentspec" / "ide-registry.json").exists()
+
+    def test_cache_invalidated_when_distributions_change(self, ide_plugin, monkeypatch):
+        from agentspec_cli import ide
+        ide.plugin_generators()
+        ide.plugin_generators.cache_clear()
+        monkeypatch.setattr(ide, "_distribution_key", lambda: "different")
+        ide.plugin_generators()
+        assert len(ide_plugin) == 2
+
+    def test_builtin_generation_skips_plugin_discovery(self, ide_plugin, tmp_path):
+        from agentspec_cli.ide import generate_ide_config
+        generate_ide_config(tmp_path, "claude")
+        assert (tmp_path / "CLAUDE.md").exists()
+        assert ide_plugin == []
+
+    def test_list_does_not_import_ide_modules(self):
+        import subprocess
+        import sys
+        code = (
+            "import sys; import agentspec_cli.commands; "
+            "print('agentspec_cli.ide' in sys.modules, 'agentspec_cli.ide_targets' in sys.modules)"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        ).stdout
+        assert out.strip() == "False False"
+
+
+@pytest.fixture
+def search_project(tmp_path):
+    configs = {
+        "redactor": ("Redacts PII from support transcripts", ["privacy", "pii"], "Remove names and emails."),
+        "summarizer": ("Summarizes meeting notes", ["notes"], "Write short summaries."),
+        "auditor": ("Audits logs for compliance", ["compliance"], "Flag PII leaks in logs."),
+    }
+    for name, (desc, tags, prompt) in configs.items():
+        d = tmp_path / "agents" / name
+        d.mkdir(parents=True)
+        tags_yaml = "".join(f"  - {t}\n" for t in tags)
+        (d / "agent.yaml").write_text(
+            f"name: {name}\ndescription: {desc}\nversion: 1.0.0\ntags:\n{tags_yaml}system_prompt: |\n  {prompt}\n"
+        )
+        (d / "prompt.md").write_text(f"# {name}\n")
+    return tmp_path
+
+
+class TestSearch:
+    def test_ranks_field_matches_first(self, search_project):
+        from agentspec_cli import search
+        conn = search.connect(search_project)
+        search.refresh(conn, search_project)
+        results = search.query(conn, "pii redaction")
+        assert [r["name"] for r in results] == ["redactor", "auditor"]
+
+    def test_refresh_is_incremental(self, search_project):
+        from agentspec_cli import search
+        conn = search.connect(search_project)
+        assert search.refresh(conn, search_project) == (3, 0)
+        assert search.refresh(conn, search_project) == (0, 0)
+        (search_project / "agents" / "summarizer" / "prompt.md").write_text("# summarizer\nAlso handles PII.\n")
+        shutil.rmtree(search_project / "agents" / "auditor")
+        assert search.refresh(conn, search_project) == (1, 1)
+        assert [r["name"] for r in search.query(conn, "pii")] == ["redactor", "summarizer"]
+
+    def test_index_persists_across_connections(self, search_project):
+        from agentspec_cli import search
+        conn = search.connect(search_project)
+        search.refresh(conn, search_project)
+        conn.close()
+        assert (search_project / ".agentspec" / "search.db").exists()
+        conn = search.connect(search_project)
+        assert search.query(conn, "meeting")[0]["name"] == "summarizer"
+
+    def test_search_command_without_refresh_reads_no_configs(self, runner, search_project):
+        from agentspec_cli.commands import app
+        runner.invoke(app, ["search", "notes", "--project-dir", str(search_project)])
+        with patch("agentspec_cli.search.load_config", side_effect=AssertionError("touched configs")):
+            result = runner.invoke(app, ["search", "compliance", "--project-dir", str(search_project), "--no-refresh"])
+        assert result.exit_code == 0
+        assert "auditor" in result.output
+
+    def test_search_command_no_matches(self, runner, search_project):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["search", "kubernetes", "--project-dir", str(search_project)])
+        assert "No matches" in result.output
+
+
+class TestSimilar:
+    def test_index_ranks_closest_config_first(self, search_project):
+        pytest.importorskip("numpy")
+        from agentspec_cli import similarity
+        index = similarity.get_index(search_project)
+        q = index.vector("redact pii from support transcripts names emails")
+        assert index.top_k(q, 1)[0]["dir"] == "redactor"
+
+    def test_scores_match_dense_cosine(self, search_project):
+        np = pytest.importorskip("numpy")
+        from agentspec_cli import similarity
+        index = similarity.build(search_project)
+        dense = np.stack([index.row(i) for i in range(len(index))])
+        q = index.row(0)
+        assert np.allclose(index.scores(q), dense @ q)
+
+    def test_cache_reused_until_catalog_changes(self, search_project):
+        pytest.importorskip("numpy")
+        from agentspec_cli import similarity
+        first = similarity.get_index(search_project)
+        assert (search_project / ".agentspec" / "similarity.npz").exists()
+        with patch.object(similarity, "build", side_effect=AssertionError("rebuilt")):
+            assert similarity.get_index(search_project).key == first.key
+        (search_project / "agents" / "auditor" / "prompt.md").write_text("# changed\n")
+        assert similarity.get_index(search_project).key != first.key
+
+    def test_similar_command(self, runner, search_project):
+        pytest.importorskip("numpy")
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["similar", "redactor", "--project-dir", str(search_project)])
+        assert result.exit_code == 0
+        assert "agents/auditor" in result.output
+        assert "agents/redactor" not in result.output
+
+    def test_new_agent_warns_about_near_match(self, runner, search_project):
+        pytest.importorskip("numpy")
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, [
+            "new-agent", "--name", "meeting-notes", "--description", "Summarizes meeting notes",
+            "--project-dir", str(search_project), "--non-interactive",
+        ])
+        assert result.exit_code == 0
+        assert "agents/summarizer" in result.output
+
+
+class TestDiff:
+    def test_git_refs(self, runner, git_project):
+        from agentspec_cli.commands import app
+        (git_project / "agents" / "alpha" / "agent.yaml").write_text(
+            "name: alpha\ndescription: changed\nversion: 1.0.0\ntags: [x]\n"
+        )
+        (git_project / "agents" / "beta" / "prompt.md").write_text("# beta\n")
+        _git(git_project, "rm", "-rq", "agents/gamma")
+        d = git_project / "skills" / "delta"
+        d.mkdir(parents=True)
+        (d / "skill.yaml").write_text("name: delta\ndescription: new\nversion: 1.0.0\n")
+        _git(git_project, "add", "-A")
+        _git(git_project, "commit", "-qm", "change")
+
+        result = runner.invoke(app, ["diff", "HEAD~1", "HEAD", "--project-dir", str(git_project), "--json"])
+        assert result.exit_code == 0
+        data = json.loads(result.output)
+        assert data["added"] == ["skills/delta"]
+        assert data["removed"] == ["agents/gamma"]
+        changed = {c["path"]: c["fields"] for c in data["changed"]}
+        assert changed["agents/alpha"] == [
+            {"field": "description", "change": "modified"},
+            {"field": "tags", "change": "added"},
+        ]
+        assert changed["agents/beta"] == [{"field": "prompt.md", "change": "added"}]
+
+    def test_directory_against_git_ref(self, runner, git_project):
+        from agentspec_cli.commands import app
+        (git_project / "agents" / "beta" / "agent.yaml").write_text("name: beta\ndescription: test\nversion: 2.0.0\n")
+        result = runner.invoke(app, ["diff", "HEAD", str(git_project), "--project-dir", str(git_project)])
+        assert result.exit_code == 0
+        assert "~ agents/beta (version)" in result.output
+        assert "alpha" not in result.output
+        assert "0 added, 0 removed, 1 changed" in result.output
+
+    def test_only_changed_configs_are_read(self, tmp_path):
+        from agentspec_cli import diff
+        for root in ("a", "b"):
+            for name in ("one", "two"):
+                d = tmp_path / root / "agents" / name
+                d.mkdir(parents=True)
+                (d / "agent.yaml").write_text(f"name: {name}\ndescription: x\nversion: 1.0.0\n")
+        (tmp_path / "b" / "agents" / "two" / "agent.yaml").write_text("name: two\ndescription: y\nversion: 1.0.0\n")
+        old, new = diff.dir_snapshot(tmp_path / "a"), diff.dir_snapshot(tmp_path / "b")
+        requested = []
+
+        def recording(read):
+            def wrapper(shas):
+                shas = list(shas)
+                requested.extend(shas)
+                return read(shas)
+            return wrapper
+
+        old.read, new.read = recording(old.read), recording(new.read)
+        result = diff.diff(old, new)
+        assert len(requested) == 2
+        assert result["changed"] == [{"path": "agents/two", "fields": [{"field": "description", "change": "modified"}]}]
+
+    def test_nested_field_paths(self):
+        from agentspec_cli.diff import field_changes
+        old = {"inputs": [{"name": "a", "required": True}], "author": "x"}
+        new = {"inputs": [{"name": "a", "required": False}]}
+        assert field_changes(old, new) == [("inputs[0].required", "modified"), ("author", "removed")]
+
+    def test_unknown_source_is_an_error(self, runner, git_project):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["diff", "HEAD", "no-such-ref", "--project-dir", str(git_project)])
+        assert result.exit_code == 1
+        assert "neither a directory nor a git ref" in result.output
+
+
+class TestLock:
+    def test_lock_records_files(self, runner, git_project):
+        from agentspec_cli.commands import app
+        (git_project / "agents" / "alpha" / "prompt.md").write_text("")
+        result = runner.invoke(app, ["lock", "--project-dir", str(git_project)])
+        assert result.exit_code == 0
+        data = json.loads((git_project / "agentspec.lock").read_text())
+        alpha = data["configs"]["agents/alpha"]
+        assert alpha["version"] == "1.0.0"
+        assert set(alpha["files"]) == {"agents/alpha/agent.yaml", "agents/alpha/prompt.md"}
+        assert alpha["files"]["agents/alpha/prompt.md"]["size"] == 0
+
+    def test_verify_passes_on_unchanged_catalog(self, runner, git_project):
+        from agentspec_cli.commands import app
+        runner.invoke(app, ["lock", "--project-dir", str(git_project)])
+        result = runner.invoke(app, ["verify", "--project-dir", str(git_project)])
+        assert result.exit_code == 0
+        assert "All 3 locked files match" in result.output
+
+    def test_verify_reports_tampering(self, runner, git_project):
+        from agentspec_cli.commands import app
+        runner.invoke(app, ["lock", "--project-dir", str(git_project)])
+        alpha = git_project / "agents" / "alpha" / "agent.yaml"
+        alpha.write_text(alpha.read_text().replace("test", "tset"))
+        (git_project / "agents" / "beta" / "agent.yaml").write_text("name: beta\n")
+        (git_project / "agents" / "gamma" / "agent.yaml").unlink()
+        (git_project / "agents" / "gamma" / "extra.md").write_text("x")
+        result = runner.invoke(app, ["verify", "--project-dir", str(git_project)])
+        assert result.exit_code == 1
+        assert "agents/alpha/agent.yaml: hash mismatch" in result.output
+        assert "agents/beta/agent.yaml: size mismatch" in result.output
+        assert "agents/gamma/agent.yaml: missing" in result.output
+        assert "agents/gamma/extra.md: not in lockfile" in result.output
+
+    def test_size_mismatch_skips_hashing(self, git_project):
+        from agentspec_cli import lock
+        data = lock.build_lock(git_project)
+        (git_project / "agents" / "beta" / "agent.yaml").write_text("name: beta\n")
+        with patch.object(lock, "hash_file", wraps=lock.hash_file) as hashed:
+            _, problems = lock.verify(git_project, data)
+        assert problems == [("agents/beta/agent.yaml", "size mismatch")]
+        assert hashed.call_count == 2
+
+    def test_verify_without_lockfile(self, runner, git_project):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["verify", "--project-dir", str(git_project)])
+        assert result.exit_code == 1
+        assert "run 'agentspec lock' first" in result.output
+
+
+@pytest.fixture
+def extends_project(tmp_path):
+    configs = {
+        "agents/base": "name: base\ndescription: shared\nversion: 1.0.0\nmodel_preferences: [gpt-4]\n"
+                       "outputs:\n  - name: result\n    format: markdown\n",
+        "agents/child": "extends: base\nname: child\noutputs:\n  - name: report\n",
+        "agents/grandchild": "extends: child\nname: grandchild\ndescription: leaf\n",
+        "agents/loop-a": "extends: loop-b\nname: loop-a\n",
+        "agents/loop-b": "extends: loop-a\nname: loop-b\n",
+        "agents/orphan": "extends: nowhere\nname: orphan\n",
+        "skills/uses-agent": "extends: agents/base\nname: uses-agent\n",
+    }
+    for path, text in configs.items():
+        kind, name = path.split("/")
+        d = tmp_path / path
+        d.mkdir(parents=True)
+        (d / ("agent.yaml" if kind == "agents" else "skill.yaml")).write_text(text)
+    return tmp_path
+
+
+class TestExtends:
+    def test_deep_merge(self):
+        from agentspec_cli.catalog import deep_merge
+        base = {"a": {"x": 1, "y": 2}, "tags": ["one"], "keep": True}
+        assert deep_merge(base, {"a": {"y": 3}, "tags": ["two"]}) == {
+            "a": {"x": 1, "y": 3}, "tags": ["two"], "keep": True,
+        }
+
+    def test_chain_resolves_with_each_base_loaded_once(self, extends_project):
+        from agentspec_cli import catalog
+        resolver = catalog.Resolver(extends_project)
+        with patch.object(resolver, "_load", wraps=resolver._load) as load:
+            leaf, error = resolver.resolve("agents", "grandchild")
+            child, _ = resolver.resolve("agents", "child")
+        assert error is None
+        assert leaf["description"] == "leaf"
+        assert leaf["version"] == "1.0.0"
+        assert leaf["model_preferences"] == ["gpt-4"]
+        assert leaf["outputs"] == [{"name": "report"}]
+        assert "extends" not in leaf
+        assert child["description"] == "shared"
+        assert load.call_count == 3
+
+    def test_cycle_and_unknown_base(self, extends_project):
+        from agentspec_cli.catalog import Resolver
+        resolver = Resolver(extends_project)
+        assert resolver.resolve("agents", "loop-a")[1] == "extends: cycle agents/loop-a -> agents/loop-b -> agents/loop-a"
+        assert "cycle" in resolver.resolve("agents", "loop-b")[1]
+        assert resolver.resolve("agents", "orphan")[1] == "extends: unknown config 'nowhere'"
+
+    def test_cross_kind_reference(self, extends_project):
+        from agentspec_cli.catalog import Resolver
+        data, error = Resolver(extends_project).resolve("skills", "uses-agent")
+        assert error is None
+        assert data["version"] == "1.0.0"
+
+    def test_validate_and_list_see_resolved_view(self, runner, extends_project):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["validate", "--project-dir", str(extends_project)])
+        assert "child: valid" in result.output
+        assert "grandchild: valid" in result.output
+        assert "loop-a: extends: cycle" in result.output
+        assert "orphan: extends: unknown config" in result.output
+        result = runner.invoke(app, ["list", "--project-dir", str(extends_project)])
+        assert "child (v1.0.0) - shared" in result.output
+        assert "grandchild (v1.0.0) - leaf" in result.output
+
+    def test_since_revalidates_dependents(self, runner, extends_project):
+        from agentspec_cli.commands import app
+        _git(extends_project, "init", "-q")
+        _git(extends_project, "add", "-A")
+        _git(extends_project, "commit", "-qm", "init")
+        (extends_project / "agents" / "base" / "agent.yaml").write_text("name: base\n")
+        result = runner.invoke(app, ["validate", "--project-dir", str(extends_project), "--since", "HEAD"])
+        assert "grandchild: missing fields: version" in result.output
+        assert "child: missing fields: description, version" in result.output
+        assert "uses-agent: missing fields" in result.output
+        assert "loop-a" not in result.output
+
+    def test_list_reports_broken_chains_like_validate(self, runner, extends_project):
+        from agentspec_cli.commands import app
+        # Complete headers, so only the chain itself is wrong.
+        for name, base in [("loop-a", "loop-b"), ("loop-b", "loop-a"), ("orphan", "nowhere")]:
+            (extends_project / "agents" / name / "agent.yaml").write_text(
+                f"name: {name}\ndescription: d\nversion: 1.0.0\nextends: {base}\n"
+            )
+        for extra in ([], ["--stream"]):
+            result = runner.invoke(app, ["list", "--project-dir", str(extends_project), *extra])
+            assert "loop-a (invalid yaml)" in result.output
+            assert "orphan (invalid yaml)" in result.output
+            assert "child (v1.0.0) - shared" in result.output
+
+    def test_since_revalidates_children_of_deleted_base(self, runner, extends_project):
+        from agentspec_cli.commands import app
+        _git(extends_project, "init", "-q")
+        _git(extends_project, "add", "-A")
+        _git(extends_project, "commit", "-qm", "init")
+        _git(extends_project, "rm", "-rq", "agents/base")
+        result = runner.invoke(app, ["validate", "--project-dir", str(extends_project), "--since", "HEAD"])
+        assert result.exit_code == 1
+        assert "child: extends 'base': extends: unknown config 'base'" not in result.output
+        assert "child: extends: unknown config 'base'" in result.output
+        assert "grandchild: extends 'child'" in result.output
+        assert "uses-agent: extends: unknown config 'agents/base'" in result.output
+
+    def test_new_agent_extends(self, runner, extends_project):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, [
+            "new-agent", "--name", "slim", "--description", "Slim agent", "--extends", "base",
+            "--project-dir", str(extends_project), "--non-interactive",
+        ])
+        assert result.exit_code == 0
+        text = (extends_project / "agents" / "slim" / "agent.yaml").read_text()
+        assert "extends: base" in text
+        assert "model_preferences" not in text
+
+
+@pytest.fixture
+def eval_project(tmp_path):
+    for name in ["echo", "strict"]:
+        d = tmp_path / "agents" / name
+        d.mkdir(parents=True)
+        (d / "agent.yaml").write_text(f"name: {name}\ndescription: test\nversion: 1.0.0\nsystem_prompt: Be {name}.\n")
+    (tmp_path / "agents" / "echo" / "evals.yaml").write_text(
+        "cases:\n"
+        "  - name: greeting\n    input: hello world\n    expect:\n      contains: [hello]\n"
+        "  - input: release notes\n    expect:\n      regex: 'notes$'\n      not_contains: [error]\n"
+    )
+    (tmp_path / "agents" / "strict" / "evals.yaml").write_text(
+        "cases:\n  - name: exact\n    input: ping\n    expect:\n      equals: pong\n"
+    )
+    return tmp_path
+
+
+class TestEval:
+    def test_reports_pass_and_fail(self, runner, eval_project):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["eval", "--project-dir", str(eval_project)])
+        assert result.exit_code == 1
+        assert "echo: 2/2 passed" in result.output
+        assert "strict: 0/1 passed" in result.output
+        assert "exact: output does not equal expected text" in result.output
+        assert "p95" in result.output
+
+    def test_invalid_regex_is_a_suite_error(self, runner, eval_project):
+        from agentspec_cli.commands import app
+        (eval_project / "agents" / "strict" / "evals.yaml").write_text(
+            "cases:\n  - input: ping\n    expect:\n      regex: '(unclosed'\n"
+        )
+        result = runner.invoke(app, ["eval", "--project-dir", str(eval_project)])
+        assert result.exit_code == 1
+        assert result.exception is None or isinstance(result.exception, SystemExit)
+        assert "invalid regex" in result.output
+        assert "echo: 2/2 passed" in result.output
+
+    def test_agent_filter(self, runner, eval_project):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["eval", "echo", "--project-dir", str(eval_project)])
+        assert result.exit_code == 0
+        assert "strict" not in result.output
+
+    def test_responses_are_cached_by_content(self, eval_project):
+        from agentspec_cli import backends, evals
+        backend = backends.StubBackend()
+        cache = evals.ResponseCache(evals.cache_dir(eval_project))
+        suites = evals.collect(eval_project, ["echo"])
+        assert evals.run(backend, suites, cache)[0]["cached"] == 0
+        with patch.object(backends.StubBackend, "complete", side_effect=AssertionError("not cached")):
+            assert evals.run(backend, suites, cache)[0]["cached"] == 2
+        (eval_project / "agents" / "echo" / "prompt.md").write_text("# new instructions\n")
+        assert evals.run(backend, evals.collect(eval_project, ["echo"]), cache)[0]["cached"] == 0
+
+    def test_backend_without_complete_cannot_be_created(self):
+        from agentspec_cli import backends
+
+        class Incomplete(backends.Backend):
+            name = "incomplete"
+
+        with pytest.raises(TypeError):
+            Incomplete()
+
+    def test_concurrency_limit(self, eval_project):
+        import asyncio
+        from agentspec_cli import backends, evals
+
+        class Counting(backends.StubBackend):
+            active = peak = 0
+
+            async def complete(self, messages):
+                Counting.active += 1
+                Counting.peak = max(Counting.peak, Counting.active)
+                await asyncio.sleep(0.01)
+                Counting.active -= 1
+                return backends.stub_reply(messages)
+
+        cases = "".join(f"  - input: case {i}\n" for i in range(12))
+        (eval_project / "agents" / "echo" / "evals.yaml").write_text(f"cases:\n{cases}")
+        reports = evals.run(Counting(concurrency=3), evals.collect(eval_project, ["echo"]), evals.ResponseCache(None))
+        assert reports[0]["passed"] == 12
+        assert Counting.peak == 3
+
+    def test_http_backend_against_stub_server(self, runner, eval_project):
+        import threading
+        from agentspec_cli.backends import StubServer
+        from agentspec_cli.commands import app
+        server = StubServer()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            result = runner.invoke(app, [
+                "eval", "echo", "--project-dir", str(eval_project), "--backend", server.url, "--no-cache",
+            ])
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert result.exit_code == 0
+        assert "echo: 2/2 passed" in result.output
+
+    def test_percentile(self):
+        from agentspec_cli.evals import percentile
+        assert percentile([], 50) == 0.0
+        assert percentile([3, 1, 2, 4], 50) == 2
+        assert percentile(list(range(1, 101)), 95) == 95
+
+
+@pytest.fixture
+def render_project(tmp_path):
+    d = tmp_path / "agents" / "greeter"
+    d.mkdir(parents=True)
+    (d / "agent.yaml").write_text(
+        "name: greeter\ndescription: test\nversion: 1.0.0\n"
+        "system_prompt: Greet {{ user }} in {{lang}}.\n"
+        "inputs:\n"
+        "  - name: user\n    required: true\n"
+        "  - name: lang\n    default: English\n"
+        "  - name: tone\n"
+    )
+    (d / "prompt.md").write_text("Reply to {{user}}.\n")
+    return tmp_path
+
+
+class TestRender:
+    def test_template_fills_inputs_and_defaults(self, render_project):
+        from agentspec_cli.render import Renderer
+        renderer = Renderer.from_config(render_project, "greeter")
+        assert renderer.render({"user": "Ada"}) == "Greet Ada in English.\n\nReply to Ada."
+        assert renderer.render({"user": "Ada", "lang": "French", "tone": "warm"}).endswith(
+            "Reply to Ada.\n\n## Inputs\n\n- tone: warm"
+        )
+
+    def test_missing_required_input(self, render_project):
+        from agentspec_cli.render import Renderer
+        with pytest.raises(ValueError, match="missing required inputs: user"):
+            Renderer.from_config(render_project, "greeter").render({"lang": "German"})
+
+    def test_render_command_writes_jsonl(self, runner, render_project):
+        from agentspec_cli.commands import app
+        inputs = render_project / "inputs.jsonl"
+        inputs.write_text('{"user": "Ada"}\n{"lang": "Latin"}\nnot json\n{"user": "Lin"}\n')
+        out = render_project / "out.jsonl"
+        result = runner.invoke(app, [
+            "render", "greeter", "--inputs", str(inputs), "--output", str(out), "--project-dir", str(render_project),
+        ])
+        assert result.exit_code == 1
+        rows = [json.loads(line) for line in out.read_text().splitlines()]
+        assert [r["index"] for r in rows] == [0, 1, 2, 3]
+        assert rows[0]["prompt"].startswith("Greet Ada")
+        assert rows[1]["error"] == "missing required inputs: user"
+        assert rows[2]["error"].startswith("invalid JSON")
+        assert rows[3]["prompt"].startswith("Greet Lin")
+
+    def test_process_pool_preserves_order(self, render_project):
+        from agentspec_cli import render
+        renderer = render.Renderer.from_config(render_project, "greeter")
+        lines = [json.dumps({"user": f"u{i}"}) for i in range(50)]
+        with patch.object(render, "CHUNK_SIZE", 7):
+            pooled = list(renderer.render_lines(lines, jobs=2))
+        assert pooled == list(renderer.render_lines(lines))
+
+    def test_unknown_agent(self, runner, render_project):
+        from agentspec_cli.commands import app
+        (render_project / "in.jsonl").write_text("{}\n")
+        result = runner.invoke(app, [
+            "render", "nobody", "--inputs", str(render_project / "in.jsonl"), "--project-dir", str(render_project),
+        ])
+        assert result.exit_code == 1
+
+
+class TestCheckInputs:
+    def test_compiled_spec(self):
+        from agentspec_cli.inputs import compile_inputs
+        spec = compile_inputs({"inputs": [
+            {"name": "requirement", "required": True},
+            {"name": "project_key", "default": "PROJ"},
+            {"name": "epic"},
+        ]})
+        missing, unknown, defaulted = spec.check({"requirement": None, "extra": 1})
+        assert missing == {"requirement"}
+        assert unknown == {"extra"}
+        assert defaulted == {"project_key"}
+        assert spec.check({"requirement": "x", "project_key": "AB"}) == (set(), set(), set())
+
+    def test_required_input_with_default_agrees_with_render(self):
+        from agentspec_cli.inputs import compile_inputs
+        spec = compile_inputs({"inputs": [{"name": "project_key", "required": True, "default": "PROJ"}]})
+        missing, _, defaulted = spec.check({})
+        assert missing == set() and defaulted == {"project_key"}
+        assert spec.apply({}) == ({"project_key": "PROJ"}, [])
+        assert spec.check({"project_key": None})[0] == {"project_key"}
+        assert spec.apply({"project_key": None})[1] == ["project_key"]
+
+    def test_mixed_log_report(self, runner, project_root, tmp_path):
+        from agentspec_cli.commands import app
+        log = tmp_path / "log.jsonl"
+        log.write_text("\n".join([
+            json.dumps({"agent": "jira-story-creator", "inputs": {"requirement": "login", "priority": "high"}}),
+            json.dumps({"agent": "jira-story-creator", "inputs": {"epic": "auth"}}),
+            json.dumps({"agent": "adr-creator", "inputs": {"decision_topic": "queues"}}),
+            json.dumps({"agent": "ghost", "inputs": {}}),
+            "{broken",
+        ]) + "\n")
+        result = runner.invoke(app, ["check-inputs", str(log), "--project-dir", str(project_root), "--json"])
+        assert result.exit_code == 1
+        report = json.loads(result.output)
+        assert report["records"] == 5
+        jira = report["agents"]["jira-story-creator"]
+        assert jira["records"] == 2
+        assert jira["invalid"] == 1
+        assert jira["missing"] == {"requirement": 1}
+        assert jira["unknown"] == {"priority": 1}
+        assert jira["defaulted"] == {"project_key": 2, "num_stories": 2}
+        assert report["agents"]["adr-creator"]["invalid"] == 0
+        assert report["errors"] == {"no agent or skill named 'ghost'": 1, "invalid JSON": 1}
+
+    def test_single_agent_log(self, runner, project_root, tmp_path):
+        from agentspec_cli.commands import app
+        log = tmp_path / "log.jsonl"
+        log.write_text('{"decision_topic": "a"}\n{"decision_topic": "b", "owner": "x"}\n')
+        args = ["check-inputs", str(log), "--agent", "adr-creator", "--project-dir", str(project_root)]
+        result = runner.invoke(app, args)
+        assert result.exit_code == 0
+        assert "adr-creator: 2 record(s), 0 invalid" in result.output
+        assert "unknown: owner (1)" in result.output
+        assert "records/s" in result.output
+        assert runner.invoke(app, args + ["--strict"]).exit_code == 1
+
+
+@pytest.fixture
+def dag_skill(tmp_path):
+    d = tmp_path / "skills" / "pipeline"
+    d.mkdir(parents=True)
+    (d / "skill.yaml").write_text(
+        "name: pipeline\ndescription: test\nversion: 1.0.0\n"
+        "inputs:\n  - name: topic\n    required: true\n"
+        "steps:\n"
+        "  - name: plan\n"
+        "  - name: left\n    depends_on: [plan]\n"
+        "  - name: right\n    depends_on: [plan]\n"
+        "  - name: merge\n    depends_on: [left, right]\n"
+    )
+    return tmp_path
+
+
+class TestRunSkill:
+    def test_step_dependencies(self):
+        from agentspec_cli.catalog import step_dependencies
+        deps, error = step_dependencies([{"name": "a"}, {"name": "b"}, {"name": "c", "depends_on": []}])
+        assert error is None
+        assert deps == {"a": [], "b": ["a"], "c": []}
+        assert "unknown step 'x'" in step_dependencies([{"name": "a", "depends_on": ["x"]}])[1]
+        cycle = [{"name": "a", "depends_on": ["b"]}, {"name": "b", "depends_on": ["a"]}]
+        assert step_dependencies(cycle)[1] == "steps: dependency cycle involving a, b"
+
+    def test_validate_rejects_step_cycle(self, runner, dag_skill):
+        from agentspec_cli.commands import app
+        yaml_f = dag_skill / "skills" / "pipeline" / "skill.yaml"
+        yaml_f.write_text(yaml_f.read_text().replace("  - name: plan\n", "  - name: plan\n    depends_on: [merge]\n"))
+        result = runner.invoke(app, ["validate", "--project-dir", str(dag_skill)])
+        assert result.exit_code == 1
+        assert "dependency cycle" in result.output
+
+    def test_independent_steps_run_concurrently(self, dag_skill):
+        from agentspec_cli import backends, skillrun
+        plan = skillrun.SkillPlan.from_config(dag_skill, "pipeline")
+        report = skillrun.run(plan, backends.StubBackend(latency=0.05), {"topic": "x"})
+        steps = report["steps"]
+        assert all(r["status"] == "ok" for r in steps.values())
+        assert steps["left"]["start"] < steps["right"]["end"]
+        assert steps["right"]["start"] < steps["left"]["end"]
+        assert steps["merge"]["start"] >= max(steps["left"]["end"], steps["right"]["end"])
+        assert report["wall"] < 0.19
+        assert report["critical_path"][0] == "plan"
+        assert report["critical_path"][-1] == "merge"
+        assert "Output of left" in steps["merge"]["output"]
+
+    def test_failed_step_skips_dependents(self, dag_skill):
+        from agentspec_cli import backends, skillrun
+
+        class Flaky(backends.StubBackend):
+            async def complete(self, messages):
+                if "Step: left" in messages[-1]["content"]:
+                    raise RuntimeError("boom")
+                return await super().complete(messages)
+
+        report = skillrun.run(skillrun.SkillPlan.from_config(dag_skill, "pipeline"), Flaky(), {"topic": "x"})
+        assert report["steps"]["left"]["error"] == "boom"
+        assert report["steps"]["right"]["status"] == "ok"
+        assert report["steps"]["merge"]["status"] == "skipped"
+
+    def test_run_skill_command(self, runner, dag_skill, tmp_path):
+        from agentspec_cli.commands import app
+        trace = tmp_path / "trace.json"
+        result = runner.invoke(app, [
+            "run-skill", "pipeline", "--input", "topic=x", "--project-dir", str(dag_skill), "--trace", str(trace),
+        ])
+        assert result.exit_code == 0
+        assert "Critical path: plan →" in result.output
+        events = json.loads(trace.read_text())["traceEvents"]
+        assert {e["name"] for e in events} == {"plan", "left", "right", "merge"}
+
+    def test_missing_required_input(self, runner, dag_skill):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["run-skill", "pipeline", "--project-dir", str(dag_skill)])
+        assert result.exit_code == 1
+        assert "missing required inputs: topic" in result.output
+
+
+class TestMetrics:
+    def test_catalog_metrics(self, runner, broken_project):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["metrics", "--project-dir", str(broken_project)])
+        assert result.exit_code == 0
+        assert result.output.endswith("# EOF\n")
+        assert "# TYPE agentspec_prompt_bytes histogram" in result.output
+        from agentspec_cli.metrics import parse_samples
+        samples = parse_samples(result.output)
+        total = samples[("agentspec_configs", (("kind", "agents"),))]
+        assert total == len([d for d in (broken_project / "agents").iterdir() if (d / "agent.yaml").exists()])
+        assert samples[("agentspec_configs_invalid", (("kind", "agents"),))] >= 1
+        inf = samples[("agentspec_prompt_bytes_bucket", (("kind", "agents"), ("le", "+Inf")))]
+        assert inf == samples[("agentspec_prompt_bytes_count", (("kind", "agents"),))]
+
+    def test_dir_missing_yaml_counts_as_invalid(self, runner, broken_project):
+        from agentspec_cli.commands import app
+        from agentspec_cli.metrics import parse_samples
+        (broken_project / "agents" / "d-empty").mkdir()
+        samples = parse_samples(runner.invoke(app, ["metrics", "--project-dir", str(broken_project)]).output)
+        assert samples[("agentspec_configs", (("kind", "agents"),))] == 4
+        assert samples[("agentspec_configs_invalid", (("kind", "agents"),))] == 3
+
+    def test_metrics_file_accumulates_across_runs(self, runner, broken_project, tmp_path):
+        from agentspec_cli.commands import app
+        from agentspec_cli.metrics import parse_samples
+        prom = tmp_path / "cli.prom"
+        for _ in range(2):
+            result = runner.invoke(app, ["--metrics-file", str(prom), "validate", "--project-dir", str(broken_project)])
+            assert result.exit_code == 1
+        runner.invoke(app, ["--metrics-file", str(prom), "list", "--project-dir", str(broken_project)])
+        samples = parse_samples(prom.read_text())
+        assert samples[("agentspec_command_runs_total", (("command", "validate"),))] == 2
+        assert samples[("agentspec_command_runs_total", (("command", "list"),))] == 1
+        check = ("agentspec_phase_duration_seconds_count", (("command", "validate"), ("phase", "check")))
+        assert samples[check] == 2
+        errors = samples[("agentspec_events_total", (("command", "validate"), ("event", "validation_errors")))]
+        assert errors >= 2
+        assert prom.read_text().endswith("# EOF\n")
+
+    def test_no_metrics_file_records_nothing(self, runner, broken_project):
+        from agentspec_cli import metrics
+        from agentspec_cli.commands import app
+        with patch.object(metrics.Recorder, "flush") as flush:
+            runner.invoke(app, ["validate", "--project-dir", str(broken_project)])
+        flush.assert_not_called()
+
+
+def _bump_counter(path, times):
+    from agentspec_cli import storage
+
+    def bump(data):
+        counts = json.loads(data) if data else {"n": 0}
+        counts["n"] += 1
+        return json.dumps(counts).encode()
+
+    for _ in range(times):
+        storage.update(path, bump)
+
+
+def _build_once(path, marker):
+    from agentspec_cli import storage
+
+    def build():
+        with open(marker, "a") as f:
+            f.write("built\n")
+        time.sleep(0.2)
+        return "value", b"value"
+
+    return storage.get_or_create(path, lambda data: data.decode() or None, build)
+
+
+class TestStorage:
+    def test_atomic_write_replaces_whole_file(self, tmp_path):
+        from agentspec_cli import storage
+        target = tmp_path / "nested" / "cache.json"
+        storage.atomic_write(target, b"one")
+        storage.atomic_write(target, b"two")
+        assert target.read_bytes() == b"two"
+        assert [p.name for p in target.parent.iterdir()] == ["cache.json"]
+
+    def test_atomic_write_keeps_file_mode(self, tmp_path):
+        from agentspec_cli import storage
+        old_umask = os.umask(0o022)
+        try:
+            created = tmp_path / "metrics.prom"
+            storage.atomic_write(created, b"new")
+            assert created.stat().st_mode & 0o777 == 0o644
+            existing = tmp_path / "run.sh"
+            existing.write_bytes(b"old")
+            existing.chmod(0o755)
+            storage.atomic_write(existing, b"new")
+            assert existing.stat().st_mode & 0o777 == 0o755
+        finally:
+            os.umask(old_umask)
+
+    def test_concurrent_updates_are_not_lost(self, tmp_path):
+        import multiprocessing
+        target = tmp_path / "counter.json"
+        ctx = multiprocessing.get_context("spawn")
+        workers = [ctx.Process(target=_bump_counter, args=(target, 50)) for _ in range(8)]
+        for w in workers:
+            w.start()
+        # Lock-free readers must only ever see complete files.
+        while any(w.is_alive() for w in workers):
+            if target.exists():
+                json.loads(target.read_text())
+        for w in workers:
+            w.join()
+            assert w.exitcode == 0
+        assert json.loads(target.read_text()) == {"n": 400}
+
+    def test_cold_cache_is_built_once(self, tmp_path):
+        from concurrent.futures import ProcessPoolExecutor
+        import multiprocessing
+        target = tmp_path / "index.bin"
+        marker = tmp_path / "builds"
+        with ProcessPoolExecutor(4, mp_context=multiprocessing.get_context("spawn")) as pool:
+            values = list(pool.map(_build_once, [target] * 4, [marker] * 4))
+        assert values == ["value"] * 4
+        assert marker.read_text() == "built\n"
+
+    def test_transaction_commits_all_files(self, tmp_path):
+        from agentspec_cli import storage
+        (tmp_path / "a.yaml").write_text("old")
+        with storage.transaction(tmp_path) as txn:
+            txn.write("a.yaml", b"new")
+            txn.write("b.yaml", b"added")
+        assert (tmp_path / "a.yaml").read_text() == "new"
+        assert (tmp_path / "b.yaml").read_text() == "added"
+        assert not (tmp_path / storage.TXN_DIR).exists()
+
+    def test_failed_transaction_writes_nothing(self, tmp_path):
+        from agentspec_cli import storage
+        (tmp_path / "a.yaml").write_text("old")
+        with pytest.raises(RuntimeError):
+            with storage.transaction(tmp_path) as txn:
+                txn.write("a.yaml", b"new")
+                raise RuntimeError("boom")
+        assert (tmp_path / "a.yaml").read_text() == "old"
+
+    def test_interrupted_commit_is_finished_by_recover(self, tmp_path):
+        from agentspec_cli import storage
+        (tmp_path / "a.yaml").write_text("old")
+        (tmp_path / "b.yaml").write_text("old")
+        real_replace = os.replace
+        calls = []
+
+        def flaky_replace(src, dst):
+            calls.append(dst)
+            if len(calls) == 3:
+                raise OSError("disk went away")
+            real_replace(src, dst)
+
+        # Call 1 writes the journal, call 2 applies a.yaml, call 3 fails on b.yaml.
+        with patch.object(storage.os, "replace", flaky_replace):
+            with pytest.raises(OSError):
+                with storage.transaction(tmp_path) as txn:
+                    txn.write("a.yaml", b"new")
+                    txn.write("b.yaml", b"new")
+        assert (tmp_path / storage.TXN_DIR / storage.JOURNAL_NAME).exists()
+        storage.recover(tmp_path)
+        assert (tmp_path / "a.yaml").read_text() == "new"
+        assert (tmp_path / "b.yaml").read_text() == "new"
+        assert not (tmp_path / storage.TXN_DIR).exists()
+
+    def test_recover_replays_committed_journal(self, tmp_path):
+        from agentspec_cli import storage
+        staging = tmp_path / storage.TXN_DIR
+        staging.mkdir(parents=True)
+        (tmp_path / "a.yaml").write_text("old")
+        (staging / "0.tmp").write_text("new")
+        (staging / storage.JOURNAL_NAME).write_text(json.dumps([["0.tmp", "a.yaml"]]))
+        storage.recover(tmp_path)
+        assert (tmp_path / "a.yaml").read_text() == "new"
+        assert not staging.exists()
+
+    def test_recover_drops_uncommitted_staging(self, tmp_path):
+        from agentspec_cli import storage
+        staging = tmp_path / storage.TXN_DIR
+        staging.mkdir(parents=True)
+        (tmp_path / "a.yaml").write_text("old")
+        (staging / "0.tmp").write_text("new")
+        storage.recover(tmp_path)
+        assert (tmp_path / "a.yaml").read_text() == "old"
+        assert not staging.exists()
+
+
+MIGRATION_YAML = """\
+steps:
+  - replace: {key: model_preferences, from: gpt-4, to: gpt-4o}
+  - rename: {from: author, to: owner}
+  - set_default: {key: team, value: platform}
+"""
+
+COMMENTED_AGENT = """\
+# Owned by the docs team
+name: commented
+description: Has comments
+version: 1.0.0
+author: docs  # primary contact
+model_preferences:
+  - gpt-4  # default
+  - claude-sonnet
+tags: [docs]
+"""
+
+
+@pytest.fixture
+def migration_project(tmp_path):
+    d = tmp_path / "agents" / "commented"
+    d.mkdir(parents=True)
+    (d / "agent.yaml").write_text(COMMENTED_AGENT)
+    done = tmp_path / "agents" / "done"
+    done.mkdir()
+    (done / "agent.yaml").write_text("name: done\ndescription: d\nversion: 1.0.0\nowner: x\nteam: y\n")
+    (tmp_path / "migration.yaml").write_text(MIGRATION_YAML)
+    return tmp_path
+
+
+class TestMigrate:
+    def test_rewrite_preserves_comments_and_order(self, runner, migration_project):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["migrate", str(migration_project / "migration.yaml"),
+                                     "--project-dir", str(migration_project)])
+        assert result.exit_code == 0
+        assert "1 changed, 1 unchanged, 0 failed" in result.output
+        text = (migration_project / "agents" / "commented" / "agent.yaml").read_text()
+        assert text == COMMENTED_AGENT.replace("author:", "owner:").replace("gpt-4  #", "gpt-4o  #") + "team: platform\n"
+
+    def test_broken_python_migration_is_a_clean_error(self, runner, migration_project):
+        from agentspec_cli.commands import app
+        for name, source in [("syntax.py", "def migrate(doc)\n"), ("raises.py", "raise RuntimeError('no config')\n")]:
+            (migration_project / name).write_text(source)
+            result = runner.invoke(app, ["migrate", str(migration_project / name), "--project-dir", str(migration_project)])
+            assert result.exit_code == 1
+            assert isinstance(result.exception, SystemExit)
+            assert "Error:" in result.output
+
+    def test_unchanged_files_are_not_written(self, runner, migration_project):
+        from agentspec_cli.commands import app
+        done = migration_project / "agents" / "done" / "agent.yaml"
+        before = done.stat().st_mtime_ns
+        os.utime(done, ns=(before - 10**9, before - 10**9))
+        runner.invoke(app, ["migrate", str(migration_project / "migration.yaml"), "--project-dir", str(migration_project)])
+        assert done.stat().st_mtime_ns == before - 10**9
+
+    def test_dry_run_writes_nothing(self, runner, migration_project):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["migrate", str(migration_project / "migration.yaml"),
+                                     "--project-dir", str(migration_project), "--dry-run"])
+        assert result.exit_code == 0
+        assert "agents/commented/agent.yaml (+3 -2)" in result.output
+        assert "Dry run" in result.output
+        assert (migration_project / "agents" / "commented" / "agent.yaml").read_text() == COMMENTED_AGENT
+
+    def test_python_migration_on_process_pool(self, runner, migration_project):
+        from agentspec_cli.commands import app
+        (migration_project / "bump.py").write_text(
+            "def migrate(doc):\n"
+            "    doc.set('description', doc.get('description') + ' (' + doc.name + ')')\n"
+        )
+        result = runner.invoke(app, ["migrate", str(migration_project / "bump.py"),
+                                     "--project-dir", str(migration_project), "--jobs", "2"])
+        assert result.exit_code == 0
+        assert "2 changed" in result.output
+        text = (migration_project / "agents" / "commented" / "agent.yaml").read_text()
+        assert "description: Has comments (commented)\n" in text
+        assert text.startswith("# Owned by the docs team\n")
+
+    def test_failure_leaves_every_file_untouched(self, runner, migration_project):
+        from agentspec_cli.commands import app
+        (migration_project / "agents" / "broken").mkdir()
+        (migration_project / "agents" / "broken" / "agent.yaml").write_text("name: [unclosed\n")
+        result = runner.invoke(app, ["migrate", str(migration_project / "migration.yaml"),
+                                     "--project-dir", str(migration_project)])
+        assert result.exit_code == 1
+        assert "agents/broken/agent.yaml" in result.output
+        assert (migration_project / "agents" / "commented" / "agent.yaml").read_text() == COMMENTED_AGENT
+
+    def test_unknown_operation_is_rejected(self, runner, migration_project):
+        from agentspec_cli.commands import app
+        (migration_project / "bad.yaml").write_text("steps:\n  - explode: {key: x}\n")
+        result = runner.invoke(app, ["migrate", str(migration_project / "bad.yaml"), "--project-dir", str(migration_project)])
+        assert result.exit_code == 1
+        assert "unknown operation 'explode'" in result.output
+
+
+MESSY_AGENT = """\
+tags: [docs, writing]
+version: 1.0.0
+name: messy
+system_prompt: "You write docs.\\nKeep them short.\\n"
+description: Needs formatting
+inputs:
+- {required: true, name: topic}
+"""
+
+CANONICAL_AGENT = """\
+name: messy
+description: Needs formatting
+version: 1.0.0
+tags:
+  - docs
+  - writing
+
+system_prompt: |
+  You write docs.
+  Keep them short.
+
+inputs:
+  - name: topic
+    required: true
+"""
+
+
+@pytest.fixture
+def fmt_project(tmp_path):
+    for name, text in [("messy", MESSY_AGENT), ("tidy", CANONICAL_AGENT.replace("messy", "tidy")),
+                       ("commented", COMMENTED_AGENT)]:
+        d = tmp_path / "agents" / name
+        d.mkdir(parents=True)
+        (d / "agent.yaml").write_text(text)
+    return tmp_path
+
+
+class TestFmt:
+    def test_rewrites_to_canonical_layout(self, runner, fmt_project):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["fmt", "--project-dir", str(fmt_project)])
+        assert result.exit_code == 0
+        assert "2 formatted, 1 already formatted, 0 failed" in result.output
+        assert (fmt_project / "agents" / "messy" / "agent.yaml").read_text() == CANONICAL_AGENT
+        assert (fmt_project / "agents" / "commented" / "agent.yaml").read_text() == COMMENTED_AGENT.replace(
+            "tags: [docs]\n", "tags:\n  - docs\n"
+        )
+
+    def test_check_lists_files_and_fails(self, runner, fmt_project):
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["fmt", "--check", "--project-dir", str(fmt_project)])
+        assert result.exit_code == 1
+        assert "agents/messy/agent.yaml" in result.output
+        assert "agents/tidy/agent.yaml" not in result.output
+        assert (fmt_project / "agents" / "messy" / "agent.yaml").read_text() == MESSY_AGENT
+
+    def test_canonical_output_is_stable(self):
+        from agentspec_cli.fmt import format_text
+        assert format_text(MESSY_AGENT) == CANONICAL_AGENT
+        assert format_text(CANONICAL_AGENT) == CANONICAL_AGENT
+
+    def test_bundled_configs_are_formatted(self, project_root):
+        from agentspec_cli.fmt import format_file, iter_config_files
+        statuses = {rel: format_file(rel, path)[1] for rel, path in iter_config_files(project_root)}
+        assert statuses and set(statuses.values()) == {"ok"}
+
+    def test_cache_skips_unchanged_files(self, runner, fmt_project):
+        from agentspec_cli import fmt
+        from agentspec_cli.commands import app
+        runner.invoke(app, ["fmt", "--project-dir", str(fmt_project)])
+        with patch.object(fmt, "format_file", wraps=fmt.format_file) as formatted:
+            result = runner.invoke(app, ["fmt", "--check", "--project-dir", str(fmt_project)])
+        assert result.exit_code == 0
+        formatted.assert_not_called()
+        (fmt_project / "agents" / "tidy" / "agent.yaml").write_text(MESSY_AGENT)
+        with patch.object(fmt, "format_file", wraps=fmt.format_file) as formatted:
+            result = runner.invoke(app, ["fmt", "--check", "--project-dir", str(fmt_project)])
+        assert result.exit_code == 1
+        assert [c.args[0] for c in formatted.call_args_list] == ["agents/tidy/agent.yaml"]
+
+    def test_commented_files_are_formatted_keeping_comments(self, runner, tmp_path):
+        from agentspec_cli.commands import app
+        from agentspec_cli.fmt import format_text
+        text = (
+            "# Owned by docs\n\nversion: 1.0.0\n# shown in listings\nname: hand-edited\n"
+            "tags: [a,   b]  # keep\ndescription: d\nsystem_prompt: \"Line one\\nLine two\\n\"\n"
+        )
+        d = tmp_path / "agents" / "hand-edited"
+        d.mkdir(parents=True)
+        (d / "agent.yaml").write_text(text)
+        result = runner.invoke(app, ["fmt", "--check", "--project-dir", str(tmp_path)])
+        assert result.exit_code == 1
+        assert "1 need formatting" in result.output
+        formatted = format_text(text)
+        assert formatted == (
+            "# Owned by docs\n\n# shown in listings\nname: hand-edited\ndescription: d\nversion: 1.0.0\n"
+            "tags: [a,   b]  # keep\n\nsystem_prompt: |\n  Line one\n  Line two\n"
+        )
+        assert format_text(formatted) == formatted
+        runner.invoke(app, ["fmt", "--project-dir", str(tmp_path)])
+        result = runner.invoke(app, ["fmt", "--check", "--project-dir", str(tmp_path)])
+        assert result.exit_code == 0
+
+    def test_hash_in_comment_free_scalar_is_not_a_comment(self):
+        from agentspec_cli.fmt import has_comments
+        assert not has_comments("name: x\ndescription: 'Use # for headings'\ntag: c#\n")
+        assert has_comments("name: x  # trailing\n")
+
+    def test_generated_configs_are_formatted(self, runner, tmp_path):
+        from agentspec_cli.commands import app, create_agent
+        from agentspec_cli.fmt import format_text
+        create_agent(tmp_path, "plain", "A plain agent", tags=["a", "b"])
+        create_agent(tmp_path, "child", "Extends plain", extends="plain")
+        runner.invoke(app, ["new-skill", "--name", "steps", "--description", "A skill",
+                            "--non-interactive", "--project-dir", str(tmp_path)])
+        for path in [tmp_path / "agents" / "plain" / "agent.yaml", tmp_path / "agents" / "child" / "agent.yaml",
+                     tmp_path / "skills" / "steps" / "skill.yaml"]:
+            text = path.read_text()
+            assert format_text(text) == text, path
+
+
+def _stats_agent(name, author, tags, models, inputs, required=0, extra=""):
+    tag_lines = "".join(f"  - {t}\n" for t in tags)
+    model_lines = "".join(f"  - {m}\n" for m in models)
+    input_lines = "".join(
+        f"  - name: in{i}\n    required: {'true' if i < required else 'false'}\n" for i in range(inputs)
+    )
+    return (
+        f"name: {name}\ndescription: d\nversion: 1.0.0\nauthor: {author}\n{extra}"
+        + (f"model_preferences:\n{model_lines}" if models else "")
+        + (f"tags:\n{tag_lines}" if tags else "")
+        + f"system_prompt: {'x' * 100}\n"
+        + (f"inputs:\n{input_lines}" if inputs else "")
+    )
+
+
+@pytest.fixture
+def stats_project(tmp_path):
+    agents = {
+        "one": _stats_agent("one", "ana", ["docs", "writing"], ["gpt-4", "claude-sonnet"], 2, required=1),
+        "two": _stats_agent("two", "ana", ["docs"], ["claude-sonnet"], 4, required=2),
+        "three": _stats_agent("three", "bo", ["ops"], [], 0),
+    }
+    for name, text in agents.items():
+        d = tmp_path / "agents" / name
+        d.mkdir(parents=True)
+        (d / "agent.yaml").write_text(text)
+    return tmp_path
+
+
+class TestStats:
+    def test_aggregates(self, stats_project):
+        pytest.importorskip("numpy")
+        from agentspec_cli import stats
+        features, reread = stats.load_features(stats_project)
+        assert reread == 3
+        report = stats.summarize(features)
+        assert report["configs"] == {"agents": 3, "skills": 0}
+        assert report["tags"][0] == {"tag": "docs", "configs": 2}
+        assert report["models"][0] == {"model": "claude-sonnet", "configs": 2, "primary": 1}
+        assert report["models_per_config"] == {"0": 1, "1": 1, "2": 1}
+        ana = next(a for a in report["authors"] if a["author"] == "ana")
+        assert ana == {"author": "ana", "configs": 2, "mean_inputs": 3.0, "mean_required_inputs": 1.5, "max_inputs": 4}
+        assert report["inputs"]["max"] == 4
+        assert report["prompt_bytes"]["histogram"]["<=256"] == 3
+
+    def test_cache_rereads_only_changed_configs(self, stats_project):
+        pytest.importorskip("numpy")
+        from agentspec_cli import stats
+        stats.load_features(stats_project)
+        assert stats.load_features(stats_project)[1] == 0
+        (stats_project / "agents" / "three" / "agent.yaml").write_text(
+            _stats_agent("three", "bo", ["docs", "ops"], ["gpt-4"], 1)
+        )
+        features, reread = stats.load_features(stats_project)
+        assert reread == 1
+        cold, _ = stats.refresh(stats_project)
+        assert json.dumps(stats.summarize(features, top=None), sort_keys=True) == json.dumps(
+            stats.summarize(cold, top=None), sort_keys=True
+        )
+        assert stats.summarize(features)["tags"][0] == {"tag": "docs", "configs": 3}
+
+    def test_changed_base_rereads_extending_config(self, stats_project):
+        pytest.importorskip("numpy")
+        from agentspec_cli import stats
+        child = stats_project / "agents" / "child"
+        child.mkdir()
+        (child / "agent.yaml").write_text("name: child\ndescription: d\nversion: 1.0.0\nextends: two\n")
+        stats.load_features(stats_project)
+        (stats_project / "agents" / "two" / "agent.yaml").write_text(
+            _stats_agent("two", "ana", ["docs"], ["claude-sonnet"], 6)
+        )
+        features, reread = stats.load_features(stats_project)
+        assert reread == 2
+        assert stats.summarize(features)["inputs"]["max"] == 6
+        ana = next(a for a in stats.summarize(features)["authors"] if a["author"] == "ana")
+        assert ana["configs"] == 3
+
+    def test_creating_missing_base_rereads_extending_config(self, stats_project):
+        pytest.importorskip("numpy")
+        from agentspec_cli import stats
+        child = stats_project / "agents" / "child"
+        child.mkdir()
+        (child / "agent.yaml").write_text("name: child\ndescription: d\nversion: 1.0.0\nextends: later\n")
+        assert stats.summarize(stats.load_features(stats_project)[0])["invalid"] == 1
+        assert stats.load_features(stats_project)[1] == 0
+        later = stats_project / "agents" / "later"
+        later.mkdir()
+        (later / "agent.yaml").write_text(_stats_agent("later", "ana", ["docs"], ["claude-sonnet"], 1))
+        features, reread = stats.load_features(stats_project)
+        assert reread == 2
+        assert stats.summarize(features)["invalid"] == 0
+
+    def test_stats_command_formats(self, runner, stats_project):
+        pytest.importorskip("numpy")
+        from agentspec_cli.commands import app
+        result = runner.invoke(app, ["stats", "--project-dir", str(stats_project), "--json"])
+        assert result.exit_code == 0
+        assert json.loads(result.output)["configs"]["agents"] == 3
+        result = runner.invoke(app, ["stats", "--project-dir", str(stats_project), "--csv"])
+        assert result.output.splitlines()[0] == "section,key,metric,value"
+        assert "tags,docs,configs,2" in result.output.splitlines()
+        result = runner.invoke(app, ["stats", "--project-dir", str(stats_project), "--kind", "skills"])
+        assert result.exit_code == 0
+        assert "0 (0 skills)" in result.output
+
+
+class TestAPI:
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self):
+        from agentspec_cli import api
+        api.clear_cache()
+        yield
+        api.clear_cache()
+
+    def test_get_agent_resolves_extends(self, git_project):
+        from agentspec_cli import api
+        (git_project / "agents" / "child").mkdir()
+        (git_project / "agents" / "child" / "agent.yaml").write_text("name: child\nextends: alpha\n")
+        api.load_catalog(git_project)
+        child = api.get_agent("child")
+        assert child["name"] == "child"
+        assert child["version"] == api.get_agent("alpha")["version"]
+
+    def test_lookups_hit_the_cache_until_a_file_changes(self, git_project):
+        from agentspec_cli import api, catalog
+        api.load_catalog(git_project)
+        with patch.object(catalog, "load_config", side_effect=AssertionError("re-parsed")):
+            assert api.get_agent("alpha")["name"] == "alpha"
+            assert len(list(api.iter_agents())) == 3
+        path = git_project / "agents" / "alpha" / "agent.yaml"
+        path.write_text(path.read_text().replace("version: 1.0.0", "version: 2.0.10"))
+        assert api.get_agent("alpha")["version"] == "2.0.10"
+
+    def test_load_catalog_is_shared_per_directory(self, git_project):
+        from agentspec_cli import api
+        assert api.load_catalog(git_project) is api.load_catalog(str(git_project))
+
+    def test_returned_configs_are_copies(self, git_project):
+        from agentspec_cli import api
+        api.load_catalog(git_project)
+        api.get_agent("alpha")["name"] = "mutated"
+        assert api.get_agent("alpha")["name"] == "alpha"
+
+    def test_missing_and_invalid_configs(self, broken_project):
+        from agentspec_cli import api
+        api.load_catalog(broken_project)
+        with pytest.raises(KeyError):
+            api.get_agent("nope")
+        errors = api.validate()
+        assert errors and all(key.startswith("agents/") for key in errors)
+        bad = next(iter(errors)).split("/", 1)[1]
+        with pytest.raises(ValueError, match=bad):
+            api.get_agent(bad)
+        assert all(a["name"] not in {k.split("/", 1)[1] for k in errors} for a in api.iter_agents())
+
+    def test_validate_reports_missing_yaml(self, git_project):
+        from agentspec_cli import api
+        (git_project / "agents" / "empty").mkdir()
+        assert api.validate(git_project) == {"agents/empty": "missing agent.yaml"}
+
+    def test_iter_skills(self, project_root):
+        from agentspec_cli import api
+        skills = list(api.iter_skills(project_root))
+        assert [s["name"] for s in skills] == ["jira-story-creator"]
+        assert api.validate(project_root) == {}
+
+
+ROUTES_YAML = """\
+default: [small-model]
+overrides:
+  - tag: docs
+    prepend: [doc-model]
+    exclude: [gpt-4]
+  - tag: ops
+    models: [ops-model, small-model]
+"""
+
+
+class TestRoutes:
+    def test_build_applies_default_and_tag_overrides(self, stats_project):
+        from agentspec_cli import routes
+        (stats_project / "routes.yaml").write_text(ROUTES_YAML)
+        table, skipped = routes.build(stats_project)
+        assert skipped == []
+        assert table == {
+            "one": ["doc-model", "claude-sonnet"],
+            "two": ["doc-model", "claude-sonnet"],
+            "three": ["ops-model", "small-model"],
+        }
+
+    def test_without_rules_routes_are_model_preferences(self, stats_project):
+        from agentspec_cli import routes
+        table, _ = routes.build(stats_project)
+        assert table == {"one": ["gpt-4", "claude-sonnet"], "two": ["claude-sonnet"], "three": []}
+
+    def test_routes_follow_extends(self, extends_project):
+        from agentspec_cli import routes
+        table, skipped = routes.build(extends_project)
+        assert table["child"] == table["grandchild"] == ["gpt-4"]
+        assert {name for name, _ in skipped} == {"loop-a", "loop-b", "orphan"}
+
+    def test_json_and_binary_tables_agree(self, tmp_path):
+        from agentspec_cli import routes
+        table = {f"agent-{i}": [f"model-{i % 7}", f"model-{(i + 3) % 7}"] for i in range(500)}
+        table["empty"] = []
+        table["ünïcode"] = ["modèle"]
+        for name in ("routes.json", "routes.bin"):
+            routes.write(tmp_path / name, table)
+            reader = routes.RouteTable.open(tmp_path / name)
+            assert len(reader) == len(table)
+            assert sorted(reader) == sorted(table)
+            for agent, models in table.items():
+                assert reader[agent] == tuple(models)
+            assert reader.get("missing") is None and "missing" not in reader
+            with pytest.raises(KeyError):
+                reader["missing"]
+
+    def test_table_without_lookups_cannot_be_created(self):
+        from agentspec_cli import routes
+
+        class Incomplete(routes.RouteTable):
+            def get(self, agent):
+                return None
+
+        with pytest.raises(TypeError):
+            Incomplete()
+
+    def test_bad_rules_are_reported(self, stats_project, runner):
+        from agentspec_cli.commands import app
+        (stats_project / "routes.yaml").write_text("overrides:\n  - tag: docs\n")
+        result = runner.invoke(app, ["routes", "build", "--project-dir", str(stats_project)])
+        assert result.exit_code == 1
+        assert "overrides[0]" in result.output
+
+    def test_build_and_lookup_cli(self, stats_project, runner, monkeypatch, tmp_path_factory):
+        from agentspec_cli.commands import app
+        (stats_project / "routes.yaml").write_text(ROUTES_YAML)
+        (stats_project / "agents" / "broken").mkdir()
+        (stats_project / "agents" / "broken" / "agent.yaml").write_text("name: broken\n")
+        result = runner.invoke(app, ["routes", "build", "--project-dir", str(stats_project), "--binary", "--plain"])
+        assert result.exit_code == 0, result.output
+        assert "3 agents routed, 1 skipped (invalid)" in result.output
+        assert (stats_project / "routes.json").exists() and (stats_project / "routes.bin").exists()
+
+        monkeypatch.chdir(stats_project)
+        result = runner.invoke(app, ["routes", "lookup", "three"])
+        assert result.exit_code == 0
+        assert result.output == "ops-model\nsmall-model\n"
+        result = runner.invoke(app, ["routes", "lookup", "one", "--table", str(stats_project / "routes.json")])
+        assert result.output == "doc-model\nclaude-sonnet\n"
+        result = runner.invoke(app, ["routes", "lookup", "broken"])
+        assert result.exit_code == 1
+        monkeypatch.chdir(tmp_path_factory.mktemp("elsewhere"))
+        result = runner.invoke(app, ["routes", "lookup", "three", "--project-dir", str(stats_project)])
+        assert result.output == "ops-model\nsmall-model\n"
+
+
+@pytest.fixture
+def namespaced_project(tmp_path):
+    configs = {
+        "agents/top": "name: top\ndescription: d\nversion: 1.0.0\n",
+        "agents/payments/base": "name: base\ndescription: shared\nversion: 1.0.0\nmodel_preferences: [gpt-4]\n",
+        "agents/payments/refund-bot": "extends: payments/base\nname: refund-bot\n",
+        "agents/payments/emea/vat-bot": "extends: agents/payments/base\nname: vat-bot\n",
+        "agents/payments/broken": "name: broken\n",
+        "agents/archive/old/legacy": "name: legacy\n",
+        "skills/team/deploy": "name: deploy\ndescription: d\nversion: 1.0.0\n",
+    }
+    for path, text in configs.items():
+        d = tmp_path / path
+        d.mkdir(parents=True)
+        (d / ("agent.yaml" if path.startswith("agents") else "skill.yaml")).write_text(text)
+    # Directories inside a config are not namespaces.
+    (tmp_path / "agents" / "top" / "examples" / "nested").mkdir(parents=True)
+    (tmp_path / "agents" / "top" / "examples" / "nested" / "agent.yaml").write_text("name: nested\n")
+    (tmp_path / "agents" / "empty").mkdir()
+    (tmp_path / ".agentspecignore").write_text("# vendored and archived trees\narchive/\n")
+    return tmp_path
+
+
+class TestNamespaces:
+    def test_discovery_recurses_and_names_by_path(self, namespaced_project):
+        from agentspec_cli.catalog import iter_configs
+        names = [name for name, _ in iter_configs(namespaced_project, "agents")]
+        assert names == ["empty", "payments/base", "payments/broken", "payments/emea/vat-bot",
+                         "payments/refund-bot", "top"]
+        assert [name for name, _ in iter_configs(namespaced_project, "skills")] == ["team/deploy"]
+
+    def test_ignored_directories_are_never_opened(self, namespaced_project):
+        from agentspec_cli import catalog
+        opened = []
+        real_scandir = os.scandir
+
+        def scandir(path):
+            opened.append(os.fspath(path))
+            return real_scandir(path)
+
+        with patch.object(catalog.os, "scandir", scandir):
+            list(catalog.scan_config_names(namespaced_project, "agents"))
+        assert not any("archive" in path for path in opened)
+        assert not any(path.endswith("refund-bot") for path in opened)
+
+    def test_extends_across_namespaces(self, namespaced_project):
+        from agentspec_cli.catalog import Resolver
+        resolver = Resolver(namespaced_project)
+        for name in ("payments/refund-bot", "payments/emea/vat-bot"):
+            data, error = resolver.resolve("agents", name)
+            assert error is None and data["model_preferences"] == ["gpt-4"]
+
+    def test_list_and_validate_show_namespaced_names(self, runner, namespaced_project):
+        from agentspec_cli.commands import app
+        for extra in ([], ["--stream"]):
+            result = runner.invoke(app, ["list", "--project-dir", str(namespaced_project), "--plain", *extra])
+            assert "payments/emea/vat-bot" in result.output and "team/deploy" in result.output
+            assert "legacy" not in result.output and "nested" not in result.output
+        result = runner.invoke(app, ["validate", "--project-dir", str(namespaced_project), "--plain"])
+        assert result.exit_code == 1
+        assert "payments/refund-bot: valid" in result.output
+        assert "payments/broken:" in result.output and "legacy" not in result.output
+
+    def test_new_agent_extends_namespaced_base(self, runner, namespaced_project):
+        from agentspec_cli.commands import app
+        from agentspec_cli.catalog import Resolver
+        for i, ref in enumerate(["payments/base", "agents/payments/base", "skills/team/deploy"]):
+            result = runner.invoke(app, [
+                "new-agent", "--name", f"child-{i}", "--description", "Child agent", "--extends", ref,
+                "--non-interactive", "--project-dir", str(namespaced_project),
+            ])
+            assert result.exit_code == 0, result.output
+            data, error = Resolver(namespaced_project).resolve("agents", f"child-{i}")
+            assert error is None, error
+        result = runner.invoke(app, [
+            "new-agent", "--name", "orphan", "--description", "d", "--extends", "payments/nope",
+            "--non-interactive", "--project-dir", str(namespaced_project),
+        ])
+        assert result.exit_code == 1 and "unknown base config" in result.output
+
+    def test_changed_files_map_to_namespaced_configs(self, namespaced_project):
+        from agentspec_cli.catalog import config_dir_for_path
+        p = namespaced_project
+        assert config_dir_for_path(p, "agents/payments/emea/vat-bot/prompt.md") == p / "agents/payments/emea/vat-bot"
+        assert config_dir_for_path(p, "agents/top/examples/nested/agent.yaml") == p / "agents/top"
+        assert config_dir_for_path(p, "agents/payments/gone/agent.yaml") == p / "agents/payments/gone"
+        assert config_dir_for_path(p, "agents/archive/old/legacy/agent.yaml") is None
+
+    def test_ignore_patterns(self):
+        from agentspec_cli.ignore import IgnoreSpec
+        spec = IgnoreSpec([
+            "# comment", "", "vendor/", "/agents/tmp-*", "skills/**/old", "draft-[0-9]",
+            "agents/keep-*", "!agents/keep-this",
+        ])
+        assert spec.match("agents/vendor") and spec.match("skills/team/vendor")
+        assert spec.match("agents/tmp-1") and not spec.match("agents/team/tmp-1")
+        assert spec.match("skills/old") and spec.match("skills/a/b/old") and not spec.match("agents/old")
+        assert spec.match("agents/draft-3") and not spec.match("agents/draft-x")
+        assert spec.match("agents/keep-that") and not spec.match("agents/keep-this")
+        assert spec.match_any("agents/vendor/thing") and not spec.match_any("agents/thing")
+        assert not IgnoreSpec(["# only comments"])